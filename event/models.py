@@ -24,9 +24,18 @@ class Event(models.Model):
     kategori = models.CharField(max_length=20, choices=CATEGORY_CHOICES, default='basket')
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # home_event / get_events_ajax: filter kategori + rentang date, urut date
+            models.Index(fields=['kategori', 'date'], name='event_kategori_date_idx'),
+            # Tanpa filter kategori: date >= now (upcoming) / date < now (past)
+            models.Index(fields=['date'], name='event_date_idx'),
+        ]
+
     def __str__(self):
         return self.judul
 
     def increment_views(self):
-        self.event_views += 1
-        self.save()
+        # Write-behind: hit dicatat di buffer view counter, ditulis ke DB saat flush
+        from news.view_counter import record_view
+        record_view(self)
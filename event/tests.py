@@ -6,6 +6,7 @@ from event.forms import EventForm
 from .models import Event
 from django.contrib.auth.models import User
 from django.utils import timezone
+from news.view_counter import flush_views
 
 class TicketBookingModelTest(TestCase):
     def setUp(self):
@@ -72,6 +73,7 @@ class TicketBookingModelTest(TestCase):
         initial_views = event.event_views
         event.increment_views()
         self.assertEqual(event.event_views, initial_views + 1)
+        flush_views()
         event.refresh_from_db()
         self.assertEqual(event.event_views, 1)
     
@@ -632,6 +634,7 @@ class EventViewsTest(TestCase):
     def test_event_detail_increments_views(self):
         initial_views = self.future_event.event_views
         self.client.get(reverse('event:event_detail', args=[self.future_event.id]))
+        flush_views()
         self.future_event.refresh_from_db()
         self.assertEqual(self.future_event.event_views, initial_views + 1)
     
@@ -899,4 +902,23 @@ class EventViewsTest(TestCase):
                 break
         
         self.assertIsNotNone(event_data)
-        self.assertIsNone(event_data['user_id'])
\ No newline at end of file
+        self.assertIsNone(event_data['user_id'])
+    
+    def test_get_events_ajax_not_modified(self):
+        url = reverse('event:event_json')
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.future_event.judul = 'Future Event (Updated)'
+        self.future_event.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_get_events_ajax_etag_changes_when_event_passes(self):
+        url = reverse('event:event_json')
+        etag = self.client.get(url)['ETag']
+        # Tanpa save(): event berpindah ke 'past' hanya karena waktu berjalan
+        Event.objects.filter(pk=self.future_event.pk).update(date=timezone.now() - timedelta(minutes=1))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
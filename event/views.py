@@ -11,6 +11,9 @@ from django.contrib.auth.decorators import login_required
 from django.utils.html import strip_tags
 from datetime import datetime
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_cookie
+from news import feed_versions
 import json
 
 @login_required
@@ -163,7 +166,17 @@ def get_event_ajax(request, id):
         logging.error(f"Error in get_event_ajax: {e}")
         return JsonResponse({'success': False, 'error': str(e)})
 
+def _events_json_etag(request):
+    # Pembagian upcoming/past bergantung waktu sekarang: jumlah event yang
+    # sudah lewat berubah tepat saat ada event yang berpindah kelompok.
+    past_count = Event.objects.filter(date__lt=timezone.now()).count()
+    return feed_versions.make_etag(
+        [feed_versions.EVENT], request.GET.urlencode(), request.user.pk, past_count
+    )
+
 @csrf_exempt
+@vary_on_cookie
+@condition(etag_func=_events_json_etag)
 def get_events_ajax(request):
     category = request.GET.get('category', '')
     now = timezone.now()
@@ -5,4 +5,12 @@ class ForumdiskusiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'forumdiskusi'
 
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+        from . import live, stats
+        from .models import Post
 
+        post_save.connect(stats.post_saved, sender=Post, dispatch_uid='forum_post_count_save')
+        post_delete.connect(stats.post_deleted, sender=Post, dispatch_uid='forum_post_count_delete')
+        post_save.connect(live.post_saved, sender=Post, dispatch_uid='forum_live_post_save')
+        post_delete.connect(live.post_deleted, sender=Post, dispatch_uid='forum_live_post_delete')
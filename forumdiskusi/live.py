@@ -0,0 +1,469 @@
+"""
+Update live forum diskusi lewat Server-Sent Events (SSE).
+
+Setiap forum punya satu channel, yaitu pk artikelnya (forum baru dibuat saat
+komentar pertama, jadi viewer bisa berlangganan sebelum forumnya ada).
+Perubahan komentar dipublikasikan setelah transaksinya commit:
+
+- ``comment_added`` / ``comment_edited`` / ``comment_deleted``: signal
+  post_save/post_delete Post
+- ``score_changed``: engine vote (forumdiskusi/voting.py), karena vote memakai
+  ``update()`` yang tidak mengirim signal
+
+Endpoint ``forum/<pk>/events/`` (view async, hanya di server ASGI, mis.
+``uvicorn sporra.asgi:application``) menahan koneksi terbuka dan menunggu di
+``asyncio.Queue`` milik koneksi itu. Viewer yang diam tidak menjalankan query
+atau polling apa pun, hanya heartbeat setiap ``FORUM_LIVE_HEARTBEAT`` detik.
+
+Event diberi id yang naik terus per channel (dimulai dari waktu channel dibuat
+dalam mikrodetik, jadi tetap naik setelah restart). EventSource yang
+tersambung ulang mengirim ``Last-Event-ID`` dan event yang terlewat diputar
+ulang dari riwayat singkat; jika riwayatnya sudah tidak lengkap, client
+menerima event ``reset`` dan memuat ulang komentar.
+
+Backend pub/sub (``FORUM_LIVE_BACKEND``):
+    'local'  (default) in-process, cukup untuk satu proses ASGI
+    'cache'  lewat Django cache bersama (Redis/Memcached) untuk banyak worker:
+             satu thread poller per proses membaca semua channel yang sedang
+             ditonton dengan satu ``get_many`` per ``FORUM_LIVE_POLL_INTERVAL``,
+             berapa pun jumlah viewer-nya
+    dotted path ke subclass ``Broker`` lain (mis. Redis pub/sub)
+
+Settings (opsional):
+    FORUM_LIVE_BACKEND        default 'local'
+    FORUM_LIVE_HEARTBEAT      detik, default 15
+    FORUM_LIVE_HISTORY        event per channel untuk replay, default 100
+    FORUM_LIVE_POLL_INTERVAL  detik (backend cache), default 0.5
+    FORUM_LIVE_QUEUE_SIZE     event antre per koneksi, default 256
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict, defaultdict, deque, namedtuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .models import ForumDiskusi, Post
+
+COMMENT_ADDED = 'comment_added'
+COMMENT_EDITED = 'comment_edited'
+COMMENT_DELETED = 'comment_deleted'
+SCORE_CHANGED = 'score_changed'
+RESET = 'reset'
+
+# Jeda reconnect EventSource (milidetik)
+RETRY_MS = 3000
+# Channel lokal yang disimpan riwayatnya (yang paling lama tidak aktif dibuang)
+MAX_CHANNELS = 1000
+CACHE_KEY_PREFIX = 'forumlive'
+# Umur event di cache (detik); replay yang lebih lama dari ini -> reset
+CACHE_EVENT_TTL = 300
+# Tick poller sebelum event yang id-nya sudah diambil tapi belum tertulis dilewati
+CACHE_MISSING_TICKS = 4
+
+logger = logging.getLogger(__name__)
+
+
+class Event(namedtuple('Event', 'id type data')):
+    __slots__ = ()
+
+    def encode(self):
+        return f"id: {self.id}\nevent: {self.type}\ndata: {json.dumps(self.data)}\n\n"
+
+
+def get_heartbeat():
+    return getattr(settings, 'FORUM_LIVE_HEARTBEAT', 15)
+
+
+def get_history_size():
+    return getattr(settings, 'FORUM_LIVE_HISTORY', 100)
+
+
+def get_poll_interval():
+    return getattr(settings, 'FORUM_LIVE_POLL_INTERVAL', 0.5)
+
+
+def get_queue_size():
+    return getattr(settings, 'FORUM_LIVE_QUEUE_SIZE', 256)
+
+
+def _start_id():
+    return time.time_ns() // 1000
+
+
+class Subscription:
+    """Antrean event satu koneksi SSE, dibaca di event loop koneksi itu."""
+
+    def __init__(self, channel, loop, maxsize=None):
+        self.channel = channel
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize or get_queue_size())
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Client terlalu lambat: buang antreannya, minta client memuat ulang
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(Event(event.id, RESET, {}))
+
+    def deliver(self, event):
+        """Boleh dipanggil dari thread mana pun."""
+        _deliver_on_loop(self.loop, [self], event)
+
+    async def get(self, timeout=None):
+        """Event berikutnya; raise ``asyncio.TimeoutError`` setelah ``timeout`` detik."""
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
+def _put_all(subscriptions, event):
+    for subscription in subscriptions:
+        subscription._put(event)
+
+
+def _deliver_on_loop(loop, subscriptions, event):
+    try:
+        loop.call_soon_threadsafe(_put_all, subscriptions, event)
+    except RuntimeError:
+        # Event loop koneksi sudah ditutup
+        pass
+
+
+class Broker:
+    """
+    Interface pub/sub. Subclass mengimplementasikan ``publish``, ``last_id``
+    dan ``history``, lalu memanggil ``_deliver`` untuk setiap event yang
+    masuk; fan-out ke koneksi di proses ini ada di sini.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def publish(self, channel, type, data):
+        raise NotImplementedError
+
+    def last_id(self, channel):
+        """Id event terakhir ``channel`` (titik awal untuk koneksi baru)."""
+        raise NotImplementedError
+
+    def history(self, channel, after):
+        """Event ``channel`` dengan id > ``after``, atau None jika riwayatnya tidak lengkap."""
+        raise NotImplementedError
+
+    def subscribe(self, subscription):
+        with self._lock:
+            self._subscribers[subscription.channel].add(subscription)
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.channel]
+
+    def channels(self):
+        """Channel yang sedang punya subscriber di proses ini."""
+        with self._lock:
+            return list(self._subscribers)
+
+    def _deliver(self, channel, event):
+        by_loop = defaultdict(list)
+        with self._lock:
+            for subscription in self._subscribers.get(channel, ()):
+                by_loop[subscription.loop].append(subscription)
+        # Satu wakeup per event loop, bukan per koneksi
+        for loop, subscriptions in by_loop.items():
+            _deliver_on_loop(loop, subscriptions, event)
+
+
+class _ChannelLog:
+    def __init__(self, maxlen):
+        self.last_id = self.floor = _start_id()
+        self.events = deque(maxlen=maxlen)
+
+
+class LocalBroker(Broker):
+    """Pub/sub in-process; riwayat ``FORUM_LIVE_HISTORY`` event per channel di memori."""
+
+    def __init__(self):
+        super().__init__()
+        self._logs = OrderedDict()
+
+    def _log(self, channel):
+        # Dipanggil dengan self._lock terkunci
+        log = self._logs.get(channel)
+        if log is None:
+            log = self._logs[channel] = _ChannelLog(get_history_size())
+            while len(self._logs) > MAX_CHANNELS:
+                self._logs.popitem(last=False)
+        else:
+            self._logs.move_to_end(channel)
+        return log
+
+    def publish(self, channel, type, data):
+        with self._lock:
+            log = self._log(channel)
+            log.last_id += 1
+            if len(log.events) == log.events.maxlen:
+                log.floor = log.events[0].id
+            event = Event(log.last_id, type, data)
+            log.events.append(event)
+        self._deliver(channel, event)
+        return event
+
+    def last_id(self, channel):
+        with self._lock:
+            return self._log(channel).last_id
+
+    def history(self, channel, after):
+        with self._lock:
+            log = self._log(channel)
+            if after < log.floor:
+                return None
+            return [event for event in log.events if event.id > after]
+
+
+class CacheBroker(Broker):
+    """
+    Pub/sub lewat Django cache bersama. Setiap channel punya counter
+    ``forumlive:<channel>:seq`` (``cache.incr``) dan satu key per event
+    (umur ``CACHE_EVENT_TTL``). Cache lokal per proses (LocMemCache) tidak
+    dibagi antar worker, jadi backend ini butuh Redis/Memcached.
+    """
+
+    def __init__(self):
+        super().__init__()
+        # channel -> id terakhir yang sudah diteruskan ke subscriber proses ini
+        self._seen = {}
+        self._missing = {}
+        self._poller = None
+
+    @staticmethod
+    def _seq_key(channel):
+        return f"{CACHE_KEY_PREFIX}:{channel}:seq"
+
+    @staticmethod
+    def _event_key(channel, event_id):
+        return f"{CACHE_KEY_PREFIX}:{channel}:{event_id}"
+
+    def _next_id(self, channel):
+        key = self._seq_key(channel)
+        for _ in range(2):
+            cache.add(key, _start_id(), timeout=None)
+            try:
+                return cache.incr(key)
+            except ValueError:
+                # Key hilang di antara add() dan incr() (evicted)
+                continue
+        raise RuntimeError(f"Counter event {key} terus hilang dari cache")
+
+    def publish(self, channel, type, data):
+        event = Event(self._next_id(channel), type, data)
+        cache.set(self._event_key(channel, event.id), (event.type, event.data), timeout=CACHE_EVENT_TTL)
+        return event
+
+    def last_id(self, channel):
+        key = self._seq_key(channel)
+        cache.add(key, _start_id(), timeout=None)
+        return cache.get(key) or 0
+
+    def _fetch(self, channel, after, last):
+        """Event id ``after+1..last`` yang ada di cache: ``{id: Event}``."""
+        keys = {self._event_key(channel, event_id): event_id for event_id in range(after + 1, last + 1)}
+        values = cache.get_many(list(keys))
+        return {keys[key]: Event(keys[key], *value) for key, value in values.items()}
+
+    def history(self, channel, after):
+        last = cache.get(self._seq_key(channel))
+        if last is None or last <= after:
+            return []
+        if last - after > get_history_size():
+            return None
+        events = self._fetch(channel, after, last)
+        if len(events) < last - after:
+            return None
+        return [events[event_id] for event_id in sorted(events)]
+
+    def subscribe(self, subscription):
+        channel = subscription.channel
+        with self._lock:
+            watched = channel in self._seen
+        # Titik awal poller diambil sebelum subscriber terdaftar; event sebelum
+        # titik ini diputar ulang oleh stream() lewat history()
+        seen = None if watched else cache.get(self._seq_key(channel)) or 0
+        with self._lock:
+            if seen is not None:
+                self._seen.setdefault(channel, seen)
+            self._subscribers[channel].add(subscription)
+            if self._poller is None:
+                self._poller = threading.Thread(target=self._poll_forever, name='forum-live-poller', daemon=True)
+                self._poller.start()
+
+    def poll(self):
+        """Satu putaran poller: teruskan event baru semua channel yang ditonton."""
+        with self._lock:
+            for channel in list(self._seen):
+                if channel not in self._subscribers:
+                    del self._seen[channel]
+                    self._missing.pop(channel, None)
+            seen = dict(self._seen)
+        if not seen:
+            return 0
+        latest = cache.get_many([self._seq_key(channel) for channel in seen])
+        delivered = 0
+        for channel, after in seen.items():
+            last = latest.get(self._seq_key(channel))
+            if last is None or last <= after:
+                continue
+            # Setelah jeda panjang cukup ambil riwayat terakhir; sisanya diganti reset
+            if last - after > get_history_size():
+                self._deliver(channel, Event(last - get_history_size(), RESET, {}))
+                after = last - get_history_size()
+            events = self._fetch(channel, after, last)
+            for event_id in range(after + 1, last + 1):
+                event = events.get(event_id)
+                if event is None:
+                    # incr() sudah jalan tapi set() belum; tunggu beberapa tick lalu lewati
+                    missing, ticks = self._missing.get(channel, (event_id, 0))
+                    if missing == event_id and ticks < CACHE_MISSING_TICKS:
+                        self._missing[channel] = (event_id, ticks + 1)
+                        break
+                    event = Event(event_id, RESET, {})
+                self._missing.pop(channel, None)
+                self._deliver(channel, event)
+                delivered += 1
+                after = event_id
+            with self._lock:
+                if channel in self._seen:
+                    self._seen[channel] = after
+        return delivered
+
+    def _poll_forever(self):
+        while True:
+            with self._lock:
+                if not self._subscribers:
+                    self._poller = None
+                    return
+            try:
+                self.poll()
+            except Exception:
+                logger.exception("Gagal membaca event forum dari cache")
+            time.sleep(get_poll_interval())
+
+
+_brokers = {}
+_brokers_lock = threading.Lock()
+
+
+def get_broker():
+    backend = getattr(settings, 'FORUM_LIVE_BACKEND', 'local')
+    with _brokers_lock:
+        if backend not in _brokers:
+            if backend == 'local':
+                _brokers[backend] = LocalBroker()
+            elif backend == 'cache':
+                _brokers[backend] = CacheBroker()
+            elif '.' in backend:
+                _brokers[backend] = import_string(backend)()
+            else:
+                raise ValueError(f"FORUM_LIVE_BACKEND tidak dikenal: {backend!r}")
+        return _brokers[backend]
+
+
+def publish(channel, type, data):
+    """Publikasikan event ke ``channel`` setelah transaksi yang sedang berjalan commit."""
+    def send():
+        try:
+            get_broker().publish(str(channel), type, data)
+        except Exception:
+            # Live update tidak boleh menggagalkan komentar/vote yang sudah tersimpan
+            logger.exception("Gagal mempublikasikan event forum %s", type)
+
+    transaction.on_commit(send)
+
+
+async def stream(channel, after=None, heartbeat=None):
+    """
+    Generator async isi response SSE untuk ``channel``. ``after``: id event
+    terakhir yang sudah dimiliki client (dari ``Last-Event-ID``), atau None
+    untuk mulai dari sekarang.
+    """
+    broker = get_broker()
+    heartbeat = heartbeat or get_heartbeat()
+    subscription = Subscription(channel, asyncio.get_running_loop())
+    # Backend bisa melakukan I/O (cache); jalankan di thread pool, bukan di event loop
+    await sync_to_async(broker.subscribe, thread_sensitive=False)(subscription)
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        last = 0
+        if after is not None:
+            last = after
+            missed = await sync_to_async(broker.history, thread_sensitive=False)(channel, after)
+            if missed is None:
+                last = await sync_to_async(broker.last_id, thread_sensitive=False)(channel)
+                yield Event(last, RESET, {}).encode()
+            else:
+                for event in missed:
+                    last = event.id
+                    yield event.encode()
+        while True:
+            try:
+                event = await subscription.get(heartbeat)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            # Event yang sudah terkirim lewat replay
+            if event.id <= last:
+                continue
+            last = event.id
+            yield event.encode()
+    finally:
+        broker.unsubscribe(subscription)
+
+
+def _channel(post):
+    if Post.forum.is_cached(post):
+        return post.forum.article_id
+    return ForumDiskusi.objects.filter(pk=post.forum_id).values_list('article_id', flat=True).first()
+
+
+def comment_data(post):
+    """Isi event ``comment_added`` (bentuk sama dengan komentar di forum_json)."""
+    return {
+        "id": post.id,
+        "author": post.author.username,
+        "content": post.content,
+        "score": post.score,
+        "upvotes": post.upvotes,
+        "downvotes": post.downvotes,
+        "created_at": post.created_at.isoformat(),
+    }
+
+
+def post_saved(sender, instance, created=False, raw=False, **kwargs):
+    """Receiver post_save Post."""
+    if raw:
+        return
+    channel = _channel(instance)
+    if channel is None:
+        return
+    if created:
+        publish(channel, COMMENT_ADDED, comment_data(instance))
+    else:
+        publish(channel, COMMENT_EDITED, {"id": instance.id, "content": instance.content})
+
+
+def post_deleted(sender, instance, **kwargs):
+    """Receiver post_delete Post."""
+    channel = _channel(instance)
+    if channel is not None:
+        publish(channel, COMMENT_DELETED, {"id": instance.id})
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from forumdiskusi.models import ForumDiskusi, Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Menghapus ForumDiskusi yang tidak punya komentar sama sekali (sisa dari versi lama yang '
+        'membuat forum setiap kali halaman forum dibuka). Dihapus per batch.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Jumlah forum yang dihapus per transaksi (default 1000).'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Hanya hitung forum kosong, tidak menghapus apa pun.'
+        )
+
+    def handle(self, *args, **options):
+        empty = ForumDiskusi.objects.filter(~Exists(Post.objects.filter(forum=OuterRef('pk'))))
+        if options['dry_run']:
+            self.stdout.write(f"{empty.count()} forum kosong akan dihapus.")
+            return
+
+        batch_size = options['batch_size']
+        deleted = 0
+        last_pk = None
+        while True:
+            batch = empty.order_by('pk')
+            if last_pk is not None:
+                batch = batch.filter(pk__gt=last_pk)
+            pks = list(batch.values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                break
+            last_pk = pks[-1]
+            with transaction.atomic():
+                # Kunci dulu, lalu cek ulang: komentar yang masuk di antara dua query ini
+                # membuat forumnya batal dihapus, bukan ikut terhapus (cascade)
+                locked = list(ForumDiskusi.objects.select_for_update().filter(pk__in=pks).values_list('pk', flat=True))
+                count, _ = empty.filter(pk__in=locked).delete()
+            deleted += count
+            self.stdout.write(f"  {deleted} forum kosong dihapus...")
+
+        self.stdout.write(self.style.SUCCESS(f"Selesai! {deleted} forum kosong dihapus."))
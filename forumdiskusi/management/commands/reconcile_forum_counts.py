@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from forumdiskusi import stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Mencocokkan ulang post_count dan last_activity_at setiap forum dengan tabel komentar '
+        '(mis. setelah import massal dengan bulk_create atau edit langsung di database).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Jumlah forum yang diperiksa per batch (default 1000).'
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        checked, fixed = stats.reconcile(batch_size=options['batch_size'])
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Selesai! {checked} forum diperiksa, {fixed} dikoreksi ({elapsed:.2f} detik)."
+        ))
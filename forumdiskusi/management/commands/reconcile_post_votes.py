@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from forumdiskusi import voting
+
+
+class Command(BaseCommand):
+    help = (
+        'Mencocokkan ulang skor, jumlah upvote/downvote dan rank key (best/hot/controversial) '
+        'setiap komentar dengan tabel vote (mis. setelah import massal atau edit langsung di database).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Jumlah komentar yang diperiksa per batch (default 1000).'
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        checked, fixed = voting.reconcile(batch_size=options['batch_size'])
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Selesai! {checked} komentar diperiksa, {fixed} dikoreksi ({elapsed:.2f} detik)."
+        ))
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forumdiskusi', '0002_alter_forumdiskusi_article'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['forum', '-score', '-created_at'], name='forum_post_rank_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:21
+
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill(apps, schema_editor):
+    ForumDiskusi = apps.get_model('forumdiskusi', 'ForumDiskusi')
+    Post = apps.get_model('forumdiskusi', 'Post')
+    posts = Post.objects.filter(forum=OuterRef('pk')).order_by().values('forum')
+    ForumDiskusi.objects.update(
+        post_count=Coalesce(Subquery(posts.annotate(n=Count('pk')).values('n')), 0),
+        last_activity_at=Subquery(posts.annotate(last=Max('created_at')).values('last')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forumdiskusi', '0003_hot_query_indexes'),
+        ('news', '0008_article_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='forumdiskusi',
+            name='last_activity_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='forumdiskusi',
+            name='post_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='forumdiskusi',
+            index=models.Index(fields=['-post_count', '-last_activity_at'], name='forum_top_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='forumdiskusi',
+            index=models.Index(fields=['-last_activity_at'], name='forum_activity_idx'),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forumdiskusi', '0004_forum_post_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['forum', '-score', '-created_at', '-id'], name='forum_post_keyset_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='post',
+            name='forum_post_rank_idx',
+        ),
+    ]
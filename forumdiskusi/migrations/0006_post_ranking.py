@@ -0,0 +1,86 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:26
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from forumdiskusi import ranking
+
+
+def backfill(apps, schema_editor):
+    Post = apps.get_model('forumdiskusi', 'Post')
+    Vote = apps.get_model('forumdiskusi', 'Vote')
+
+    def count(condition):
+        votes = Vote.objects.filter(post=OuterRef('pk'), **condition).order_by().values('post')
+        return Coalesce(Subquery(votes.annotate(n=Count('pk')).values('n')), 0)
+
+    posts = (
+        Post.objects.annotate(up=count({'value__gt': 0}), down=count({'value__lt': 0}))
+        .only('pk', 'created_at').order_by('pk')
+    )
+    fields = ['upvotes', 'downvotes', 'wilson', 'hot', 'controversy']
+    batch = []
+    for post in posts.iterator(chunk_size=1000):
+        post.upvotes, post.downvotes = post.up, post.down
+        for name, value in ranking.rank_keys(post.up, post.down, post.created_at).items():
+            setattr(post, name, value)
+        batch.append(post)
+        if len(batch) >= 1000:
+            Post.objects.bulk_update(batch, fields)
+            batch = []
+    Post.objects.bulk_update(batch, fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forumdiskusi', '0005_post_keyset_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='controversy',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='downvotes',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='hot',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='upvotes',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='wilson',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['forum', '-wilson', '-id'], name='forum_post_best_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['forum', '-created_at', '-id'], name='forum_post_new_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['forum', '-hot', '-id'], name='forum_post_hot_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['forum', '-controversy', '-id'], name='forum_post_controversial_idx'),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
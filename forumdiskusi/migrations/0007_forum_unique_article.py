@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:46
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def merge_duplicate_forums(apps, schema_editor):
+    """Pindahkan komentar forum ganda ke forum tertua artikelnya, lalu hapus sisanya."""
+    ForumDiskusi = apps.get_model('forumdiskusi', 'ForumDiskusi')
+    Post = apps.get_model('forumdiskusi', 'Post')
+    duplicated = (
+        ForumDiskusi.objects.filter(article__isnull=False).order_by().values('article')
+        .annotate(n=Count('pk')).filter(n__gt=1).values_list('article', flat=True)
+    )
+    for article_id in duplicated:
+        keep, *others = ForumDiskusi.objects.filter(article_id=article_id).order_by('pk')
+        Post.objects.filter(forum__in=others).update(forum=keep)
+        ForumDiskusi.objects.filter(pk__in=[forum.pk for forum in others]).delete()
+        stats = Post.objects.filter(forum=keep).aggregate(n=Count('pk'), last=Max('created_at'))
+        ForumDiskusi.objects.filter(pk=keep.pk).update(post_count=stats['n'], last_activity_at=stats['last'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forumdiskusi', '0006_post_ranking'),
+        ('news', '0009_article_category_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_forums, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='forumdiskusi',
+            constraint=models.UniqueConstraint(fields=('article',), name='forum_unique_article'),
+        ),
+    ]
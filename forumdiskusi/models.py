@@ -1,9 +1,27 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
+
+from . import ranking
 
 class ForumDiskusi(models.Model):
     article = models.ForeignKey('news.Article', on_delete=models.CASCADE, related_name='forum', null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Didenormalisasi dari Post (lihat forumdiskusi/stats.py), dicocokkan ulang oleh reconcile_forum_counts
+    post_count = models.PositiveIntegerField(default=0)
+    last_activity_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Sidebar "forum teramai": ORDER BY post_count DESC, last_activity_at DESC LIMIT 3
+            models.Index(fields=['-post_count', '-last_activity_at'], name='forum_top_idx'),
+            # Versi dengan jendela waktu: WHERE last_activity_at >= ?
+            models.Index(fields=['-last_activity_at'], name='forum_activity_idx'),
+        ]
+        constraints = [
+            # Satu forum per artikel: komentar pertama yang bersamaan tidak membuat dua forum
+            models.UniqueConstraint(fields=['article'], name='forum_unique_article'),
+        ]
 
     def __str__(self):
         return f"Forum Diskusi untuk: {self.article.title}"
@@ -15,9 +33,32 @@ class Post(models.Model):
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     score = models.IntegerField(default=0)
+    upvotes = models.PositiveIntegerField(default=0)
+    downvotes = models.PositiveIntegerField(default=0)
+    # Rank key per mode urutan (lihat forumdiskusi/ranking.py), diperbarui oleh engine vote
+    wilson = models.FloatField(default=0)
+    hot = models.FloatField(default=0)
+    controversy = models.FloatField(default=0)
+
+    class Meta:
+        # Satu index per mode urutan, dipakai juga oleh pagination keyset (forumdiskusi/pagination.py):
+        # WHERE forum_id = ? AND (key..., id) < cursor ORDER BY key... DESC, id DESC
+        indexes = [
+            models.Index(fields=['forum', '-score', '-created_at', '-id'], name='forum_post_keyset_idx'),
+            models.Index(fields=['forum', '-wilson', '-id'], name='forum_post_best_idx'),
+            models.Index(fields=['forum', '-created_at', '-id'], name='forum_post_new_idx'),
+            models.Index(fields=['forum', '-hot', '-id'], name='forum_post_hot_idx'),
+            models.Index(fields=['forum', '-controversy', '-id'], name='forum_post_controversial_idx'),
+        ]
 
     def __str__(self):
         return f"{self.author.username}: {self.content[:30]}"
+
+    def save(self, *args, **kwargs):
+        if self._state.adding and not self.hot:
+            # created_at (auto_now_add) baru diisi saat insert; selisihnya hanya mikrodetik
+            self.hot = ranking.hot(self.score, self.created_at or timezone.now())
+        super().save(*args, **kwargs)
     
 class Vote(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='votes')
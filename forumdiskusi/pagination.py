@@ -0,0 +1,99 @@
+"""
+Pagination keyset untuk komentar forum, untuk setiap mode urutan di
+``ranking.MODES`` (mis. ``top`` = ``score DESC, created_at DESC, id DESC``).
+
+Halaman berikutnya dimulai setelah komentar terakhir halaman sebelumnya
+(cursor = nilai kolom urutan komentar itu), bukan dengan OFFSET, jadi setiap
+halaman adalah satu range read di index ``(forum, -key..., -id)`` mode
+tersebut berapa pun dalamnya halaman tersebut. ``id`` membuat urutannya
+total walau nilai key-nya sama.
+
+Format cursor, ``InvalidCursor`` dan ``parse_limit`` memakai helper yang sama
+dengan feed artikel (news/pagination.py); nilai pertama cursor adalah nama
+mode supaya cursor mode lain ditolak.
+
+Settings (opsional):
+    FORUM_COMMENTS_PAGE_SIZE  default 20
+"""
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+
+from news import pagination as keyset
+from news.pagination import InvalidCursor
+
+from . import ranking
+
+MAX_PAGE_SIZE = keyset.MAX_LIMIT
+
+
+def _parse_datetime(value):
+    value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        raise ValueError('created_at tanpa zona waktu')
+    return value
+
+
+FIELD_PARSERS = {
+    'score': int,
+    'id': int,
+    'created_at': _parse_datetime,
+    'wilson': float,
+    'hot': float,
+    'controversy': float,
+}
+
+
+def get_page_size():
+    return getattr(settings, 'FORUM_COMMENTS_PAGE_SIZE', 20)
+
+
+def encode_cursor(post, mode=ranking.DEFAULT_MODE):
+    # Float di-encode JSON (repr), jadi bisa di-parse kembali tanpa kehilangan presisi
+    return keyset.encode_cursor([mode] + [getattr(post, field) for field in ranking.MODES[mode]])
+
+
+def decode_cursor(cursor, mode=ranking.DEFAULT_MODE):
+    """Return tuple nilai kolom urutan ``mode``. Raise ``InvalidCursor``."""
+    fields = ranking.MODES[mode]
+    cursor_mode, *values = keyset.decode_cursor(cursor, len(fields) + 1)
+    if cursor_mode != mode:
+        raise InvalidCursor(f'Cursor bukan untuk mode {mode}')
+    try:
+        return tuple(FIELD_PARSERS[field](value) for field, value in zip(fields, values))
+    except (TypeError, ValueError):
+        raise InvalidCursor('Cursor tidak valid')
+
+
+def parse_limit(value):
+    """Ukuran halaman dari query string (dibatasi 1..MAX_PAGE_SIZE)."""
+    return keyset.parse_limit(value, default=get_page_size(), maximum=MAX_PAGE_SIZE)
+
+
+def _after(fields, values):
+    """Baris setelah ``values`` dalam urutan menurun ``fields`` (perbandingan tuple)."""
+    condition = Q()
+    for i, field in enumerate(fields):
+        equal = {f: v for f, v in zip(fields[:i], values[:i])}
+        condition |= Q(**equal, **{f'{field}__lt': values[i]})
+    return condition
+
+
+def comment_page(posts, cursor=None, limit=None, mode=ranking.DEFAULT_MODE):
+    """
+    Satu halaman dari queryset komentar ``posts`` (satu forum) dalam urutan ``mode``.
+    Return ``(list komentar, cursor halaman berikutnya atau None)``.
+    """
+    limit = limit or get_page_size()
+    fields = ranking.MODES[mode]
+    posts = posts.order_by(*(f'-{field}' for field in fields))
+    if cursor:
+        values = decode_cursor(cursor, mode)
+        # key <= ? membatasi range index; sisanya memilih baris setelah cursor
+        posts = posts.filter(**{f'{fields[0]}__lte': values[0]}).filter(_after(fields, values))
+    page = list(posts[:limit + 1])
+    if len(page) > limit:
+        page = page[:limit]
+        return page, encode_cursor(page[-1], mode)
+    return page, None
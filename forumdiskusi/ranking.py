@@ -0,0 +1,80 @@
+"""
+Mode urutan komentar forum dan rank key yang dihitung di muka.
+
+Setiap mode punya kolom/urutan sendiri dan index ``(forum, -key, -id)``, jadi
+mengganti urutan tetap index scan (termasuk pagination keyset, lihat
+forumdiskusi/pagination.py), tidak pernah sort di Python:
+
+- ``top``: skor (upvote - downvote)
+- ``best``: batas bawah interval Wilson 95% dari proporsi upvote; komentar
+  dengan sedikit vote tidak langsung mengalahkan komentar yang sudah teruji
+- ``new``: waktu komentar
+- ``hot``: ``log10(|skor|)`` + waktu (tiap ``HOT_GRAVITY`` detik setara 10x
+  skor), jadi komentar baru bisa naik melewati komentar lama
+- ``controversial``: banyak vote dengan upvote/downvote berimbang
+
+``wilson``, ``hot`` dan ``controversy`` disimpan di Post dan diperbarui oleh
+engine vote (forumdiskusi/voting.py) dalam transaksi yang sama.
+"""
+import math
+from datetime import datetime, timezone as dt_timezone
+
+from django.utils import timezone
+
+MODES = {
+    'top': ('score', 'created_at', 'id'),
+    'best': ('wilson', 'id'),
+    'new': ('created_at', 'id'),
+    'hot': ('hot', 'id'),
+    'controversial': ('controversy', 'id'),
+}
+DEFAULT_MODE = 'top'
+LABELS = {
+    'top': 'Highest Votes',
+    'best': 'Best',
+    'new': 'Latest Posts',
+    'hot': 'Hot',
+    'controversial': 'Controversial',
+}
+
+EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+HOT_GRAVITY = 45000
+# z untuk interval kepercayaan 95%
+WILSON_Z = 1.959964
+
+
+def get_mode(value):
+    """Mode dari query string; nilai yang tidak dikenal -> ``DEFAULT_MODE``."""
+    return value if value in MODES else DEFAULT_MODE
+
+
+def wilson_lower_bound(upvotes, downvotes, z=WILSON_Z):
+    n = upvotes + downvotes
+    if n == 0:
+        return 0.0
+    phat = upvotes / n
+    return (
+        phat + z * z / (2 * n) - z * math.sqrt((phat * (1 - phat) + z * z / (4 * n)) / n)
+    ) / (1 + z * z / n)
+
+
+def hot(score, created_at):
+    order = math.log10(max(abs(score), 1))
+    sign = 1 if score > 0 else -1 if score < 0 else 0
+    return round(sign * order + (created_at - EPOCH).total_seconds() / HOT_GRAVITY, 7)
+
+
+def controversy(upvotes, downvotes):
+    if upvotes <= 0 or downvotes <= 0:
+        return 0.0
+    balance = downvotes / upvotes if upvotes > downvotes else upvotes / downvotes
+    return (upvotes + downvotes) ** balance
+
+
+def rank_keys(upvotes, downvotes, created_at=None):
+    """Nilai ``wilson``/``hot``/``controversy`` untuk Post dengan vote tersebut."""
+    return {
+        'wilson': wilson_lower_bound(upvotes, downvotes),
+        'hot': hot(upvotes - downvotes, created_at or timezone.now()),
+        'controversy': controversy(upvotes, downvotes),
+    }
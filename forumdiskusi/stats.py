@@ -0,0 +1,92 @@
+"""
+Jumlah komentar dan waktu aktivitas terakhir per forum, didenormalisasi ke
+``ForumDiskusi.post_count`` / ``last_activity_at``.
+
+- Signal post_save (komentar baru) dan post_delete Post mengubah counter
+  dengan ``UPDATE ... SET post_count = post_count +/- 1`` (``F()``), di dalam
+  transaksi yang sama dengan insert/delete komentarnya.
+- Sidebar "forum teramai" membaca top-N langsung dari index ``forum_top_idx``
+  tanpa GROUP BY ke seluruh komentar. Dengan ``FORUM_TOP_WINDOW_HOURS`` hanya
+  forum yang aktif dalam jendela itu yang ikut (range index ``forum_activity_idx``).
+- ``bulk_create``/raw SQL tidak mengirim signal: jalankan
+  ``python manage.py reconcile_forum_counts`` untuk mencocokkan ulang.
+
+Settings (opsional):
+    FORUM_TOP_WINDOW_HOURS  default None (sepanjang waktu)
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, F, Max
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import ForumDiskusi, Post
+
+
+def get_top_window():
+    hours = getattr(settings, 'FORUM_TOP_WINDOW_HOURS', None)
+    return timedelta(hours=hours) if hours else None
+
+
+def post_saved(sender, instance, created=False, raw=False, **kwargs):
+    """Receiver post_save Post."""
+    if not created or raw:
+        return
+    ForumDiskusi.objects.filter(pk=instance.forum_id).update(
+        post_count=F('post_count') + 1, last_activity_at=instance.created_at
+    )
+
+
+def post_deleted(sender, instance, **kwargs):
+    """Receiver post_delete Post."""
+    ForumDiskusi.objects.filter(pk=instance.forum_id).update(
+        post_count=Greatest(F('post_count') - 1, 0)
+    )
+
+
+def top_forums(window=None):
+    """
+    Queryset forum dengan komentar terbanyak (ambil ``[:n]``). ``window``
+    (timedelta, default dari settings): hanya forum yang ada komentarnya
+    dalam jendela waktu itu.
+    """
+    window = window or get_top_window()
+    forums = ForumDiskusi.objects.filter(post_count__gt=0)
+    if window:
+        forums = forums.filter(last_activity_at__gte=timezone.now() - window)
+    return forums.order_by('-post_count', '-last_activity_at')
+
+
+def reconcile(forums=None, batch_size=1000):
+    """
+    Hitung ulang counter ``forums`` (default semua) dari tabel Post, per batch.
+    Return ``(jumlah forum diperiksa, jumlah yang dikoreksi)``.
+    """
+    forums = ForumDiskusi.objects.all() if forums is None else forums
+    checked = fixed = 0
+    last_pk = None
+    while True:
+        batch = forums.order_by('pk')
+        if last_pk is not None:
+            batch = batch.filter(pk__gt=last_pk)
+        batch = list(batch.only('pk', 'post_count', 'last_activity_at')[:batch_size])
+        if not batch:
+            return checked, fixed
+        last_pk = batch[-1].pk
+        actual = {
+            row['forum']: (row['n'], row['last'])
+            for row in (
+                Post.objects.filter(forum__in=batch).order_by().values('forum')
+                .annotate(n=Count('pk'), last=Max('created_at'))
+            )
+        }
+        stale = []
+        for forum in batch:
+            count, last = actual.get(forum.pk, (0, None))
+            if (forum.post_count, forum.last_activity_at) != (count, last):
+                forum.post_count, forum.last_activity_at = count, last
+                stale.append(forum)
+        ForumDiskusi.objects.bulk_update(stale, ['post_count', 'last_activity_at'])
+        checked += len(batch)
+        fixed += len(stale)
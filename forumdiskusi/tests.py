@@ -1,12 +1,23 @@
-from django.test import TestCase, Client, RequestFactory
+import asyncio
+import threading
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.test import AsyncClient, TestCase, TransactionTestCase, Client, RequestFactory, override_settings
 from django.contrib.auth.models import User, AnonymousUser
 from django.urls import reverse
 from django.utils import timezone
 from django.contrib import admin
 
-from news.models import Article
+from news import feed_versions
+from news.models import Article, FeedVersion
+from forumdiskusi import live, ranking, stats, voting
 from forumdiskusi.models import ForumDiskusi, Post, Vote
 from forumdiskusi.admin import ForumDiskusiAdmin, PostAdmin, VoteAdmin
+from profile_user.models import UserProfile
 
 
 # ==========================
@@ -97,6 +108,32 @@ class ForumDiskusiTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertTrue(Post.objects.filter(content='Komentar baru').exists())
 
+    def test_add_comment_when_forum_created_concurrently(self):
+        from django.db import IntegrityError
+        from django.db.models.query import QuerySet
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            ForumDiskusi.objects.create(article=self.article)
+
+        # Request lain membuat forum di antara SELECT dan INSERT kita
+        original_get = QuerySet.get
+        calls = []
+
+        def get(queryset, *args, **kwargs):
+            if queryset.model is ForumDiskusi:
+                calls.append(kwargs)
+                if len(calls) == 1:
+                    raise ForumDiskusi.DoesNotExist
+            return original_get(queryset, *args, **kwargs)
+
+        self.client.login(username='naila', password='testpass')
+        url = reverse('forumdiskusi:add_comment', args=[self.article.pk])
+        with mock.patch.object(QuerySet, 'get', get):
+            response = self.client.post(url, {'content': 'Balapan'}, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(ForumDiskusi.objects.filter(article=self.article).count(), 1)
+        self.assertEqual(Post.objects.get(content='Balapan').forum, self.forum)
+        self.assertEqual(len(calls), 2)
+
     def test_add_comment_empty(self):
         self.client.login(username='naila', password='testpass')
         url = reverse('forumdiskusi:add_comment', args=[self.article.pk])
@@ -195,6 +232,98 @@ class ForumDiskusiTests(TestCase):
             self.assertFalse(adm.has_delete_permission(None))
 
 
+# ==========================
+# QUERY COUNT REGRESSION TESTS
+# ==========================
+class ForumQueryCountTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='naila', password='testpass')
+        UserProfile.objects.create(user=self.user, full_name='Naila', profile_picture='https://img.test/n.png')
+        self.article = Article.objects.create(title='Artikel', content='Isi', author=self.user)
+        self.forum = ForumDiskusi.objects.create(article=self.article)
+        self.client.login(username='naila', password='testpass')
+
+    def _add_comments(self, n):
+        for i in range(n):
+            author = User.objects.create_user(username=f'penulis{Post.objects.count()}', password='x')
+            post = Post.objects.create(forum=self.forum, author=author, content=f'Komentar {i}')
+            Vote.objects.create(post=post, user=self.user, value=1 if i % 2 else -1)
+
+    def test_forum_json_query_count_independent_of_comments(self):
+        url = reverse('forumdiskusi:forum_json', args=[self.article.pk])
+        self._add_comments(2)
+        with self.assertNumQueries(11):
+            self.client.get(url)
+
+        self._add_comments(10)
+        with self.assertNumQueries(11):
+            data = self.client.get(url).json()
+        self.assertEqual(len(data['comments']), 12)
+        self.assertEqual({c['user_vote'] for c in data['comments']}, {1, -1})
+
+    def test_forum_page_query_count_independent_of_comments(self):
+        url = reverse('forumdiskusi:forum', args=[self.article.pk])
+        self._add_comments(2)
+        with self.assertNumQueries(9):
+            self.client.get(url)
+
+        self._add_comments(10)
+        with self.assertNumQueries(9):
+            self.client.get(url)
+
+
+# ==========================
+# CONDITIONAL GET (ETag / 304)
+# ==========================
+class ForumJsonConditionalGetTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='naila', password='testpass')
+        self.other = User.objects.create_user(username='other', password='otherpass')
+        self.article = Article.objects.create(title='Artikel', content='Isi', author=self.user)
+        self.forum = ForumDiskusi.objects.create(article=self.article)
+        self.post = Post.objects.create(forum=self.forum, author=self.user, content='Halo')
+        self.url = reverse('forumdiskusi:forum_json', args=[self.article.pk])
+
+    def test_not_modified_until_vote(self):
+        self.client.login(username='naila', password='testpass')
+        etag = self.client.get(self.url)['ETag']
+
+        with self.assertNumQueries(4):  # session, user, versi feed, top forum
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.client.post(reverse('forumdiskusi:vote_post', args=[self.post.id]), {'vote': 'up'})
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['comments'][0]['user_vote'], 1)
+
+    def test_other_forum_activity_keeps_etag(self):
+        """Komentar/vote di forum artikel lain tidak membatalkan ETag forum ini."""
+        other_article = Article.objects.create(title='Lain', content='Isi', author=self.user)
+        other_forum = ForumDiskusi.objects.create(article=other_article)
+        # Forum lain tetap di bawah forum ini di sidebar forum teramai
+        Post.objects.create(forum=self.forum, author=self.other, content='Dua')
+        other_post = Post.objects.create(forum=other_forum, author=self.user, content='Lain')
+        self.client.login(username='naila', password='testpass')
+        etag = self.client.get(self.url)['ETag']
+
+        self.client.post(reverse('forumdiskusi:vote_post', args=[other_post.id]), {'vote': 'up'})
+        other_post.content = 'Diedit'
+        other_post.save()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(
+            FeedVersion.objects.get(key=feed_versions.forum_key(other_article.pk)).version, 4
+        )
+
+    def test_etag_differs_per_user(self):
+        self.client.login(username='naila', password='testpass')
+        etag = self.client.get(self.url)['ETag']
+        self.client.login(username='other', password='otherpass')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Cookie', response['Vary'])
+
+
 # ==========================
 # TESTS FOR ADMIN PERMISSIONS
 # ==========================
@@ -230,3 +359,596 @@ class AdminPermissionTests(TestCase):
             obj = self.forum if isinstance(adm, ForumDiskusiAdmin) else self.post if isinstance(adm, PostAdmin) else self.vote
             self.assertFalse(adm.has_change_permission(req_user, obj=obj))
             self.assertFalse(adm.has_delete_permission(req_user, obj=obj))
+
+
+# ==========================
+# VOTE ENGINE (delta F(), tanpa agregasi ulang)
+# ==========================
+class VoteEngineTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='naila', password='testpass')
+        self.article = Article.objects.create(title='Artikel', content='Isi', author=self.user)
+        self.forum = ForumDiskusi.objects.create(article=self.article)
+        self.post = Post.objects.create(forum=self.forum, author=self.user, content='Viral')
+
+    def _add_votes(self, n):
+        voters = User.objects.bulk_create([User(username=f'voter{Vote.objects.count() + i}') for i in range(n)])
+        Vote.objects.bulk_create([Vote(post=self.post, user=u, value=1) for u in voters])
+        Post.objects.filter(pk=self.post.pk).update(score=Vote.objects.filter(post=self.post).count())
+
+    def test_toggle(self):
+        other = User.objects.create_user(username='other')
+        self.assertEqual(voting.cast_vote(self.post.pk, self.user, voting.UP), (1, 1))
+        self.assertEqual(voting.cast_vote(self.post.pk, other, voting.DOWN), (0, -1))
+        # Klik arah sebaliknya -> netral
+        self.assertEqual(voting.cast_vote(self.post.pk, self.user, voting.DOWN), (-1, 0))
+        self.assertEqual(voting.cast_vote(self.post.pk, other, voting.DOWN), (0, 0))
+        self.assertFalse(Vote.objects.exists())
+
+    def test_query_count_independent_of_votes(self):
+        self._add_votes(1)
+        with self.assertNumQueries(8):
+            voting.cast_vote(self.post.pk, self.user, voting.UP)
+        self._add_votes(100)
+        with self.assertNumQueries(8):
+            voting.cast_vote(self.post.pk, self.user, voting.UP)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.score, 101)
+
+    def test_response_uses_recorded_vote(self):
+        self._add_votes(3)
+        self.client.login(username='naila', password='testpass')
+        url = reverse('forumdiskusi:vote_post', args=[self.post.id])
+        self.assertEqual(self.client.post(url, {'vote': 'down'}).json(), {'score': 2, 'user_vote': -1})
+        self.assertEqual(self.client.post(url, {'vote': 'down'}).json(), {'score': 3, 'user_vote': 0})
+
+    def test_missing_post(self):
+        self.client.login(username='naila', password='testpass')
+        response = self.client.post(reverse('forumdiskusi:vote_post', args=[self.post.id + 1]), {'vote': 'up'})
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(Vote.objects.exists())
+
+
+class VoteConcurrencyTest(TransactionTestCase):
+    def setUp(self):
+        author = User.objects.create_user(username='penulis')
+        article = Article.objects.create(title='Artikel', content='Isi', author=author)
+        self.post = Post.objects.create(forum=ForumDiskusi.objects.create(article=article), author=author, content='Viral')
+        self.voters = User.objects.bulk_create([User(username=f'voter{i}') for i in range(24)])
+        # Database test SQLite in-memory (shared cache) langsung menolak lock tanpa busy timeout,
+        # jadi dengan 24 thread sekaligus percobaan ulangnya perlu lebih banyak
+        patcher = mock.patch.object(voting, 'MAX_ATTEMPTS', 50)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _run_concurrently(self, jobs):
+        barrier = threading.Barrier(len(jobs))
+        errors = []
+
+        def worker(user, value):
+            try:
+                barrier.wait()
+                voting.cast_vote(self.post.pk, user, value)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=job) for job in jobs]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, [])
+
+    def test_final_score_equals_sum_of_votes(self):
+        jobs = [(user, voting.UP if i % 3 else voting.DOWN) for i, user in enumerate(self.voters)]
+        self._run_concurrently(jobs)
+        self.post.refresh_from_db()
+        self.assertEqual(Vote.objects.filter(post=self.post).count(), len(self.voters))
+        self.assertEqual(self.post.score, sum(value for _, value in jobs))
+
+        # Sebagian membatalkan vote bersamaan, sebagian lain vote ulang
+        self._run_concurrently([(user, voting.UP) for user in self.voters[::2]])
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.score, sum(Vote.objects.filter(post=self.post).values_list('value', flat=True)))
+        self.assertEqual(Vote.objects.filter(post=self.post).count(), len(self.voters) // 2)
+
+    def test_double_click_from_same_user(self):
+        user = self.voters[0]
+        self._run_concurrently([(user, voting.UP)] * 4)
+        self.post.refresh_from_db()
+        # Empat klik = dua kali vote + dua kali batal
+        self.assertFalse(Vote.objects.filter(post=self.post).exists())
+        self.assertEqual(self.post.score, 0)
+
+
+# ==========================
+# FORUM LAZY (tanpa write di GET)
+# ==========================
+class LazyForumTest(TestCase):
+    WRITE_PREFIXES = ('INSERT', 'UPDATE', 'DELETE')
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='naila', password='testpass')
+        self.article = Article.objects.create(title='Artikel Baru', content='Isi', author=self.user)
+        self.client.login(username='naila', password='testpass')
+
+    def _assert_no_writes(self, queries):
+        writes = [q['sql'] for q in queries if q['sql'].lstrip().upper().startswith(self.WRITE_PREFIXES)]
+        self.assertEqual(writes, [])
+
+    def test_read_paths_do_not_create_forum(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('forumdiskusi:forum', args=[self.article.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['comments']), [])
+        self._assert_no_writes(ctx.captured_queries)
+
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.client.get(reverse('forumdiskusi:forum_json', args=[self.article.pk])).json()
+        self._assert_no_writes(ctx.captured_queries)
+        self.assertIsNone(data['forum_id'])
+        self.assertEqual(data['comments'], [])
+        self.assertFalse(ForumDiskusi.objects.exists())
+
+    def test_first_comment_creates_forum(self):
+        url = reverse('forumdiskusi:add_comment', args=[self.article.pk])
+        self.client.post(url, {'content': ''})
+        self.assertFalse(ForumDiskusi.objects.exists())
+
+        self.client.post(url, {'content': 'Pertamax'})
+        self.client.post(url, {'content': 'Kedua'})
+        forum = ForumDiskusi.objects.get(article=self.article)
+        self.assertEqual(forum.posts.count(), 2)
+        data = self.client.get(reverse('forumdiskusi:forum_json', args=[self.article.pk])).json()
+        self.assertEqual(data['forum_id'], str(forum.id))
+
+
+class PurgeEmptyForumsTest(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='naila', password='testpass')
+        articles = [Article.objects.create(title=f'Artikel {i}', content='Isi', author=user) for i in range(5)]
+        self.forums = [ForumDiskusi.objects.create(article=article) for article in articles]
+        Post.objects.create(forum=self.forums[2], author=user, content='Ada isinya')
+
+    def test_purges_only_empty_forums(self):
+        out = StringIO()
+        call_command('purge_empty_forums', '--dry-run', stdout=out)
+        self.assertIn('4 forum kosong', out.getvalue())
+        self.assertEqual(ForumDiskusi.objects.count(), 5)
+
+        out = StringIO()
+        call_command('purge_empty_forums', '--batch-size', '3', stdout=out)
+        self.assertIn('Selesai! 4 forum kosong dihapus.', out.getvalue())
+        self.assertEqual(list(ForumDiskusi.objects.all()), [self.forums[2]])
+        self.assertEqual(Post.objects.count(), 1)
+
+
+# ==========================
+# POST_COUNT TERDENORMALISASI & SIDEBAR FORUM TERAMAI
+# ==========================
+class ForumPostCountTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='naila', password='testpass')
+        self.articles = [Article.objects.create(title=f'Artikel {i}', content='Isi', author=self.user) for i in range(4)]
+        self.client.login(username='naila', password='testpass')
+
+    def _comment(self, article, n=1):
+        for i in range(n):
+            self.client.post(reverse('forumdiskusi:add_comment', args=[article.pk]), {'content': f'Komentar {i}'})
+        return ForumDiskusi.objects.get(article=article)
+
+    def test_counter_follows_create_and_delete(self):
+        forum = self._comment(self.articles[0], 3)
+        self.assertEqual(forum.post_count, 3)
+        last = Post.objects.filter(forum=forum).latest('created_at')
+        self.assertEqual(forum.last_activity_at, last.created_at)
+
+        self.client.post(reverse('forumdiskusi:delete_comment', args=[last.pk]))
+        forum.refresh_from_db()
+        self.assertEqual(forum.post_count, 2)
+        # Forum ikut terhapus bersama artikelnya (cascade) tanpa error
+        self.articles[0].delete()
+        self.assertFalse(ForumDiskusi.objects.exists())
+
+    def test_top_forums_without_group_by(self):
+        counts = [2, 5, 1, 3]
+        for article, n in zip(self.articles, counts):
+            self._comment(article, n)
+        url = reverse('forumdiskusi:forum_json', args=[self.articles[0].pk])
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.client.get(url).json()
+        self.assertEqual([tf['post_count'] for tf in data['top_forums']], [5, 3, 2])
+        self.assertFalse(any('GROUP BY' in q['sql'] for q in ctx.captured_queries))
+
+        response = self.client.get(reverse('forumdiskusi:forum', args=[self.articles[0].pk]))
+        self.assertEqual([tf.post_count for tf in response.context['top_forums']], [5, 3, 2])
+
+    def test_top_forums_window(self):
+        busy = self._comment(self.articles[0], 3)
+        recent = self._comment(self.articles[1], 1)
+        ForumDiskusi.objects.filter(pk=busy.pk).update(last_activity_at=timezone.now() - timezone.timedelta(days=3))
+        self.assertEqual(list(stats.top_forums()), [busy, recent])
+        self.assertEqual(list(stats.top_forums(window=timezone.timedelta(hours=24))), [recent])
+        with self.settings(FORUM_TOP_WINDOW_HOURS=24):
+            data = self.client.get(reverse('forumdiskusi:forum_json', args=[self.articles[0].pk])).json()
+        self.assertEqual([tf['post_count'] for tf in data['top_forums']], [1])
+
+    def test_reconcile_command(self):
+        forum = self._comment(self.articles[0], 1)
+        empty = ForumDiskusi.objects.create(article=self.articles[1])
+        # bulk_create tidak mengirim signal -> counter tertinggal
+        Post.objects.bulk_create([Post(forum=forum, author=self.user, content=f'Massal {i}') for i in range(4)])
+        ForumDiskusi.objects.filter(pk=empty.pk).update(post_count=7)
+
+        out = StringIO()
+        call_command('reconcile_forum_counts', '--batch-size', '1', stdout=out)
+        self.assertIn('2 forum diperiksa, 2 dikoreksi', out.getvalue())
+        forum.refresh_from_db()
+        empty.refresh_from_db()
+        self.assertEqual(forum.post_count, 5)
+        self.assertEqual(forum.last_activity_at, Post.objects.filter(forum=forum).latest('created_at').created_at)
+        self.assertEqual((empty.post_count, empty.last_activity_at), (0, None))
+
+
+# ==========================
+# PAGINATION KEYSET KOMENTAR
+# ==========================
+class CommentPaginationTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='naila', password='testpass')
+        self.article = Article.objects.create(title='Artikel', content='Isi', author=self.user)
+        self.forum = ForumDiskusi.objects.create(article=self.article)
+        self.posts = Post.objects.bulk_create([
+            Post(forum=self.forum, author=self.user, content=f'Komentar {i}', score=i % 4) for i in range(25)
+        ])
+        # Banyak skor dan waktu yang sama persis: urutan harus tetap total lewat id
+        now = timezone.now()
+        for i, post in enumerate(self.posts):
+            Post.objects.filter(pk=post.pk).update(created_at=now - timezone.timedelta(minutes=i % 3))
+        Vote.objects.bulk_create([Vote(post=p, user=self.user, value=1) for p in self.posts[::5]])
+        self.expected = list(
+            Post.objects.filter(forum=self.forum).order_by('-score', '-created_at', '-id').values_list('id', flat=True)
+        )
+        self.url = reverse('forumdiskusi:forum_comments_json', args=[self.article.pk])
+        self.client.login(username='naila', password='testpass')
+
+    def test_pages_cover_thread_in_rank_order(self):
+        seen = []
+        cursor = None
+        while True:
+            params = {'limit': 7}
+            if cursor:
+                params['cursor'] = cursor
+            data = self.client.get(self.url, params).json()
+            seen.extend(c['id'] for c in data['comments'])
+            cursor = data['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual(seen, self.expected)
+
+    def test_one_vote_query_per_page(self):
+        data = self.client.get(self.url, {'limit': 10}).json()
+        voted = {p.id for p in self.posts[::5]}
+        self.assertEqual({c['id'] for c in data['comments'] if c['user_vote'] == 1}, voted & set(self.expected[:10]))
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(self.url, {'limit': 10, 'cursor': data['next_cursor']})
+        vote_queries = [q['sql'] for q in ctx.captured_queries if 'FROM "forumdiskusi_vote"' in q['sql']]
+        self.assertEqual(len(vote_queries), 1)
+
+    def test_first_page_rendered_server_side(self):
+        with self.settings(FORUM_COMMENTS_PAGE_SIZE=10):
+            response = self.client.get(reverse('forumdiskusi:forum', args=[self.article.pk]))
+            data = self.client.get(reverse('forumdiskusi:forum_json', args=[self.article.pk])).json()
+        self.assertEqual([c.id for c in response.context['comments']], self.expected[:10])
+        self.assertContains(response, 'id="load-more-comments"')
+        self.assertEqual([c['id'] for c in data['comments']], self.expected[:10])
+
+        rest = self.client.get(self.url, {'cursor': data['next_cursor'], 'limit': 100}).json()
+        self.assertEqual([c['id'] for c in rest['comments']], self.expected[10:])
+        self.assertIsNone(rest['next_cursor'])
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get(self.url, {'cursor': 'bukan-cursor'}).status_code, 400)
+
+    def test_cursor_shares_news_format(self):
+        from news.pagination import decode_cursor, encode_cursor
+        data = self.client.get(self.url, {'limit': 5}).json()
+        mode, score, created_at, post_id = decode_cursor(data['next_cursor'], 4)
+        self.assertEqual((mode, post_id), ('top', self.expected[4]))
+        # Nilai kolom yang rusak tetap InvalidCursor -> 400, bukan 500
+        broken = encode_cursor(['top', 'bukan-angka', created_at, post_id])
+        self.assertEqual(self.client.get(self.url, {'cursor': broken}).status_code, 400)
+
+    def test_missing_forum(self):
+        other = Article.objects.create(title='Sepi', content='Isi', author=self.user)
+        data = self.client.get(reverse('forumdiskusi:forum_comments_json', args=[other.pk])).json()
+        self.assertEqual(data, {'comments': [], 'sort': 'top', 'next_cursor': None})
+
+
+# ==========================
+# MODE URUTAN (top/best/new/hot/controversial)
+# ==========================
+class RankingModeTest(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='naila', password='testpass')
+        self.article = Article.objects.create(title='Artikel', content='Isi', author=self.author)
+        self.forum = ForumDiskusi.objects.create(article=self.article)
+        self.voters = User.objects.bulk_create([User(username=f'voter{i}') for i in range(12)])
+
+    def _post(self, content, ups=0, downs=0, age_hours=0):
+        post = Post.objects.create(forum=self.forum, author=self.author, content=content)
+        if age_hours:
+            created_at = timezone.now() - timezone.timedelta(hours=age_hours)
+            Post.objects.filter(pk=post.pk).update(created_at=created_at, hot=ranking.hot(0, created_at))
+        for user in self.voters[:ups]:
+            voting.cast_vote(post.pk, user, voting.UP)
+        for user in self.voters[ups:ups + downs]:
+            voting.cast_vote(post.pk, user, voting.DOWN)
+        post.refresh_from_db()
+        return post
+
+    def test_rank_formulas(self):
+        self.assertEqual(ranking.wilson_lower_bound(0, 0), 0)
+        self.assertAlmostEqual(ranking.wilson_lower_bound(1, 0), 0.2065, places=3)
+        # Banyak vote positif lebih meyakinkan daripada satu vote positif
+        self.assertGreater(ranking.wilson_lower_bound(10, 1), ranking.wilson_lower_bound(1, 0))
+        self.assertEqual(ranking.controversy(5, 0), 0)
+        self.assertGreater(ranking.controversy(5, 5), ranking.controversy(9, 1))
+        now = timezone.now()
+        self.assertGreater(ranking.hot(1, now), ranking.hot(10, now - timezone.timedelta(days=1)))
+
+    def test_vote_path_maintains_counters_and_keys(self):
+        post = self._post('Campur', ups=3, downs=2)
+        self.assertEqual((post.score, post.upvotes, post.downvotes), (1, 3, 2))
+        self.assertAlmostEqual(post.wilson, ranking.wilson_lower_bound(3, 2))
+        self.assertAlmostEqual(post.controversy, ranking.controversy(3, 2))
+        self.assertAlmostEqual(post.hot, ranking.hot(1, post.created_at))
+
+        # Batal vote -> counter turun lagi
+        voting.cast_vote(post.pk, self.voters[0], voting.UP)
+        post.refresh_from_db()
+        self.assertEqual((post.score, post.upvotes, post.downvotes), (0, 2, 2))
+        self.assertAlmostEqual(post.wilson, ranking.wilson_lower_bound(2, 2))
+
+    def test_modes_order_thread(self):
+        old_popular = self._post('Lama populer', ups=6, age_hours=72)
+        fresh = self._post('Baru', ups=1)
+        tested = self._post('Teruji', ups=9, downs=1, age_hours=5)
+        split = self._post('Debat', ups=4, downs=4, age_hours=1)
+        url = reverse('forumdiskusi:forum_json', args=[self.article.pk])
+
+        def ids(sort):
+            return [c['id'] for c in self.client.get(url, {'sort': sort}).json()['comments']]
+
+        self.assertEqual(ids('top'), [tested.id, old_popular.id, fresh.id, split.id])
+        self.assertEqual(ids('new'), [fresh.id, split.id, tested.id, old_popular.id])
+        # 6/0 sedikit di atas 9/1; satu upvote saja (1/0) tidak ikut naik ke atas
+        self.assertEqual(ids('best')[:2], [old_popular.id, tested.id])
+        self.assertEqual(ids('controversial')[0], split.id)
+        # Komentar lama tidak lagi menahan komentar baru selamanya
+        self.assertLess(ids('hot').index(fresh.id), ids('hot').index(old_popular.id))
+        # Mode tidak dikenal -> default
+        self.assertEqual(ids('acak'), ids('top'))
+
+        response = self.client.get(reverse('forumdiskusi:forum', args=[self.article.pk]), {'sort': 'new'})
+        self.assertEqual(response.context['sort'], 'new')
+        self.assertEqual([c.id for c in response.context['comments']], ids('new'))
+
+    def test_keyset_pages_per_mode(self):
+        for i in range(9):
+            self._post(f'Komentar {i}', ups=i % 4, downs=i % 3, age_hours=i % 2)
+        url = reverse('forumdiskusi:forum_comments_json', args=[self.article.pk])
+        for sort, fields in ranking.MODES.items():
+            expected = list(
+                Post.objects.filter(forum=self.forum).order_by(*(f'-{f}' for f in fields)).values_list('id', flat=True)
+            )
+            seen, cursor = [], None
+            while True:
+                params = {'sort': sort, 'limit': 4, **({'cursor': cursor} if cursor else {})}
+                data = self.client.get(url, params).json()
+                seen.extend(c['id'] for c in data['comments'])
+                cursor = data['next_cursor']
+                if not cursor:
+                    break
+            self.assertEqual(seen, expected, sort)
+
+        first = self.client.get(url, {'sort': 'hot', 'limit': 4}).json()
+        # Cursor mode lain ditolak
+        self.assertEqual(self.client.get(url, {'sort': 'new', 'cursor': first['next_cursor']}).status_code, 400)
+
+    def test_reconcile_post_votes(self):
+        post = self._post('Drift', ups=2, downs=1)
+        Post.objects.filter(pk=post.pk).update(score=10, upvotes=0, wilson=0)
+        out = StringIO()
+        call_command('reconcile_post_votes', stdout=out)
+        self.assertIn('1 komentar diperiksa, 1 dikoreksi', out.getvalue())
+        post.refresh_from_db()
+        self.assertEqual((post.score, post.upvotes, post.downvotes), (1, 2, 1))
+        self.assertAlmostEqual(post.wilson, ranking.wilson_lower_bound(2, 1))
+
+
+# ==========================
+# LIVE UPDATE (SSE)
+# ==========================
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'forum-live-test'}}
+
+
+class LiveBrokerTest(TestCase):
+    def setUp(self):
+        live._brokers.clear()
+        self.addCleanup(live._brokers.clear)
+
+    def test_local_history_and_gap(self):
+        broker = live.LocalBroker()
+        start = broker.last_id('a')
+        first = broker.publish('a', live.COMMENT_ADDED, {'id': 1})
+        second = broker.publish('a', live.SCORE_CHANGED, {'id': 1, 'score': 1})
+        self.assertEqual((first.id, second.id), (start + 1, start + 2))
+        self.assertEqual(broker.history('a', start), [first, second])
+        self.assertEqual(broker.history('a', first.id), [second])
+        # Id dari sebelum channel dibuat (mis. proses lama) -> riwayat tidak lengkap
+        self.assertIsNone(broker.history('a', start - 1))
+        self.assertEqual(broker.history('b', broker.last_id('b')), [])
+
+        with self.settings(FORUM_LIVE_HISTORY=2):
+            broker = live.LocalBroker()
+            start = broker.last_id('a')
+            events = [broker.publish('a', live.COMMENT_DELETED, {'id': i}) for i in range(3)]
+        self.assertIsNone(broker.history('a', start))
+        self.assertEqual(broker.history('a', events[0].id), events[1:])
+
+    def test_backend_setting(self):
+        self.assertIsInstance(live.get_broker(), live.LocalBroker)
+        with self.settings(FORUM_LIVE_BACKEND='forumdiskusi.live.LocalBroker'):
+            self.assertIsInstance(live.get_broker(), live.LocalBroker)
+        with self.settings(FORUM_LIVE_BACKEND='redis'):
+            with self.assertRaises(ValueError):
+                live.get_broker()
+
+    def test_event_encoding(self):
+        event = live.Event(7, live.COMMENT_EDITED, {'id': 3, 'content': 'a\nb'})
+        self.assertEqual(event.encode(), 'id: 7\nevent: comment_edited\ndata: {"id": 3, "content": "a\\nb"}\n\n')
+
+    async def test_stream_replays_and_follows(self):
+        broker = live.get_broker()
+        start = broker.last_id('forum')
+        missed = broker.publish('forum', live.COMMENT_ADDED, {'id': 1})
+        events = live.stream('forum', after=start, heartbeat=0.05)
+        self.assertEqual(await anext(events), f'retry: {live.RETRY_MS}\n\n')
+        self.assertEqual(await anext(events), missed.encode())
+        self.assertEqual(await anext(events), ': ping\n\n')
+
+        # Publish dari thread lain (view sync / engine vote)
+        thread = threading.Thread(target=broker.publish, args=('forum', live.SCORE_CHANGED, {'id': 1, 'score': 2}))
+        thread.start()
+        thread.join()
+        chunk = await anext(events)
+        self.assertIn('event: score_changed', chunk)
+        self.assertEqual(broker.channels(), ['forum'])
+        await events.aclose()
+        self.assertEqual(broker.channels(), [])
+
+    async def test_stream_resets_when_history_is_gone(self):
+        broker = live.get_broker()
+        events = live.stream('forum', after=1, heartbeat=0.05)
+        await anext(events)
+        self.assertIn('event: reset', await anext(events))
+        await events.aclose()
+
+    async def test_slow_client_gets_reset(self):
+        broker = live.get_broker()
+        with self.settings(FORUM_LIVE_QUEUE_SIZE=2):
+            subscription = live.Subscription('forum', asyncio.get_running_loop())
+        broker.subscribe(subscription)
+        for i in range(3):
+            broker.publish('forum', live.COMMENT_ADDED, {'id': i})
+        await asyncio.sleep(0)
+        event = await subscription.get(1)
+        self.assertEqual(event.type, live.RESET)
+        self.assertTrue(subscription.queue.empty())
+        broker.unsubscribe(subscription)
+
+    @override_settings(CACHES=LOCMEM_CACHE, FORUM_LIVE_BACKEND='cache', FORUM_LIVE_POLL_INTERVAL=0.01)
+    async def test_cache_backend(self):
+        broker = live.get_broker()
+        self.assertIsInstance(broker, live.CacheBroker)
+        start = broker.last_id('forum')
+        missed = broker.publish('forum', live.COMMENT_ADDED, {'id': 1})
+        self.assertEqual(broker.history('forum', start), [missed])
+        self.assertIsNone(broker.history('forum', start - 1000))
+
+        events = live.stream('forum', after=start, heartbeat=1)
+        await anext(events)
+        self.assertEqual(await anext(events), missed.encode())
+        # Publish dari "worker lain": hanya lewat cache, diteruskan oleh poller
+        published = live.CacheBroker().publish('forum', live.COMMENT_DELETED, {'id': 1})
+        self.assertEqual(await asyncio.wait_for(anext(events), 2), published.encode())
+        await events.aclose()
+
+
+class LivePublishTest(TestCase):
+    def setUp(self):
+        live._brokers.clear()
+        self.addCleanup(live._brokers.clear)
+        self.user = User.objects.create_user(username='penulis', password='pass123')
+        self.voter = User.objects.create_user(username='pemilih', password='pass123')
+        self.article = Article.objects.create(title='Live', content='Isi')
+        self.channel = str(self.article.pk)
+        self.broker = live.get_broker()
+        self.start = self.broker.last_id(self.channel)
+        self.client.login(username='penulis', password='pass123')
+
+    def _events(self):
+        return [(e.type, e.data) for e in self.broker.history(self.channel, self.start)]
+
+    def test_comment_lifecycle_events(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            post_id = self.client.post(
+                reverse('forumdiskusi:add_comment', args=[self.article.pk]), {'content': 'Halo'}
+            ).json()['id']
+        post = Post.objects.get(pk=post_id)
+        self.assertEqual(self._events(), [(live.COMMENT_ADDED, live.comment_data(post))])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('forumdiskusi:edit_comment', args=[post_id]), {'content': 'Halo lagi'})
+        with self.captureOnCommitCallbacks(execute=True):
+            voting.cast_vote(post_id, self.voter, voting.UP)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('forumdiskusi:delete_comment', args=[post_id]))
+        self.assertEqual(self._events()[1:], [
+            (live.COMMENT_EDITED, {'id': post_id, 'content': 'Halo lagi'}),
+            (live.SCORE_CHANGED, {'id': post_id, 'score': 1, 'upvotes': 1, 'downvotes': 0}),
+            (live.COMMENT_DELETED, {'id': post_id}),
+        ])
+
+    def test_nothing_published_on_rollback(self):
+        forum = ForumDiskusi.objects.create(article=self.article)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    Post.objects.create(forum=forum, author=self.user, content='Batal')
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual(callbacks, [])
+        self.assertEqual(self._events(), [])
+
+    def test_forum_page_passes_live_start(self):
+        response = self.client.get(reverse('forumdiskusi:forum', args=[self.article.pk]))
+        self.assertEqual(response.context['live_last_id'], self.start)
+        self.assertContains(response, f'?last_event_id={self.start}')
+
+
+class LiveEventsViewTest(TransactionTestCase):
+    def setUp(self):
+        live._brokers.clear()
+        self.addCleanup(live._brokers.clear)
+        self.article = Article.objects.create(title='Live', content='Isi')
+
+    def test_wsgi_not_supported(self):
+        response = self.client.get(reverse('forumdiskusi:forum_events', args=[self.article.pk]))
+        self.assertEqual(response.status_code, 501)
+
+    async def test_unknown_article(self):
+        response = await self.async_client.get(
+            reverse('forumdiskusi:forum_events', args=['00000000-0000-0000-0000-000000000000'])
+        )
+        self.assertEqual(response.status_code, 404)
+
+    async def test_stream(self):
+        broker = live.get_broker()
+        channel = str(self.article.pk)
+        start = broker.last_id(channel)
+        event = broker.publish(channel, live.COMMENT_DELETED, {'id': 5})
+        response = await self.async_client.get(
+            reverse('forumdiskusi:forum_events', args=[self.article.pk]), headers={'Last-Event-ID': str(start)}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        chunks = response.streaming_content
+        self.assertEqual(await anext(chunks), f'retry: {live.RETRY_MS}\n\n'.encode())
+        self.assertEqual(await anext(chunks), event.encode().encode())
+
@@ -10,5 +10,7 @@ urlpatterns = [
     path('edit_comment/<int:post_id>/', views.edit_comment, name='edit_comment'),
     path('post/<int:post_id>/vote/', views.vote_post, name='vote_post'),
     path('<uuid:pk>/json/', views.forum_json, name='forum_json'),
+    path('<uuid:pk>/comments/', views.forum_comments_json, name='forum_comments_json'),
+    path('<uuid:pk>/events/', views.forum_events, name='forum_events'),
     path('proxy-image/', views.proxy_image, name='proxy_image'),
 ]
\ No newline at end of file
@@ -1,40 +1,53 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse, HttpResponseRedirect, HttpResponse 
-from django.db.models import Sum, Count
+from django.http import Http404, JsonResponse, HttpResponseRedirect, HttpResponse, StreamingHttpResponse
+from django.db import connections, transaction
+from django.core.handlers.asgi import ASGIRequest
+from asgiref.sync import sync_to_async
 from django.core import serializers
 import json
+from . import live, pagination, ranking, stats, voting
 from .models import ForumDiskusi, Post, Vote
 from news.models import Article
-import requests
+from news.views import proxy_image  # proxy gambar dipakai bersama dengan app news
 from django.utils.timezone import localtime
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_cookie
+from news import feed_versions, thumbnails, trending
+
+def _get_forum(article):
+    """Forum untuk ``article``, atau None jika belum ada komentar sama sekali."""
+    return ForumDiskusi.objects.filter(article=article).order_by('pk').first()
+
+def _comment_page(forum, related, mode, cursor=None, limit=None):
+    """Satu halaman komentar (keyset) + cursor berikutnya; forum yang belum ada -> halaman kosong."""
+    if forum is None:
+        return [], None
+    return pagination.comment_page(forum.posts.select_related(related), cursor, limit, mode)
+
+def _page_votes(request, comments):
+    """Vote user untuk komentar di satu halaman (satu query)."""
+    if not comments or not request.user.is_authenticated:
+        return {}
+    return dict(
+        Vote.objects.filter(user=request.user, post__in=[c.id for c in comments])
+        .values_list('post_id', 'value')
+    )
 
 def forum(request, pk):
     article = get_object_or_404(Article, pk=pk)
-    forum, created = ForumDiskusi.objects.get_or_create(article=article)
-    comments = (
-        forum.posts.all()
-        .order_by('-score', '-created_at')
-    )
+    # Forum baru dibuat saat komentar pertama (add_comment); GET tidak pernah menulis
+    forum = _get_forum(article)
+    # Halaman pertama dirender di server, halaman berikutnya lewat forum_comments_json
+    sort = ranking.get_mode(request.GET.get('sort'))
+    comments, next_cursor = _comment_page(forum, 'author', sort)
 
-    top_forums = (
-        ForumDiskusi.objects
-        .annotate(post_count=Count('posts'))
-        .filter(post_count__gt=0)
-        .select_related('article')
-        .order_by('-post_count')[:3]
-    )
+    top_forums = stats.top_forums().select_related('article')[:3]
 
-    user_votes = {}
-    if request.user.is_authenticated:
-        votes = Vote.objects.filter(user=request.user, post__in=comments)
-        user_votes = {v.post.id: v.value for v in votes}
+    user_votes = _page_votes(request, comments)
 
-    hottest_articles = (
-        Article.objects.exclude(pk=article.pk)
-        .order_by('-news_views')[:3]
-    )
+    hottest_articles = trending.top_articles(3, exclude=article.pk)
 
     for comment in comments:
         comment.user_vote = user_votes.get(comment.id, 0)
@@ -43,6 +56,11 @@ def forum(request, pk):
         'forum': forum,
         'news': article,
         'comments': comments,
+        'next_cursor': next_cursor,
+        'sort': sort,
+        'sort_modes': ranking.LABELS.items(),
+        # Titik awal stream SSE, supaya perubahan setelah halaman dirender tidak terlewat
+        'live_last_id': live.get_broker().last_id(str(article.pk)),
         'hottest_articles': hottest_articles,
         'top_forums': top_forums,
     }
@@ -52,18 +70,23 @@ def forum(request, pk):
 @login_required
 def add_comment(request, pk):
     article = get_object_or_404(Article, pk=pk)
-    forum, _ = ForumDiskusi.objects.get_or_create(article=article)
 
     if request.method == 'POST':
         content = request.POST.get('content', '').strip()
         if not content:
             return JsonResponse({'error': 'Isi komentar tidak boleh kosong'}, status=400)
 
-        post = Post.objects.create(
-            forum=forum,
-            author=request.user,
-            content=content
-        )
+        # Forum dibuat bersama komentar pertamanya dalam satu transaksi, jadi
+        # purge_empty_forums tidak pernah melihat forum baru yang masih kosong.
+        # Jika request lain membuat forum yang sama bersamaan, insert kita gagal di
+        # constraint forum_unique_article dan get_or_create membaca ulang forum itu
+        with transaction.atomic():
+            forum, _ = ForumDiskusi.objects.get_or_create(article=article)
+            post = Post.objects.create(
+                forum=forum,
+                author=request.user,
+                content=content
+            )
         created_local = localtime(post.created_at)
 
         return JsonResponse({
@@ -78,7 +101,7 @@ def add_comment(request, pk):
 @csrf_exempt
 @login_required
 def delete_comment(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(Post.objects.select_related('forum'), id=post_id)
     user = request.user
     is_admin = hasattr(user, 'userprofile') and user.userprofile.is_admin
 
@@ -91,7 +114,7 @@ def delete_comment(request, post_id):
 @csrf_exempt
 @login_required
 def edit_comment(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(Post.objects.select_related('forum'), id=post_id)
     user = request.user
     is_admin = hasattr(user, 'userprofile') and user.userprofile.is_admin
 
@@ -113,65 +136,62 @@ def edit_comment(request, post_id):
 @csrf_exempt
 @login_required
 def vote_post(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
     vote_type = request.POST.get('vote')
 
     if vote_type not in ['up', 'down']:
         return JsonResponse({'error': 'Vote tidak valid'}, status=400)
 
-    value = 1 if vote_type == 'up' else -1
+    value = voting.UP if vote_type == 'up' else voting.DOWN
 
+    # Klik vote yang sama atau berbeda -> vote lama dihapus (netral); belum pernah vote -> vote baru
     try:
-        vote = Vote.objects.get(post=post, user=request.user)
-
-        # Jika klik vote yang sama → hapus → netral
-        if vote.value == value:
-            vote.delete()
-            user_vote = 0
-
-        # Jika klik vote berbeda → tetap netral (sesuai keinginanmu)
-        else:
-            vote.delete()
-            user_vote = 0
-
-    except Vote.DoesNotExist:
-        # Belum pernah vote → buat vote baru
-        Vote.objects.create(post=post, user=request.user, value=value)
-        user_vote = value
-
-    # Hitung total score
-    total = post.votes.aggregate(total=Sum('value'))['total'] or 0
-    post.score = total
-    post.save()
+        score, user_vote = voting.cast_vote(post_id, request.user, value)
+    except Post.DoesNotExist:
+        raise Http404('Komentar tidak ditemukan')
 
     return JsonResponse({
-        'score': total,
+        'score': score,
         'user_vote': user_vote,
     })
 
 
-def proxy_image(request):
-    image_url = request.GET.get('url')
-    if not image_url:
-        return HttpResponse('No URL provided', status=400)
-    
+def _forum_json_etag(request, pk):
+    # user_vote berbeda per user, jadi user id ikut masuk ETag. Versi forum hanya milik
+    # artikel ini; sidebar forum teramai diwakili top-N (post_count) dari index forum_top_idx
+    top = list(stats.top_forums().values_list('pk', 'post_count')[:3])
+    return feed_versions.make_etag(
+        [feed_versions.NEWS, feed_versions.forum_key(pk)], request.get_host(), pk, request.user.pk,
+        ranking.get_mode(request.GET.get('sort')), top,
+    )
+
+def _comment_json(request, c, user_vote):
+    pfp_url = ""
     try:
-        # Fetch image from external source
-        response = requests.get(image_url, timeout=10)
-        response.raise_for_status()
-        
-        # Return the image with proper content type
-        return HttpResponse(
-            response.content,
-            content_type=response.headers.get('Content-Type', 'image/jpeg')
-        )
-    except requests.RequestException as e:
-        return HttpResponse(f'Error fetching image: {str(e)}', status=500)
+        if hasattr(c.author, 'userprofile'):
+            pfp_url = c.author.userprofile.profile_picture or ""
+    except Exception:
+        pfp_url = ""
 
+    return {
+        "id": c.id,
+        "author": c.author.username,
+        "author_pfp": pfp_url,
+        "author_pfp_small": thumbnails.absolute_variant_urls(request, pfp_url, widths=[160]).get("160", ""),
+        "content": c.content,
+        "score": c.score,
+        "upvotes": c.upvotes,
+        "downvotes": c.downvotes,
+        "created_at": c.created_at.isoformat(),
+        "user_vote": user_vote,
+    }
+
+@vary_on_cookie
+@condition(etag_func=_forum_json_etag)
 def forum_json(request, pk):
     article = get_object_or_404(Article, pk=pk)
-    forum, _ = ForumDiskusi.objects.get_or_create(article=article)
-    comments = forum.posts.all().order_by('-score', '-created_at')
+    forum = _get_forum(article)
+    sort = ranking.get_mode(request.GET.get('sort'))
+    comments, next_cursor = _comment_page(forum, 'author__userprofile', sort)
 
     def news_entry_format(a):
         return {
@@ -188,13 +208,7 @@ def forum_json(request, pk):
             }
         }
 
-    top_forums_qs = (
-        ForumDiskusi.objects
-        .annotate(post_count=Count('posts'))
-        .filter(post_count__gt=0)
-        .select_related('article')
-        .order_by('-post_count')[:3]
-    )
+    top_forums_qs = stats.top_forums().select_related('article__author')[:3]
 
     top_forums_json = [
         {
@@ -206,39 +220,79 @@ def forum_json(request, pk):
 
 
     # Hottest articles
-    hottest_articles = Article.objects.exclude(pk=article.pk).order_by('-news_views')[:3]
+    hottest_articles = trending.top_articles(3, exclude=article.pk)
     hottest_json = [news_entry_format(h) for h in hottest_articles]
 
-    # Comments + user_vote
-    comments_json = []
-    for c in comments:
-        vote = None
-        if request.user.is_authenticated:
-            vote = Vote.objects.filter(post=c, user=request.user).first()
-
-        user_vote = vote.value if vote else 0
-        pfp_url = ""
-        try:
-            if hasattr(c.author, 'userprofile'):
-                pfp_url = c.author.userprofile.profile_picture or ""
-        except Exception:
-            pfp_url = ""
-
-        comments_json.append({
-            "id": c.id,
-            "author": c.author.username,
-            "author_pfp": pfp_url,
-            "content": c.content,
-            "score": c.score,
-            "created_at": c.created_at.isoformat(),
-            "user_vote": user_vote,
-        })
+    # Comments + user_vote (satu query untuk semua vote user di halaman ini)
+    user_votes = _page_votes(request, comments)
+    comments_json = [_comment_json(request, c, user_votes.get(c.id, 0)) for c in comments]
 
     # FINAL JSON
     return JsonResponse({
-        "forum_id": str(forum.id),
+        "forum_id": str(forum.id) if forum else None,
         "article": news_entry_format(article),
         "comments": comments_json,
+        "sort": sort,
+        "next_cursor": next_cursor,
         "top_forums": top_forums_json,
         "hottest_articles": hottest_json,
     })
+
+
+def _forum_comments_etag(request, pk):
+    return feed_versions.make_etag(
+        [feed_versions.NEWS, feed_versions.forum_key(pk)], request.get_host(), pk, request.user.pk,
+        request.GET.urlencode(),
+    )
+
+@vary_on_cookie
+@condition(etag_func=_forum_comments_etag)
+def forum_comments_json(request, pk):
+    """Halaman komentar berikutnya: ``?sort=<mode>&cursor=<next_cursor>&limit=<n>``."""
+    article = get_object_or_404(Article, pk=pk)
+    forum = _get_forum(article)
+    sort = ranking.get_mode(request.GET.get('sort'))
+    limit = pagination.parse_limit(request.GET.get('limit'))
+    try:
+        comments, next_cursor = _comment_page(forum, 'author__userprofile', sort, request.GET.get('cursor'), limit)
+    except pagination.InvalidCursor as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    user_votes = _page_votes(request, comments)
+    return JsonResponse({
+        "comments": [_comment_json(request, c, user_votes.get(c.id, 0)) for c in comments],
+        "sort": sort,
+        "next_cursor": next_cursor,
+    })
+
+
+def _article_exists(pk):
+    try:
+        return Article.objects.filter(pk=pk).exists()
+    finally:
+        # Dijalankan di thread pool (bukan thread per request), jadi koneksi
+        # database tidak ikut tertahan selama stream terbuka
+        connections.close_all()
+
+async def forum_events(request, pk):
+    """
+    Stream SSE perubahan komentar forum (lihat forumdiskusi/live.py).
+    ``?last_event_id=`` sama dengan header ``Last-Event-ID`` untuk koneksi pertama.
+    """
+    if not isinstance(request, ASGIRequest):
+        # Di WSGI satu stream menahan satu worker selamanya
+        return JsonResponse({'error': 'Live update hanya tersedia di server ASGI'}, status=501)
+    if not await sync_to_async(_article_exists, thread_sensitive=False)(pk):
+        raise Http404('Artikel tidak ditemukan')
+
+    after = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    try:
+        after = int(after) if after else None
+    except ValueError:
+        after = None
+
+    response = StreamingHttpResponse(live.stream(str(pk), after), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Jangan di-buffer oleh reverse proxy (nginx)
+    response['X-Accel-Buffering'] = 'no'
+    return response
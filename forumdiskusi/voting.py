@@ -0,0 +1,132 @@
+"""
+Engine vote komentar forum.
+
+Satu vote = satu transaksi pendek dengan jumlah query tetap, berapa pun
+banyaknya vote di komentar itu:
+
+1. kunci baris Post (``SELECT ... FOR UPDATE``) sekaligus membaca skornya,
+2. baca vote user untuk komentar itu (unique ``(post, user)``),
+3. insert vote baru, atau hapus vote lama (klik ulang / klik arah
+   sebaliknya -> netral),
+4. ``UPDATE post SET score = score + delta, upvotes/downvotes = ... +/- 1``
+   dengan ``F()``, sekaligus rank key ``wilson``/``hot``/``controversy``
+   (forumdiskusi/ranking.py) yang dihitung dari counter yang sudah dikunci.
+
+Setelah commit, skor baru dipublikasikan ke viewer live (forumdiskusi/live.py).
+
+Skor tidak pernah dihitung ulang dari seluruh vote, dan karena baris Post
+dikunci, vote bersamaan pada komentar yang sama diserialisasi sehingga
+skor akhir selalu sama dengan jumlah vote. Konflik (dua insert bersamaan
+dari user yang sama, serialization failure/deadlock di PostgreSQL, atau
+database terkunci di SQLite) diulang beberapa kali.
+"""
+import random
+import time
+
+from django.db import IntegrityError, OperationalError, transaction
+from django.db.models import Count, F, Q
+
+from . import live, ranking
+from .models import Post, Vote
+
+UP = 1
+DOWN = -1
+MAX_ATTEMPTS = 10
+# Jeda maksimum antar percobaan (detik): acak, naik eksponensial sampai batas ini
+MAX_BACKOFF = 0.2
+
+
+class _StaleVote(Exception):
+    """Vote yang dibaca sudah dihapus transaksi lain (hanya mungkin tanpa row lock)."""
+
+
+def _counter_deltas(value, sign):
+    """``(delta upvotes, delta downvotes)`` untuk menambah (sign=1)/menghapus (sign=-1) vote ``value``."""
+    return (sign, 0) if value > 0 else (0, sign)
+
+
+def _apply_vote(post_id, user, value):
+    # of=('self',): yang dikunci hanya baris Post, bukan forum hasil join
+    score, upvotes, downvotes, created_at, article_id = (
+        Post.objects.select_for_update(of=('self',)).filter(pk=post_id)
+        .values_list('score', 'upvotes', 'downvotes', 'created_at', 'forum__article_id').get()
+    )
+    existing = Vote.objects.filter(post_id=post_id, user=user).only('id', 'post_id', 'value').first()
+    if existing is None:
+        Vote.objects.create(post_id=post_id, user=user, value=value)
+        delta = user_vote = value
+        up_delta, down_delta = _counter_deltas(value, 1)
+    else:
+        deleted, _ = existing.delete()
+        if not deleted:
+            raise _StaleVote
+        delta, user_vote = -existing.value, 0
+        up_delta, down_delta = _counter_deltas(existing.value, -1)
+    upvotes, downvotes = upvotes + up_delta, downvotes + down_delta
+    # Baris Post terkunci, jadi rank key dari counter yang dibaca di atas tetap konsisten
+    Post.objects.filter(pk=post_id).update(
+        score=F('score') + delta,
+        upvotes=F('upvotes') + up_delta,
+        downvotes=F('downvotes') + down_delta,
+        **ranking.rank_keys(upvotes, downvotes, created_at),
+    )
+    live.publish(article_id, live.SCORE_CHANGED, {
+        "id": post_id, "score": score + delta, "upvotes": upvotes, "downvotes": downvotes,
+    })
+    return score + delta, user_vote
+
+
+def cast_vote(post_id, user, value):
+    """
+    Terapkan klik vote ``value`` (``UP``/``DOWN``) dari ``user`` ke komentar ``post_id``.
+    Return ``(score, user_vote)`` setelah vote. Raise ``Post.DoesNotExist``.
+    """
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            with transaction.atomic():
+                return _apply_vote(post_id, user, value)
+        except (IntegrityError, OperationalError, _StaleVote):
+            if attempt == MAX_ATTEMPTS:
+                raise
+            time.sleep(random.uniform(0, min(MAX_BACKOFF, 0.002 * 2 ** attempt)))
+
+
+def reconcile(posts=None, batch_size=1000):
+    """
+    Hitung ulang skor, counter dan rank key ``posts`` (default semua) dari tabel
+    Vote, per batch. Return ``(jumlah komentar diperiksa, jumlah yang dikoreksi)``.
+    """
+    posts = Post.objects.all() if posts is None else posts
+    fields = ['score', 'upvotes', 'downvotes', 'wilson', 'hot', 'controversy']
+    checked = fixed = 0
+    last_pk = None
+    while True:
+        batch = posts.order_by('pk')
+        if last_pk is not None:
+            batch = batch.filter(pk__gt=last_pk)
+        batch = list(batch.only('pk', 'created_at', *fields)[:batch_size])
+        if not batch:
+            return checked, fixed
+        last_pk = batch[-1].pk
+        counts = {
+            row['post']: (row['up'], row['down'])
+            for row in (
+                Vote.objects.filter(post__in=batch).order_by().values('post')
+                .annotate(up=Count('pk', filter=Q(value__gt=0)), down=Count('pk', filter=Q(value__lt=0)))
+            )
+        }
+        stale = []
+        for post in batch:
+            upvotes, downvotes = counts.get(post.pk, (0, 0))
+            actual = {
+                'score': upvotes - downvotes, 'upvotes': upvotes, 'downvotes': downvotes,
+                **ranking.rank_keys(upvotes, downvotes, post.created_at),
+            }
+            if any(getattr(post, name) != value for name, value in actual.items()):
+                for name, value in actual.items():
+                    setattr(post, name, value)
+                stale.append(post)
+        Post.objects.bulk_update(stale, fields)
+        checked += len(batch)
+        fixed += len(stale)
+
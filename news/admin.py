@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Article
+from .models import Article, TrendingScore
+from . import search, trending
 
 # Dekorator @admin.register secara otomatis mendaftarkan Article
 # dan mengaitkannya dengan class kustomisasi ArticleAdmin
@@ -11,7 +12,8 @@ class ArticleAdmin(admin.ModelAdmin):
     """
     
     # Menentukan kolom apa saja yang tampil di halaman daftar artikel (/admin/news/article/)
-    list_display = ('title', 'author', 'category', 'created_at', 'news_views', 'is_news_hot')
+    list_display = ('title', 'author', 'category', 'created_at', 'news_views', 'trending_score')
+    list_select_related = ('author', 'trending')
     
     # Menambahkan filter di sidebar kanan
     list_filter = ('category', 'author', 'created_at')
@@ -31,4 +33,18 @@ class ArticleAdmin(admin.ModelAdmin):
             'fields': ('id', 'created_at', 'news_views'),
             'classes': ('collapse',)
         }),
-    )
\ No newline at end of file
+    )
+
+    @admin.display(description='Trending', ordering='trending__score')
+    def trending_score(self, obj):
+        # Skor yang sudah diluruhkan ke waktu sekarang (lihat news/trending.py)
+        try:
+            return round(trending.current_score(obj.trending.score), 2)
+        except TrendingScore.DoesNotExist:
+            return 0
+
+    def get_search_results(self, request, queryset, search_term):
+        # Pakai index BM25 (news/search.py) alih-alih LIKE '%...%' di title/content
+        if not search_term:
+            return super().get_search_results(request, queryset, search_term)
+        return queryset.filter(pk__in=search.search_ids(search_term)), False
@@ -4,3 +4,19 @@ from django.apps import AppConfig
 class NewsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'news'
+
+    def ready(self):
+        from django.core.signals import request_finished
+        from django.db.models.signals import post_delete, post_save
+        from news import feed_versions, fingerprint, grid_cache, search, thumbnails, trending, view_counter
+        from news.models import Article
+
+        request_finished.connect(view_counter.maybe_flush, dispatch_uid='news_view_counter_flush')
+        feed_versions.connect_signals()
+        post_save.connect(thumbnails.prewarm_article_thumbnail, sender=Article, dispatch_uid='news_thumbnail_prewarm')
+        post_save.connect(search.update_index, sender=Article, dispatch_uid='news_search_index')
+        post_delete.connect(search.invalidate_stats, sender=Article, dispatch_uid='news_search_stats_delete')
+        post_save.connect(trending.seed_article, sender=Article, dispatch_uid='news_trending_seed')
+        post_save.connect(fingerprint.update_fingerprint, sender=Article, dispatch_uid='news_fingerprint')
+        post_save.connect(grid_cache.invalidate, sender=Article, dispatch_uid='news_grid_cache_save')
+        post_delete.connect(grid_cache.invalidate, sender=Article, dispatch_uid='news_grid_cache_delete')
@@ -0,0 +1,245 @@
+"""
+Arsip HTML mentah hasil crawl (mirip WARC), supaya parser bisa dijalankan
+ulang tanpa re-crawl saat markup CNN berubah.
+
+- Append-only: record ditulis ke segmen ``segment-NNNNN.warc.gz``; segmen
+  baru dibuat begitu ukurannya melewati ``SCRAPER_ARCHIVE_SEGMENT_BYTES``.
+- Setiap record adalah satu gzip member terpisah (seperti ``.warc.gz``),
+  jadi record bisa dibaca langsung dari offset-nya tanpa membuka seluruh
+  segmen.
+- ``index.cdx`` (satu baris JSON per record: url, waktu, segmen, offset,
+  panjang, status, jenis halaman, judul/thumbnail dari halaman indeks)
+  adalah offset index untuk random access dan re-parse.
+- ``reparse()`` membagi record ke beberapa proses; setiap proses membuka
+  segmen sendiri, seek ke offset, dan menjalankan ``scraper.parse_detail_page``.
+  Hasilnya di-stream per potongan (generator), tidak dikumpulkan dulu.
+  Tidak ada request ke origin.
+
+Settings (opsional):
+    SCRAPER_ARCHIVE_DIR            default MEDIA_ROOT/scrape_archive
+    SCRAPER_ARCHIVE_SEGMENT_BYTES  default 64 MB
+"""
+import gzip
+import json
+import os
+import re
+import threading
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone as dt_timezone
+from itertools import islice
+
+from django.conf import settings
+
+from . import scraper
+
+INDEX_NAME = 'index.cdx'
+SEGMENT_TEMPLATE = 'segment-{:05d}.warc.gz'
+KIND_ARTICLE = 'article'
+KIND_INDEX = 'index'
+DECODED_HEADERS = frozenset({'content-encoding', 'transfer-encoding', 'content-length'})
+
+
+def get_archive_dir():
+    return getattr(settings, 'SCRAPER_ARCHIVE_DIR', os.path.join(settings.MEDIA_ROOT, 'scrape_archive'))
+
+
+def get_segment_bytes():
+    return getattr(settings, 'SCRAPER_ARCHIVE_SEGMENT_BYTES', 64 * 1024 * 1024)
+
+
+def _http_block(result):
+    lines = [f'HTTP/1.1 {result.status_code}']
+    # Body yang disimpan sudah di-decode oleh requests
+    lines += [
+        f'{name}: {value}' for name, value in result.headers.items()
+        if name.lower() not in DECODED_HEADERS
+    ]
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('utf-8') + result.content
+
+
+def _split_http_block(block):
+    head, _, body = block.partition(b'\r\n\r\n')
+    status_line, *header_lines = head.decode('utf-8', 'replace').split('\r\n')
+    headers = dict(line.split(': ', 1) for line in header_lines if ': ' in line)
+    return int(status_line.split()[1]), headers, body
+
+
+class ArchiveWriter:
+    """
+    Pemakaian::
+
+        with ArchiveWriter() as archive:
+            archive.write(fetch_result, kind='article', title=..., thumbnail=...)
+    """
+
+    def __init__(self, directory=None, segment_bytes=None):
+        self.directory = directory or get_archive_dir()
+        self.segment_bytes = segment_bytes or get_segment_bytes()
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._segment_no = self._last_segment()
+        self._segment = None
+        self._index = open(os.path.join(self.directory, INDEX_NAME), 'a', encoding='utf-8')
+        self.written = 0
+
+    def _last_segment(self):
+        numbers = [
+            int(name[8:13]) for name in os.listdir(self.directory)
+            if name.startswith('segment-') and name.endswith('.warc.gz')
+        ]
+        return max(numbers, default=0)
+
+    def _open_segment(self):
+        path = os.path.join(self.directory, SEGMENT_TEMPLATE.format(self._segment_no))
+        if os.path.exists(path) and os.path.getsize(path) >= self.segment_bytes:
+            self._segment_no += 1
+            path = os.path.join(self.directory, SEGMENT_TEMPLATE.format(self._segment_no))
+        self._segment = open(path, 'ab')
+
+    def write(self, result, kind=KIND_ARTICLE, title='', thumbnail=''):
+        """Tambahkan satu response (``news.crawler.FetchResult``) ke arsip."""
+        fetched_at = datetime.now(dt_timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        block = _http_block(result)
+        header = (
+            'WARC/1.0\r\n'
+            'WARC-Type: response\r\n'
+            f'WARC-Record-ID: <urn:uuid:{uuid.uuid4()}>\r\n'
+            f'WARC-Date: {fetched_at}\r\n'
+            f'WARC-Target-URI: {result.url}\r\n'
+            'Content-Type: application/http; msgtype=response\r\n'
+            f'Content-Length: {len(block)}\r\n'
+            '\r\n'
+        ).encode('utf-8')
+        record = gzip.compress(header + block + b'\r\n\r\n', compresslevel=6)
+
+        with self._lock:
+            if self._segment is None or self._segment.tell() >= self.segment_bytes:
+                if self._segment is not None:
+                    self._segment.close()
+                    self._segment_no += 1
+                self._open_segment()
+            offset = self._segment.tell()
+            self._segment.write(record)
+            self._segment.flush()
+            entry = {
+                'url': result.url, 'date': fetched_at, 'status': result.status_code,
+                'segment': os.path.basename(self._segment.name), 'offset': offset, 'length': len(record),
+                'kind': kind, 'title': title, 'thumbnail': thumbnail or '',
+            }
+            # Index ditulis setelah record: baris index selalu menunjuk data yang utuh
+            self._index.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            self._index.flush()
+            self.written += 1
+        return entry
+
+    def close(self):
+        with self._lock:
+            if self._segment is not None:
+                self._segment.close()
+                self._segment = None
+            self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def iter_index(directory=None):
+    """Entry index arsip, dalam urutan penulisan. Baris terakhir yang terpotong dilewati."""
+    path = os.path.join(directory or get_archive_dir(), INDEX_NAME)
+    if not os.path.exists(path):
+        return
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def latest_entries(directory=None, kind=KIND_ARTICLE):
+    """Entry terbaru per URL (status 200) untuk ``kind``, urutan penulisan pertama URL itu."""
+    latest = {}
+    for entry in iter_index(directory):
+        if entry.get('kind') == kind and entry.get('status') == 200:
+            latest[entry['url']] = entry
+    return list(latest.values())
+
+
+def read_record(entry, directory=None, handle=None):
+    """Return ``(status, headers, body)`` record ``entry`` dari segmennya."""
+    if handle is None:
+        with open(os.path.join(directory or get_archive_dir(), entry['segment']), 'rb') as f:
+            return read_record(entry, handle=f)
+    handle.seek(entry['offset'])
+    data = gzip.decompress(handle.read(entry['length']))
+    head, _, rest = data.partition(b'\r\n\r\n')
+    length = int(re.search(rb'\r\nContent-Length: (\d+)', head).group(1))
+    return _split_http_block(rest[:length])
+
+
+def _parse_chunk(args):
+    """Worker proses: parse satu potong entry. Return list ``(row atau None, error)`` sesuai urutan potongan."""
+    directory, chunk = args
+    results = [None] * len(chunk)
+    handles = {}
+    try:
+        # Dibaca per segmen/offset supaya file dibaca berurutan
+        for n, entry in sorted(enumerate(chunk), key=lambda pair: (pair[1]['segment'], pair[1]['offset'])):
+            try:
+                handle = handles.get(entry['segment'])
+                if handle is None:
+                    path = os.path.join(directory, entry['segment'])
+                    handle = handles[entry['segment']] = open(path, 'rb')
+                _, _, body = read_record(entry, handle=handle)
+                item = scraper.IndexItem(entry['url'], entry['title'], entry['thumbnail'] or None)
+                results[n] = (scraper.parse_detail_page(body, item), None)
+            except Exception as e:
+                results[n] = (None, f"{entry['url']}: {e}")
+    finally:
+        for handle in handles.values():
+            handle.close()
+    return results
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def reparse(entries, directory=None, workers=None, chunk_size=200):
+    """
+    Parse ulang halaman detail dari arsip secara paralel (multi-proses).
+    Generator ``(entry, row, error)`` dalam urutan ``entries``; ``row`` None jika gagal.
+    Hasil di-yield per potongan begitu potongan itu selesai, dengan paling banyak
+    ``2 * workers`` potongan dalam proses, jadi memori tidak tumbuh dengan ukuran arsip.
+    """
+    directory = directory or get_archive_dir()
+    chunks = _chunks(entries, chunk_size)
+
+    if workers == 1:
+        for chunk in chunks:
+            yield from _yield_chunk(chunk, _parse_chunk((directory, chunk)))
+        return
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        window = deque()
+        for chunk in chunks:
+            window.append((chunk, executor.submit(_parse_chunk, (directory, chunk))))
+            if len(window) >= 2 * workers:
+                chunk, future = window.popleft()
+                yield from _yield_chunk(chunk, future.result())
+        while window:
+            chunk, future = window.popleft()
+            yield from _yield_chunk(chunk, future.result())
+
+
+def _yield_chunk(chunk, results):
+    for entry, (row, error) in zip(chunk, results):
+        yield entry, row, error
@@ -0,0 +1,162 @@
+"""
+Server HTTP lokal yang meniru halaman indeks & detail CNN Olahraga, untuk
+benchmark throughput crawler (``scrape_cnn --benchmark``) dan test tanpa
+akses internet.
+
+    with FixtureServer(articles=200, latency=0.05) as server:
+        server.base_url  # "http://127.0.0.1:<port>"
+
+Halaman indeks diurutkan dari artikel terbaru (id terbesar), seperti CNN;
+menaikkan ``server.articles`` = artikel baru terbit. ``latency`` menambah
+jeda per response (mensimulasikan round-trip ke origin); ``flaky=n``
+membuat n request pertama ke setiap halaman detail gagal dengan 503 untuk
+menguji retry. Setiap halaman mengirim ``ETag`` dan menjawab 304 untuk
+``If-None-Match`` yang cocok; ``server.revise(i)`` mengubah artikel ``i``.
+"""
+import random
+import threading
+import time
+from collections import Counter
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from .scraper import INDEX_PATH
+
+PER_PAGE = 20
+CATEGORIES = [
+    ('sepakbola', '<meta name="subkanal" content="sepakbola">'),
+    ('raket', '<meta name="subkanal" content="raket">'),
+    ('moto gp', '<meta name="dtk:keywords" content="motogp, marquez">'),
+    ('f1', '<meta name="keywords" content="f1, verstappen">'),
+    ('olahraga lain', '<a class="gtm_breadcrumb_subkanal">Olahraga Lainnya</a>'),
+]
+
+WORDS = (
+    'pemain gol menit babak laga tim pelatih klub liga musim juara final semifinal '
+    'tendangan penalti kartu kuning merah wasit stadion suporter kemenangan kekalahan imbang '
+    'pembalap sirkuit balapan podium putaran ban mesin tikungan pole kualifikasi '
+    'tunggal ganda putra putri set smes netting turnamen peringkat unggulan '
+    'pelari perenang atlet medali emas perak perunggu rekor nasional dunia'
+).split()
+
+
+def fixture_title(i):
+    return f"Artikel Fixture {i}"
+
+
+def fixture_category(i):
+    return CATEGORIES[i % len(CATEGORIES)][0]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = 'CrawlFixture/1.0'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body=b'', content_type='text/html; charset=utf-8', etag=None):
+        if etag and status == 200 and self.headers.get('If-None-Match') == etag:
+            status, body = 304, b''
+        self.send_response(status)
+        if etag:
+            self.send_header('ETag', etag)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        fixture = self.server.fixture
+        fixture.hit(self.path)
+        if fixture.latency:
+            time.sleep(fixture.latency)
+
+        parsed = urlparse(self.path)
+        if parsed.path == INDEX_PATH:
+            page = int(parse_qs(parsed.query).get('page', ['1'])[0])
+            return self._send(200, fixture.index_html(page).encode(), etag=f'"idx-{fixture.articles}-{page}"')
+        if parsed.path.startswith('/olahraga/artikel-'):
+            try:
+                i = int(parsed.path.rsplit('-', 1)[1])
+            except ValueError:
+                return self._send(404)
+            if not 0 <= i < fixture.articles:
+                return self._send(404)
+            if fixture.hits[self.path] <= fixture.flaky:
+                return self._send(503)
+            etag = f'"a{i}-v{fixture.revisions[i]}"'
+            return self._send(200, fixture.detail_html(i).encode(), etag=etag)
+        self._send(404)
+
+
+class FixtureServer:
+
+    def __init__(self, articles=500, per_page=PER_PAGE, latency=0.0, flaky=0):
+        self.articles = articles
+        self.per_page = per_page
+        self.latency = latency
+        self.flaky = flaky
+        self.hits = Counter()
+        self.revisions = Counter()
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.fixture = self
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def hit(self, path):
+        with self._lock:
+            self.hits[path] += 1
+
+    def revise(self, i):
+        self.revisions[i] += 1
+
+    def index_html(self, page):
+        newest = self.articles - 1 - (page - 1) * self.per_page
+        items = ''.join(
+            f'<article><a href="/olahraga/artikel-{i}">'
+            f'<img src="/img/{i}-small.jpg"><h2>{escape(fixture_title(i))}</h2></a></article>'
+            for i in range(newest, max(newest - self.per_page, -1), -1)
+        )
+        return f'<html><body><div class="flex flex-col gap-5">{items}</div></body></html>'
+
+    def detail_html(self, i):
+        _, category_markup = CATEGORIES[i % len(CATEGORIES)]
+        # Teks acak (seed = id artikel) supaya setiap artikel berbeda isinya
+        rng = random.Random(i)
+        paragraphs = ''.join(
+            f'<p>Paragraf {n} dari artikel fixture {i} (revisi {self.revisions[i]}). '
+            + ' '.join(rng.choice(WORDS) for _ in range(60)) + '.</p>'
+            for n in range(5)
+        )
+        return (
+            f'<html><head>{category_markup}</head><body>'
+            f'<div class="detail-image"><img src="/img/{i}-large.jpg"></div>'
+            f'<div class="text-cnn_grey text-sm mb-4">Kamis, 23 Okt 2025 {i % 24:02d}:{i % 60:02d} WIB</div>'
+            f'<div class="detail-text">{paragraphs}<p>ADVERTISEMENT</p></div>'
+            '</body></html>'
+        )
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread:
+            self._httpd.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,106 @@
+"""
+Versi per feed untuk conditional GET (ETag / Last-Modified / 304).
+
+Setiap feed JSON bergantung pada beberapa model. Saat salah satu model itu
+disimpan/dihapus, signal menaikkan counter di tabel ``FeedVersion``. View feed
+cukup membaca counter tersebut (satu query) untuk membangun ETag, sehingga
+request yang datanya belum berubah langsung dijawab 304 sebelum ada query
+payload ataupun serialisasi.
+
+Feed daftar (news, event, ticketing) punya satu versi global yang hanya
+dinaikkan oleh perubahan yang jarang (simpan/hapus Article, Event, Ticket,
+UserProfile). Forum punya versi per artikel (``forum_key``): komentar dan vote
+hanya menaikkan baris versi forum artikel itu, jadi vote di forum lain tidak
+mengantre di baris yang sama dan tidak membatalkan ETag forum lain. Flush view
+counter sengaja tidak menaikkan versi apa pun (angka views di feed boleh
+tertinggal sampai perubahan berikutnya), begitu juga pembelian tiket (ETag
+tiket memakai total stok, lihat ticketing/views.py).
+"""
+import hashlib
+
+from django.apps import apps
+from django.db.models import F, Max
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from .models import FeedVersion
+
+NEWS = 'news'
+EVENT = 'event'
+TICKETING = 'ticketing'
+FORUM = 'forum'
+
+# Model -> feed global yang isinya ikut berubah
+MODEL_FEEDS = {
+    'news.Article': [NEWS],
+    'profile_user.UserProfile': [NEWS],
+    'event.Event': [EVENT, TICKETING],
+    'ticketing.Ticket': [TICKETING],
+}
+
+# Model forum -> query article_id forum yang berubah (key versi per artikel)
+FORUM_MODELS = {
+    'forumdiskusi.ForumDiskusi': lambda instance: [instance.article_id],
+    'forumdiskusi.Post': lambda instance: (
+        apps.get_model('forumdiskusi.ForumDiskusi').objects
+        .filter(pk=instance.forum_id).values_list('article_id', flat=True)
+    ),
+    'forumdiskusi.Vote': lambda instance: (
+        apps.get_model('forumdiskusi.Post').objects
+        .filter(pk=instance.post_id).values_list('forum__article_id', flat=True)
+    ),
+}
+
+
+def forum_key(article_id):
+    """Key versi forum satu artikel (forum/<pk>/json dan halaman komentarnya)."""
+    return f"{FORUM}:{article_id}"
+
+
+def bump(*keys):
+    """Naikkan versi feed ``keys``."""
+    now = timezone.now()
+    for key in keys:
+        updated = FeedVersion.objects.filter(key=key).update(
+            version=F('version') + 1, updated_at=now
+        )
+        if not updated:
+            FeedVersion.objects.get_or_create(key=key, defaults={'version': 1, 'updated_at': now})
+
+
+def get_versions(keys):
+    """Return ``{key: (version, updated_at)}`` untuk ``keys`` dalam satu query."""
+    rows = FeedVersion.objects.filter(key__in=keys).values_list('key', 'version', 'updated_at')
+    return {key: (version, updated_at) for key, version, updated_at in rows}
+
+
+def make_etag(keys, *extra):
+    """
+    ETag dari versi feed ``keys`` ditambah nilai ``extra`` (mis. user id,
+    query string) yang juga memengaruhi isi response.
+    """
+    versions = get_versions(keys)
+    parts = [f"{key}:{versions.get(key, (0, None))[0]}" for key in keys]
+    parts.extend(str(value) for value in extra)
+    return hashlib.md5("|".join(parts).encode()).hexdigest()
+
+
+def last_modified(keys):
+    return FeedVersion.objects.filter(key__in=keys).aggregate(last=Max('updated_at'))['last']
+
+
+def _bump_for_sender(sender, **kwargs):
+    bump(*MODEL_FEEDS[sender._meta.label])
+
+
+def _bump_forum_for_sender(sender, instance, **kwargs):
+    # Induknya bisa sudah terhapus (cascade): berarti tidak ada forum yang perlu dinaikkan
+    bump(*[forum_key(article_id) for article_id in FORUM_MODELS[sender._meta.label](instance) if article_id])
+
+
+def connect_signals():
+    for labels, receiver in ((MODEL_FEEDS, _bump_for_sender), (FORUM_MODELS, _bump_forum_for_sender)):
+        for label in labels:
+            uid = f'feed_version_{label}'
+            post_save.connect(receiver, sender=label, dispatch_uid=f'{uid}_save')
+            post_delete.connect(receiver, sender=label, dispatch_uid=f'{uid}_delete')
@@ -0,0 +1,180 @@
+"""
+Deteksi artikel yang hampir sama (near-duplicate) dengan MinHash + LSH.
+
+- Fitur: shingle 3 term berurutan dari ``search.analyze(content)`` (sudah
+  di-stem, tanpa stopword), jadi judul yang diganti atau beberapa kalimat
+  yang disunting hanya mengubah sebagian kecil shingle.
+- Signature: ``NUM_PERM`` nilai minimum hash 32-bit dari shingle (satu
+  ``shake_128`` per shingle menghasilkan semua nilai sekaligus). Persentase
+  nilai yang sama antara dua signature adalah perkiraan kemiripan Jaccard.
+- LSH: signature dipotong menjadi ``BANDS`` band x ``ROWS`` nilai; setiap band
+  di-hash menjadi satu key ber-index di ``ArticleFingerprintBand``. Artikel
+  dengan kemiripan >= ``THRESHOLD`` hampir pasti berbagi minimal satu key,
+  jadi kandidat dicari dengan satu query ``key IN (...)`` lalu kemiripannya
+  dicek dari signature; tidak ada perbandingan berpasangan ke seluruh korpus.
+- Artikel baru lewat ORM diberi fingerprint oleh signal post_save dan
+  ditandai ``duplicate_of`` jika mirip artikel lama (view create memakai ini
+  untuk memberi peringatan). Import CSV / pipeline scraper memeriksa per
+  batch dan melewati (atau menandai) near-duplicate.
+- Untuk data lama jalankan ``python manage.py rebuild_fingerprints``.
+"""
+import hashlib
+import struct
+from collections import defaultdict
+
+from django.db import transaction
+
+from . import search
+from .models import ArticleFingerprint, ArticleFingerprintBand
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+# Kemiripan Jaccard (perkiraan) minimum untuk dianggap hampir sama. Titik
+# belok kurva LSH 16x4 ada di (1/16) ** (1/4) = 0.5.
+THRESHOLD = 0.5
+SHINGLE_SIZE = 3
+# Konten dengan shingle lebih sedikit dari ini tidak di-fingerprint (terlalu banyak false positive)
+MIN_SHINGLES = 10
+# Artikel per query lookup (BANDS key per artikel), tetap di bawah batas parameter SQLite
+LOOKUP_CHUNK = 50
+
+_SIGNATURE = struct.Struct(f'<{NUM_PERM}I')
+_BAND = struct.Struct(f'<B{ROWS}I')
+
+
+def signature(text):
+    """Signature MinHash (tuple ``NUM_PERM`` int) dari ``text``, atau None jika teks terlalu pendek."""
+    terms = search.analyze(text)
+    shingles = {' '.join(terms[i:i + SHINGLE_SIZE]) for i in range(len(terms) - SHINGLE_SIZE + 1)}
+    if len(shingles) < MIN_SHINGLES:
+        return None
+    # Satu baris per shingle berisi NUM_PERM hash 32-bit; minimum per kolom dihitung di C
+    hashes = [_SIGNATURE.unpack(hashlib.shake_128(s.encode('utf-8')).digest(_SIGNATURE.size)) for s in shingles]
+    return tuple(map(min, zip(*hashes)))
+
+
+def similarity(a, b):
+    """Perkiraan kemiripan Jaccard dua signature (0..1)."""
+    return sum(x == y for x, y in zip(a, b)) / NUM_PERM
+
+
+def band_keys(sig):
+    """Key LSH (int 64-bit bertanda) untuk setiap band signature."""
+    return [
+        int.from_bytes(
+            hashlib.blake2b(_BAND.pack(band, *sig[band * ROWS:(band + 1) * ROWS]), digest_size=8).digest(),
+            'little', signed=True,
+        )
+        for band in range(BANDS)
+    ]
+
+
+def pack(sig):
+    return _SIGNATURE.pack(*sig)
+
+
+def unpack(data):
+    return _SIGNATURE.unpack(bytes(data))
+
+
+def make_fingerprint(article_id, sig, duplicate_of_id=None):
+    return ArticleFingerprint(article_id=article_id, signature=pack(sig), duplicate_of_id=duplicate_of_id)
+
+
+def _best(sig, candidates):
+    """``(key, kemiripan)`` kandidat paling mirip dengan kemiripan >= THRESHOLD, atau None."""
+    best = None
+    for key, candidate in candidates:
+        score = similarity(sig, candidate)
+        if score >= THRESHOLD and (best is None or score > best[1]):
+            best = (key, score)
+    return best
+
+
+def find_near_duplicates(signatures, exclude=()):
+    """
+    ``signatures``: dict ``key -> signature``. Return dict ``key -> (article_id, kemiripan)``
+    untuk artikel di database yang paling mirip (kemiripan >= THRESHOLD).
+    """
+    items = [(key, sig, band_keys(sig)) for key, sig in signatures.items() if sig is not None]
+    matches = {}
+    for start in range(0, len(items), LOOKUP_CHUNK):
+        chunk = items[start:start + LOOKUP_CHUNK]
+        by_key = defaultdict(set)
+        candidates = {}
+        rows = (
+            ArticleFingerprintBand.objects
+            .filter(key__in={k for _, _, keys in chunk for k in keys})
+            .exclude(fingerprint_id__in=exclude)
+            .values_list('key', 'fingerprint_id', 'fingerprint__signature')
+        )
+        for band_key, article_id, data in rows:
+            by_key[band_key].add(article_id)
+            if article_id not in candidates:
+                candidates[article_id] = unpack(data)
+        for key, sig, keys in chunk:
+            ids = set().union(*(by_key.get(k, ()) for k in keys))
+            best = _best(sig, ((article_id, candidates[article_id]) for article_id in ids))
+            if best:
+                matches[key] = best
+    return matches
+
+
+class BandIndex:
+    """Index LSH di memori untuk near-duplicate di dalam satu run import."""
+
+    def __init__(self):
+        self._buckets = defaultdict(list)
+
+    def add(self, key, sig):
+        for band_key in band_keys(sig):
+            self._buckets[band_key].append((key, sig))
+
+    def match(self, sig):
+        """``(key, kemiripan)`` entry paling mirip, atau None."""
+        candidates = {}
+        for band_key in band_keys(sig):
+            for key, candidate in self._buckets.get(band_key, ()):
+                candidates[id(key)] = (key, candidate)
+        return _best(sig, candidates.values())
+
+
+def save_fingerprints(fingerprints, replace=True):
+    """Simpan banyak ArticleFingerprint beserta band LSH-nya sekaligus (dipakai import CSV)."""
+    with transaction.atomic():
+        if replace:
+            pks = [fp.article_id for fp in fingerprints]
+            for start in range(0, len(pks), 500):
+                ArticleFingerprint.objects.filter(article_id__in=pks[start:start + 500]).delete()
+        ArticleFingerprint.objects.bulk_create(fingerprints, batch_size=500)
+        ArticleFingerprintBand.objects.bulk_create(
+            (
+                ArticleFingerprintBand(fingerprint_id=fp.article_id, key=key)
+                for fp in fingerprints for key in band_keys(unpack(fp.signature))
+            ),
+            batch_size=1000,
+        )
+
+
+def update_fingerprint(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    """Receiver post_save Article."""
+    if raw:
+        return
+    if update_fields is not None and 'content' not in update_fields:
+        return
+    sig = signature(instance.content)
+    if sig is None:
+        ArticleFingerprint.objects.filter(article_id=instance.pk).delete()
+        return
+    previous = ArticleFingerprint.objects.filter(article_id=instance.pk).only('signature').first()
+    if previous is not None and bytes(previous.signature) == pack(sig):
+        return
+    match = find_near_duplicates({instance.pk: sig}, exclude=[instance.pk]).get(instance.pk)
+    save_fingerprints([make_fingerprint(instance.pk, sig, match[0] if match else None)])
+
+
+def duplicate_of(article):
+    """Article yang mirip dengan ``article`` saat ia disimpan, atau None."""
+    fingerprint = ArticleFingerprint.objects.filter(article_id=article.pk).select_related('duplicate_of').first()
+    return fingerprint.duplicate_of if fingerprint else None
@@ -0,0 +1,105 @@
+"""
+Frontier persisten untuk crawl incremental (``scrape_cnn --incremental``).
+
+- Setiap URL detail yang ditemukan di halaman indeks dicatat di ``CrawlUrl``
+  (status ``pending``). URL yang sudah ada di tabel, atau yang judulnya
+  sudah ada sebagai Article, dianggap "known"; halaman indeks diurutkan dari
+  yang terbaru, jadi paging berhenti begitu satu halaman memuat artikel known.
+- URL ``pending``/``failed`` (retry < ``MAX_ATTEMPTS``) tetap di antrean,
+  jadi run yang terputus dilanjutkan run berikutnya.
+- URL baru ditandai ``done`` setelah halamannya berhasil di-parse dan barisnya
+  tersimpan di sink (untuk ``--to-db``: setelah batch ``ArticleSink`` di-flush);
+  halaman yang gagal di-parse/ditolak database ditandai ``failed`` tanpa
+  menyimpan validator, jadi diambil ulang penuh di run berikutnya.
+- ``ETag``/``Last-Modified`` dari response disimpan per URL (termasuk
+  halaman indeks) dan dikirim ulang sebagai ``If-None-Match`` /
+  ``If-Modified-Since``; response 304 berarti halaman tidak berubah dan
+  tidak perlu di-parse.
+"""
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Article, CrawlUrl
+
+MAX_ATTEMPTS = 5
+
+
+def known(items):
+    """Subset URL dari ``items`` (IndexItem) yang sudah pernah ditemukan/diimpor."""
+    urls = [item.url for item in items]
+    seen = set(
+        CrawlUrl.objects.filter(kind=CrawlUrl.KIND_ARTICLE, url__in=urls).values_list('url', flat=True)
+    )
+    titles = set(
+        Article.objects.filter(title__in=[item.title for item in items]).values_list('title', flat=True)
+    )
+    return {item.url for item in items if item.url in seen or item.title in titles}
+
+
+def discover(items):
+    """Masukkan IndexItem baru ke frontier sebagai ``pending``."""
+    CrawlUrl.objects.bulk_create([
+        CrawlUrl(url=item.url, title=item.title[:255], thumbnail=(item.thumbnail or '')[:500])
+        for item in items
+    ], ignore_conflicts=True)
+
+
+def pending(limit):
+    """URL yang belum berhasil di-fetch, dari yang paling lama ditemukan."""
+    return list(
+        CrawlUrl.objects
+        .filter(kind=CrawlUrl.KIND_ARTICLE)
+        .filter(Q(status=CrawlUrl.STATUS_PENDING) | Q(status=CrawlUrl.STATUS_FAILED, attempts__lt=MAX_ATTEMPTS))
+        .order_by('discovered_at', 'pk')[:limit]
+    )
+
+
+def stale(limit):
+    """URL yang sudah selesai, dari yang paling lama tidak di-fetch (untuk re-crawl)."""
+    return list(
+        CrawlUrl.objects
+        .filter(kind=CrawlUrl.KIND_ARTICLE, status=CrawlUrl.STATUS_DONE)
+        .order_by(F('fetched_at').asc(nulls_first=True), 'pk')[:limit]
+    )
+
+
+def conditional_headers(entry):
+    headers = {}
+    if entry and entry.etag:
+        headers['If-None-Match'] = entry.etag
+    if entry and entry.last_modified:
+        headers['If-Modified-Since'] = entry.last_modified
+    return headers
+
+
+def get_entry(url):
+    return CrawlUrl.objects.filter(url=url).first()
+
+
+def record(entry, result, kind=CrawlUrl.KIND_ARTICLE):
+    """
+    Simpan hasil fetch (``news.crawler.FetchResult``) untuk ``entry``.
+    ``entry`` boleh None (mis. halaman indeks yang belum tercatat).
+    """
+    if entry is None:
+        entry = CrawlUrl(url=result.url, kind=kind)
+    entry.fetched_at = timezone.now()
+    entry.attempts = 0 if result.ok or result.not_modified else entry.attempts + 1
+    if result.ok or result.not_modified:
+        entry.status = CrawlUrl.STATUS_DONE
+        # 304 boleh mengirim validator baru; jika tidak, yang lama tetap dipakai
+        entry.etag = (result.headers.get('ETag') or entry.etag)[:255]
+        entry.last_modified = (result.headers.get('Last-Modified') or entry.last_modified)[:64]
+    else:
+        entry.status = CrawlUrl.STATUS_FAILED
+    entry.save()
+    return entry
+
+
+def fail(entry):
+    """Tandai ``entry`` gagal walau fetch-nya berhasil (parse error / ditolak database)."""
+    entry.fetched_at = timezone.now()
+    entry.attempts += 1
+    entry.status = CrawlUrl.STATUS_FAILED
+    entry.save(update_fields=['fetched_at', 'attempts', 'status'])
+    return entry
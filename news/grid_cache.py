@@ -0,0 +1,63 @@
+"""
+Cache fragmen HTML grid artikel (endpoint "muat lebih banyak").
+
+Fragmen disimpan per (kategori, cursor, ukuran halaman). Alih-alih mencari
+dan menghapus semua key yang mungkin terdampak, setiap key memuat nomor
+"generasi"; signal post_save/post_delete Article cukup menaikkan generasi
+sehingga semua fragmen lama otomatis tidak terpakai lagi (dan kedaluwarsa
+sendiri oleh TTL).
+
+Generasi disimpan di tabel ``FeedVersion`` (key ``articlegrid``), bukan di
+cache: cache default (LocMemCache) terpisah per proses, jadi generasi di sana
+hanya naik di worker yang menyimpan artikel dan worker lain terus menyajikan
+fragmen basi. Dengan generasi di database, invalidasi berlaku untuk semua
+worker walaupun fragmennya sendiri tetap di cache lokal masing-masing. Cache
+hit butuh satu query kecil (baca generasi) dan tidak menyentuh template engine.
+
+Jumlah views di kartu ikut ter-cache; update views (lewat flush view counter)
+tidak memicu invalidasi, jadi angkanya bisa tertinggal paling lama
+``ARTICLE_GRID_CACHE_TIMEOUT`` detik.
+
+Settings (opsional):
+    ARTICLE_GRID_CACHE_TIMEOUT  TTL fragmen dalam detik (default 300)
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import feed_versions
+
+GENERATION_KEY = 'articlegrid'
+KEY_PREFIX = 'articlegrid'
+
+
+def get_timeout():
+    return getattr(settings, 'ARTICLE_GRID_CACHE_TIMEOUT', 300)
+
+
+def get_generation():
+    version, updated_at = feed_versions.get_versions([GENERATION_KEY]).get(GENERATION_KEY, (0, None))
+    # updated_at ikut dipakai supaya baris yang dihapus lalu dibuat ulang (versi
+    # mulai lagi dari 1) tidak memakai ulang fragmen generasi lama
+    return f"{version}.{updated_at.timestamp() if updated_at else 0}"
+
+
+def make_key(category, cursor, limit):
+    raw = f"{category or ''}|{cursor or ''}|{limit}"
+    digest = hashlib.md5(raw.encode()).hexdigest()
+    return f"{KEY_PREFIX}:{get_generation()}:{digest}"
+
+
+def get_fragment(key):
+    """Return ``(html, next_cursor)`` dari cache atau None."""
+    return cache.get(key)
+
+
+def set_fragment(key, html, next_cursor):
+    cache.set(key, (html, next_cursor), get_timeout())
+
+
+def invalidate(**kwargs):
+    """Receiver post_save/post_delete Article: buang semua fragmen lama."""
+    feed_versions.bump(GENERATION_KEY)
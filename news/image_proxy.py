@@ -0,0 +1,225 @@
+"""
+Cache disk untuk image proxy (news/proxy-image/ & forum/proxy-image/).
+
+- File disimpan content-addressed: nama file = sha256(url).
+- Ukuran total dibatasi ``IMAGE_PROXY_CACHE_MAX_BYTES``; saat terlampaui,
+  file yang paling lama tidak diakses (mtime) dihapus dulu (LRU).
+- Request ke origin memakai satu ``requests.Session`` dengan connection pool.
+- Beberapa request bersamaan untuk URL yang sama hanya memicu satu download
+  (single-flight); sisanya menunggu lalu membaca dari disk. Jika download
+  itu gagal, yang menunggu menerima error yang sama (origin tidak diserbu).
+- Download ditulis bertahap ke file sementara, jadi gambar tidak pernah
+  ditampung utuh di memori.
+
+Settings (opsional):
+    IMAGE_PROXY_CACHE_DIR        default MEDIA_ROOT/image_cache
+    IMAGE_PROXY_CACHE_MAX_BYTES  default 512 MB
+    IMAGE_PROXY_MAX_IMAGE_BYTES  default 10 MB
+    IMAGE_PROXY_MAX_AGE          default 30 hari (Cache-Control max-age)
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+CHUNK_SIZE = 64 * 1024
+TIMEOUT = (3.05, 10)
+DEFAULT_CONTENT_TYPE = 'image/jpeg'
+
+
+class ImageProxyError(Exception):
+    pass
+
+
+def get_cache_dir():
+    return getattr(settings, 'IMAGE_PROXY_CACHE_DIR', os.path.join(settings.MEDIA_ROOT, 'image_cache'))
+
+
+def get_max_bytes():
+    return getattr(settings, 'IMAGE_PROXY_CACHE_MAX_BYTES', 512 * 1024 * 1024)
+
+
+def get_max_image_bytes():
+    return getattr(settings, 'IMAGE_PROXY_MAX_IMAGE_BYTES', 10 * 1024 * 1024)
+
+
+def get_max_age():
+    return getattr(settings, 'IMAGE_PROXY_MAX_AGE', 30 * 24 * 60 * 60)
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=20, pool_maxsize=20, max_retries=1)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _session = session
+        return _session
+
+
+def _paths(url):
+    digest = hashlib.sha256(url.encode('utf-8')).hexdigest()
+    directory = os.path.join(get_cache_dir(), digest[:2])
+    return directory, os.path.join(directory, digest), os.path.join(directory, digest + '.json')
+
+
+def _read_cached(url):
+    _, data_path, meta_path = _paths(url)
+    try:
+        with open(meta_path, encoding='utf-8') as f:
+            meta = json.load(f)
+        # Sentuh mtime supaya eviction LRU tahu file ini baru dipakai
+        os.utime(data_path)
+    except (OSError, ValueError):
+        return None
+    return data_path, meta.get('content_type', DEFAULT_CONTENT_TYPE)
+
+
+class _DiskLRU:
+    """Menjaga perkiraan ukuran cache dan melakukan eviction berdasarkan mtime."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._total = None
+
+    def _scan(self):
+        entries = []
+        root = get_cache_dir()
+        if not os.path.isdir(root):
+            return entries
+        for dirpath, _, filenames in os.walk(root):
+            for name in filenames:
+                if name.endswith('.json') or name.startswith('.'):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def added(self, size):
+        with self._lock:
+            if self._total is None:
+                self._total = sum(size for _, size, _ in self._scan())
+            else:
+                self._total += size
+            if self._total > get_max_bytes():
+                self._evict()
+
+    def _evict(self):
+        entries = sorted(self._scan())
+        total = sum(size for _, size, _ in entries)
+        # Turunkan ke 90% batas supaya eviction tidak jalan di setiap write
+        target = get_max_bytes() * 0.9
+        for _, size, path in entries:
+            if total <= target:
+                break
+            for p in (path, path + '.json'):
+                try:
+                    os.remove(p)
+                except OSError:
+                    pass
+            total -= size
+        self._total = total
+
+
+class _Flight:
+    """Satu download yang sedang berjalan; ``error`` diisi jika gagal."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.error = None
+
+
+_lru = _DiskLRU()
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def _download(url):
+    directory, data_path, meta_path = _paths(url)
+    os.makedirs(directory, exist_ok=True)
+    max_bytes = get_max_image_bytes()
+
+    with get_session().get(url, stream=True, timeout=TIMEOUT) as response:
+        response.raise_for_status()
+        content_type = response.headers.get('Content-Type', DEFAULT_CONTENT_TYPE)
+
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        size = 0
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise ImageProxyError(f'Image larger than {max_bytes} bytes')
+                    tmp.write(chunk)
+            with open(meta_path, 'w', encoding='utf-8') as f:
+                json.dump({'url': url, 'content_type': content_type, 'fetched_at': time.time()}, f)
+            # rename atomic: pembaca tidak pernah melihat file setengah jadi
+            os.replace(tmp_path, data_path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    _lru.added(size)
+    return data_path, content_type
+
+
+def fetch(url):
+    """
+    Return ``(path, content_type)`` gambar ``url`` di cache disk, mengunduhnya
+    dulu jika belum ada. Raise ``requests.RequestException`` atau
+    ``ImageProxyError`` jika gagal.
+    """
+    if urlparse(url).scheme not in ('http', 'https'):
+        raise ImageProxyError('Only http(s) URLs are supported')
+
+    cached = _read_cached(url)
+    if cached:
+        return cached
+
+    with _inflight_lock:
+        flight = _inflight.get(url)
+        leader = flight is None
+        if leader:
+            flight = _inflight[url] = _Flight()
+
+    if not leader:
+        if not flight.done.wait(timeout=sum(TIMEOUT)):
+            raise ImageProxyError('Timed out waiting for the download of this image')
+        if flight.error is not None:
+            raise flight.error
+        cached = _read_cached(url)
+        if cached:
+            return cached
+        # File sudah di-evict lagi sebelum sempat dibaca: unduh ulang
+        return _download(url)
+
+    try:
+        return _download(url)
+    except BaseException as e:
+        flight.error = e
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(url, None)
+        flight.done.set()
@@ -0,0 +1,350 @@
+"""
+Engine import artikel secara batch (dipakai ``populate_articles_from_csv``).
+
+- Judul yang sudah ada di database dimuat sekali di awal (set/dict di memori),
+  jadi tidak ada query ``exists()`` per baris.
+- Baris dibaca dengan generator (streaming), file tidak pernah dimuat utuh.
+- Artikel baru ditulis dengan ``bulk_create`` per batch di dalam satu
+  transaksi; dengan ``update_existing`` artikel yang judulnya sudah ada
+  diperbarui dengan ``bulk_update``.
+- ``bulk_create`` tidak mengirim signal post_save, jadi index pencarian, skor
+  trending, varian thumbnail, versi feed dan cache grid diperbarui langsung
+  per batch.
+- Jika satu batch gagal (mis. satu baris melanggar constraint), batch itu
+  diulang per baris supaya hanya baris yang rusak yang dilewati.
+- Selain judul yang sama persis, artikel baru yang isinya hampir sama dengan
+  artikel di database atau baris sebelumnya (MinHash-LSH, lihat
+  ``news/fingerprint.py``) dilewati (``near_duplicates='skip'``) atau tetap
+  disimpan dengan tanda ``duplicate_of`` (``'flag'``). Pengecekan per batch:
+  satu query index band LSH, bukan perbandingan ke seluruh korpus.
+"""
+import csv
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import lru_cache
+
+import pytz
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+
+from . import feed_versions, fingerprint, grid_cache, search, thumbnails, trending
+from .models import Article
+
+DEFAULT_BATCH_SIZE = 1000
+NEAR_DUPLICATE_MODES = ('skip', 'flag', 'off')
+UPDATE_FIELDS = ['content', 'thumbnail', 'category', 'created_at']
+
+# Mapping bulan (kunci ID, value EN)
+MONTHS_ID_TO_EN = {
+    'Jan': 'Jan', 'Feb': 'Feb', 'Mar': 'Mar', 'Apr': 'Apr',
+    'Mei': 'May', 'Jun': 'Jun', 'Jul': 'Jul', 'Agu': 'Aug',
+    'Sep': 'Sep', 'Okt': 'Oct', 'Nov': 'Nov', 'Des': 'Dec',
+}
+DATE_FORMAT = "%d %b %Y %H:%M"
+VALID_CATEGORIES = frozenset(value for value, _ in Article.CATEGORY_CHOICES)
+DEFAULT_CATEGORY = 'olahraga lain'
+TITLE_MAX_LENGTH = Article._meta.get_field('title').max_length
+THUMBNAIL_MAX_LENGTH = Article._meta.get_field('thumbnail').max_length
+
+
+class RowError(ValueError):
+    pass
+
+
+def iter_csv_rows(path):
+    """Generator ``(nomor_baris, row)`` dari file CSV."""
+    with open(path, 'r', newline='', encoding='utf-8') as csvfile:
+        reader = csv.DictReader(csvfile)
+        for row in reader:
+            yield reader.line_num, row
+
+
+@lru_cache(maxsize=10_000)
+def parse_publish_date(value, tz):
+    """
+    Parse tanggal CNN ("Kamis, 23 Okt 2025 21:30 WIB") menjadi datetime aware
+    di ``tz``. Raise ``ValueError`` jika formatnya tidak dikenal. Di-cache
+    karena banyak artikel dalam satu dump berbagi menit terbit yang sama.
+    """
+    # 1. Hapus nama hari
+    if ", " in value:
+        value = value.split(", ", 1)[1]
+    # 2. Ganti bulan ke Inggris
+    for id_month, en_month in MONTHS_ID_TO_EN.items():
+        if id_month in value:
+            value = value.replace(id_month, en_month)
+            break
+    # 3. Hapus " WIB"
+    if value.endswith(" WIB"):
+        value = value[:-4]
+    return tz.localize(datetime.strptime(value.strip(), DATE_FORMAT))
+
+
+@dataclass
+class ImportStats:
+    rows: int = 0
+    added: int = 0
+    updated: int = 0
+    skipped: int = 0
+    near_duplicates: int = 0
+    errors: int = 0
+    started: float = field(default_factory=time.monotonic)
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+
+class _ArticleRef:
+    __slots__ = ('title', 'pk')
+
+    def __init__(self, title):
+        self.title = title
+        self.pk = None
+
+
+class ArticleImporter:
+    """
+    Pemakaian::
+
+        importer = ArticleImporter(author, batch_size=1000)
+        for line_no, row in iter_csv_rows(path):
+            importer.add_row(row, line_no)
+        stats = importer.finish()
+
+    ``on_error(line_no, message)``, ``on_warning(line_no, message)`` dan
+    ``on_batch(stats)`` opsional untuk melaporkan progres. ``on_flush(rejected)``
+    dipanggil setelah setiap batch ditulis dengan set judul yang ditolak database.
+    """
+
+    def __init__(self, author, batch_size=DEFAULT_BATCH_SIZE, update_existing=False,
+                 dry_run=False, near_duplicates='skip', on_error=None, on_warning=None, on_batch=None,
+                 on_flush=None):
+        if near_duplicates not in NEAR_DUPLICATE_MODES:
+            raise ValueError(f"near_duplicates harus salah satu dari {NEAR_DUPLICATE_MODES}")
+        self.author = author
+        self.batch_size = max(1, batch_size)
+        self.update_existing = update_existing
+        self.dry_run = dry_run
+        self.near_duplicates = near_duplicates
+        self.on_error = on_error or (lambda line_no, message: None)
+        self.on_warning = on_warning or (lambda line_no, message: None)
+        self.on_batch = on_batch or (lambda stats: None)
+        self.on_flush = on_flush or (lambda rejected: None)
+        self.tz = pytz.timezone(settings.TIME_ZONE)
+        self.stats = ImportStats()
+        # Judul -> pk artikel yang sudah ada sebelum import dimulai
+        self.existing = dict(Article.objects.values_list('title', 'pk').iterator(chunk_size=5000))
+        self.seen = set()
+        # Judul yang barisnya tanpa tanggal: created_at lama tidak ditimpa saat update
+        self.undated = set()
+        self._to_create = []
+        self._to_update = []
+        self._changed = False
+        # Signature artikel yang sudah diterima di run ini (untuk duplikat antar baris)
+        self._band_index = fingerprint.BandIndex()
+        # id(Article) -> (signature, ref artikel/pk yang mirip, ref artikel ini)
+        self._fingerprints = {}
+
+    def build_article(self, row, line_no):
+        """
+        Validasi & normalisasi satu baris CSV menjadi Article (belum disimpan).
+        ``created_at`` dibiarkan None jika baris tidak punya tanggal.
+        """
+        title = (row.get('title') or '').strip()
+        if not title:
+            raise RowError("Judul kosong, dilewati.")
+        if len(title) > TITLE_MAX_LENGTH:
+            raise RowError(f"Judul lebih dari {TITLE_MAX_LENGTH} karakter, dilewati.")
+
+        created_at = None
+        publish_date_str = (row.get('publish_date_str') or '').strip()
+        if publish_date_str:
+            try:
+                created_at = parse_publish_date(publish_date_str, self.tz)
+            except ValueError as e:
+                raise RowError(f"Gagal parsing '{publish_date_str}' -> {e}")
+
+        category = (row.get('category') or '').strip()
+        if category not in VALID_CATEGORIES:
+            self.on_warning(line_no, f"Kategori '{category}' tidak valid, diubah ke '{DEFAULT_CATEGORY}'.")
+            category = DEFAULT_CATEGORY
+
+        thumbnail = (row.get('thumbnail') or '').strip() or None
+        if thumbnail and len(thumbnail) > THUMBNAIL_MAX_LENGTH:
+            self.on_warning(line_no, "URL thumbnail terlalu panjang, dikosongkan.")
+            thumbnail = None
+
+        return Article(
+            title=title,
+            content=row.get('content') or '',
+            thumbnail=thumbnail,
+            category=category,
+            author=self.author,
+            created_at=created_at,
+        )
+
+    def add_row(self, row, line_no=None):
+        self.stats.rows += 1
+        try:
+            article = self.build_article(row, line_no)
+        except RowError as e:
+            self.stats.errors += 1
+            self.on_error(line_no, str(e))
+            return
+        self.add(article)
+
+    def add(self, article):
+        """Antrekan Article yang sudah dinormalisasi (dipakai juga oleh pipeline scraper)."""
+        if article.title in self.seen:
+            # Duplikat di dalam sumber yang sama: baris pertama yang dipakai
+            self.stats.skipped += 1
+            return
+        self.seen.add(article.title)
+        if article.created_at is None:
+            self.undated.add(article.title)
+            article.created_at = timezone.now()
+
+        existing_pk = self.existing.get(article.title)
+        if existing_pk is not None:
+            if not self.update_existing:
+                self.stats.skipped += 1
+                return
+            article.pk = existing_pk
+            self._to_update.append(article)
+        else:
+            self._to_create.append(article)
+
+        if len(self._to_create) + len(self._to_update) >= self.batch_size:
+            self.flush()
+
+    def _filter_near_duplicates(self, to_create):
+        """Hitung signature MinHash batch, lalu lewati/tandai artikel yang hampir sama."""
+        values = {id(article): fingerprint.signature(article.content) for article in to_create}
+        in_db = fingerprint.find_near_duplicates(values) if self.near_duplicates != 'off' else {}
+        kept = []
+        for article in to_create:
+            value = values[id(article)]
+            similar = None
+            if value is not None and self.near_duplicates != 'off':
+                match = in_db.get(id(article))
+                run_match = self._band_index.match(value)
+                if match and (run_match is None or match[1] >= run_match[1]):
+                    similar = match[0]
+                elif run_match:
+                    similar = run_match[0]
+            if similar is not None:
+                self.stats.near_duplicates += 1
+                label = f"'{similar.title[:40]}'" if isinstance(similar, _ArticleRef) else f"#{similar}"
+                if self.near_duplicates == 'skip':
+                    self.stats.skipped += 1
+                    self.on_warning(None, f"'{article.title[:40]}' hampir sama dengan artikel {label}, dilewati.")
+                    continue
+                self.on_warning(None, f"'{article.title[:40]}' hampir sama dengan artikel {label}.")
+            if value is not None:
+                # Index run hanya menyimpan judul/pk, bukan Article utuh (hemat memori)
+                ref = _ArticleRef(article.title)
+                self._band_index.add(ref, value)
+                self._fingerprints[id(article)] = (value, similar, ref)
+            kept.append(article)
+        return kept
+
+    def _fingerprint_rows(self, articles):
+        """ArticleFingerprint untuk artikel yang baru saja ditulis (pk sudah ada)."""
+        rows = []
+        for article in articles:
+            value, similar, ref = self._fingerprints.get(id(article), (None, None, None))
+            if ref is not None:
+                ref.pk = article.pk
+            if value is None:
+                value = fingerprint.signature(article.content)
+            if value is None:
+                continue
+            similar_pk = similar.pk if isinstance(similar, _ArticleRef) else similar
+            rows.append(fingerprint.make_fingerprint(article.pk, value, similar_pk))
+        return rows
+
+    def flush(self):
+        to_create, to_update = self._to_create, self._to_update
+        self._to_create, self._to_update = [], []
+        if to_create:
+            to_create = self._filter_near_duplicates(to_create)
+        if not to_create and not to_update:
+            return
+
+        rejected = set()
+        if self.dry_run:
+            self.stats.added += len(to_create)
+            self.stats.updated += len(to_update)
+        else:
+            try:
+                self._write(to_create, to_update)
+                self.stats.added += len(to_create)
+                self.stats.updated += len(to_update)
+            except DatabaseError:
+                # Isolasi baris yang bermasalah
+                for article in to_create:
+                    if not self._write_one(article, created=True):
+                        rejected.add(article.title)
+                for article in to_update:
+                    if not self._write_one(article, created=False):
+                        rejected.add(article.title)
+            self._changed = True
+        for article in to_create:
+            self._fingerprints.pop(id(article), None)
+        self.on_batch(self.stats)
+        self.on_flush(rejected)
+
+    def _write(self, to_create, to_update):
+        with transaction.atomic():
+            # Thumbnail lama baris yang diperbarui: varian hanya dibuat jika URL-nya berubah
+            old_thumbnails = dict(
+                Article.objects.filter(pk__in=[a.pk for a in to_update]).values_list('pk', 'thumbnail')
+            ) if to_update else {}
+            if to_create:
+                Article.objects.bulk_create(to_create)
+                trending.seed_articles(to_create)
+            dated = [a for a in to_update if a.title not in self.undated]
+            undated = [a for a in to_update if a.title in self.undated]
+            if dated:
+                Article.objects.bulk_update(dated, UPDATE_FIELDS)
+            if undated:
+                Article.objects.bulk_update(undated, [f for f in UPDATE_FIELDS if f != 'created_at'])
+            if to_create:
+                search.index_articles(to_create, replace=False)
+                fingerprint.save_fingerprints(self._fingerprint_rows(to_create), replace=False)
+            if to_update:
+                search.index_articles(to_update)
+                fingerprint.save_fingerprints(self._fingerprint_rows(to_update))
+            # Pengganti receiver post_save prewarm_article_thumbnail (jalan setelah commit)
+            for thumbnail in {a.thumbnail for a in to_create} | {
+                a.thumbnail for a in to_update if a.thumbnail != old_thumbnails.get(a.pk)
+            }:
+                thumbnails.schedule_prewarm(thumbnail)
+
+    def _write_one(self, article, created):
+        try:
+            self._write([article] if created else [], [] if created else [article])
+        except DatabaseError as e:
+            self.stats.errors += 1
+            self.on_error(None, f"Gagal menyimpan artikel '{article.title[:30]}...': {e}")
+            return False
+        if created:
+            self.stats.added += 1
+        else:
+            self.stats.updated += 1
+        return True
+
+    def finish(self):
+        """Tulis sisa batch dan perbarui versi feed/cache grid. Return ImportStats."""
+        self.flush()
+        if self._changed:
+            feed_versions.bump(*feed_versions.MODEL_FEEDS['news.Article'])
+            grid_cache.invalidate()
+        return self.stats
@@ -1,143 +1,97 @@
-import csv
 import os
-import locale
-from datetime import datetime
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
-from news.models import Article
-from django.conf import settings
-import pytz
-from django.utils import timezone
+from news.importer import DEFAULT_BATCH_SIZE, NEAR_DUPLICATE_MODES, ArticleImporter, iter_csv_rows
 
 class Command(BaseCommand):
-    help = 'Populates the Article database from news/articles/cnn_articles.csv'
+    help = (
+        'Populates the Article database from news/articles/cnn_articles.csv '
+        '(atau file lain lewat --file) secara batch.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file', dest='csv_file',
+            help='Path file CSV (default news/articles/cnn_articles.csv).'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+            help=f'Jumlah artikel per transaksi bulk insert/update (default {DEFAULT_BATCH_SIZE}).'
+        )
+        parser.add_argument(
+            '--update-existing', action='store_true',
+            help='Perbarui isi/thumbnail/kategori/tanggal artikel yang judulnya sudah ada (upsert).'
+        )
+        parser.add_argument(
+            '--near-duplicates', choices=NEAR_DUPLICATE_MODES, default='skip',
+            help='Artikel baru yang isinya hampir sama dengan artikel lain: skip (default), '
+                 'flag (simpan dengan tanda duplicate_of) atau off (tidak dicek).'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Validasi dan hitung saja tanpa menulis ke database.'
+        )
 
     def handle(self, *args, **options):
-        self.stdout.write(self.style.NOTICE('Memulai populasi database dari cnn_articles.csv...'))
+        csv_file_path = options['csv_file']
+        if not csv_file_path:
+            # Path ke CSV (menggunakan path yang benar di dalam app 'news')
+            app_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+            csv_file_path = os.path.join(app_dir, 'articles', 'cnn_articles.csv')
 
-        # Path ke CSV (menggunakan path yang benar di dalam app 'news')
-        app_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-        articles_dir = os.path.join(app_dir, 'articles')
-        csv_file_path = os.path.join(articles_dir, 'cnn_articles.csv')
+        self.stdout.write(self.style.NOTICE(f'Memulai populasi database dari {csv_file_path}...'))
 
         if not os.path.exists(csv_file_path):
             self.stderr.write(self.style.ERROR(f"File {csv_file_path} tidak ditemukan. Jalankan 'scrape_cnn' dulu."))
             return
-        
 
         try:
             author = User.objects.get(username='CNN Indonesia')
         except User.DoesNotExist:
             self.stderr.write(self.style.ERROR('User "CNN Indonesia" tidak ditemukan di database. Buat dulu.'))
             return
-        
-        # Mapping bulan (kunci ID, value EN)
-        month_mapping_id_to_en = {
-            'Jan': 'Jan', 'Feb': 'Feb', 'Mar': 'Mar', 'Apr': 'Apr', 
-            'Mei': 'May', 'Jun': 'Jun', 'Jul': 'Jul', 'Agu': 'Aug', 
-            'Sep': 'Sep', 'Okt': 'Oct', 'Nov': 'Nov', 'Des': 'Dec'
-        }
-
-        added_count = 0
-        skipped_count = 0
-        error_count = 0
-        row_count = 0
-        
-        try:
-            with open(csv_file_path, 'r', newline='', encoding='utf-8') as csvfile:
-                reader = csv.DictReader(csvfile)
-                
-                for row in reader:
-                    row_count += 1
-                    title = row.get('title', '').strip()
-                    publish_date_str = row.get('publish_date_str', '').strip()
-                    category = row.get('category', '').strip()
-                    
-                    if not title:
-                        self.stderr.write(self.style.ERROR(f" Baris {row_count + 1}: Judul kosong, dilewati."))
-                        error_count += 1
-                        continue
 
-                    if Article.objects.filter(title=title).exists():
-                        skipped_count += 1
-                        continue
-                        
-                    # --- Blok Parsing Tanggal ---
-                    publish_datetime = None
-                    if publish_date_str:
-                        date_str_cleaned = "" # Definisikan di luar scope try
-                        format_string = "%d %b %Y %H:%M" # Definisikan di luar scope try
-                        try:
-                            # 1. Hapus Nama Hari
-                            date_part_only = publish_date_str
-                            if ", " in publish_date_str:
-                                date_part_only = publish_date_str.split(", ", 1)[1]
-                            
-                            # 2. Ganti bulan ke Inggris
-                            date_str_en = date_part_only 
-                            for id_month, en_month in month_mapping_id_to_en.items():
-                                if id_month in date_str_en:
-                                    date_str_en = date_str_en.replace(id_month, en_month)
-                                    break
+        verbosity = options['verbosity']
 
-                            # 3. HAPUS " WIB"
-                            if date_str_en.endswith(" WIB"):
-                                date_str_cleaned = date_str_en[:-4].strip()
-                            else:
-                                date_str_cleaned = date_str_en.strip()
+        def on_error(line_no, message):
+            prefix = f" Baris {line_no}: " if line_no else " "
+            self.stderr.write(self.style.ERROR(prefix + message))
 
-                            # 4. Format string (sudah didefinisikan di atas)
-                            
-                            # 5. Parsing string yang sudah SANGAT bersih
-                            # --- INI PERBAIKANNYA ---
-                            naive_datetime = datetime.strptime(date_str_cleaned, format_string) 
-                            # -------------------------
-                            
-                            # 6. Jadikan timezone-aware
-                            server_timezone = pytz.timezone(settings.TIME_ZONE) 
-                            publish_datetime = server_timezone.localize(naive_datetime)
-                            
-                        except ValueError as ve: 
-                            # Log error yang benar
-                            self.stderr.write(self.style.ERROR(f" Baris {row_count + 1}: Gagal parsing '{publish_date_str}' (String bersih: '{date_str_cleaned}') -> {ve}"))
-                            error_count += 1
-                            continue # Lanjut ke baris berikutnya
-                        except Exception as e:
-                            self.stderr.write(self.style.ERROR(f" Baris {row_count + 1}: Error tak terduga parsing tanggal: {e}"))
-                            error_count += 1
-                            continue # Lanjut ke baris berikutnya
-                    # --- Akhir Blok Parsing ---
+        def on_warning(line_no, message):
+            if verbosity >= 1:
+                prefix = f" Baris {line_no}: " if line_no else " "
+                self.stderr.write(self.style.WARNING(prefix + message))
 
-                    # Tentukan waktu pembuatan (pakai publish jika ada, jika tidak pakai now)
-                    creation_time = publish_datetime if publish_datetime else timezone.now()
-                    
-                    # Validasi kategori
-                    valid_categories = [c[0] for c in Article.CATEGORY_CHOICES]
-                    if category not in valid_categories:
-                        self.stderr.write(self.style.WARNING(f" Baris {row_count + 1}: Kategori '{category}' tidak valid, diubah ke 'olahraga lain'."))
-                        category = 'olahraga lain' 
+        def on_batch(stats):
+            if verbosity >= 2:
+                self.stdout.write(
+                    f"  {stats.rows} baris diproses ({stats.rows_per_second:,.0f} baris/detik)"
+                )
 
-                    # Buat objek Article
-                    try:
-                        Article.objects.create(
-                            title=title,
-                            content=row.get('content', ''),
-                            thumbnail=row.get('thumbnail') if row.get('thumbnail') else None,
-                            category=category,
-                            author=author,
-                            created_at=creation_time
-                        )
-                        added_count += 1
-                    except Exception as e:
-                        self.stderr.write(self.style.ERROR(f" Baris {row_count + 1}: Gagal menyimpan artikel '{title[:30]}...': {e}"))
-                        error_count += 1
+        importer = ArticleImporter(
+            author,
+            batch_size=options['batch_size'],
+            update_existing=options['update_existing'],
+            dry_run=options['dry_run'],
+            near_duplicates=options['near_duplicates'],
+            on_error=on_error,
+            on_warning=on_warning,
+            on_batch=on_batch,
+        )
 
-            self.stdout.write(self.style.SUCCESS(
-                f"\nPopulasi selesai! {added_count} artikel baru ditambahkan. "
-                f"{skipped_count} dilewati (duplikat). {error_count} error. Total {row_count} baris diproses."
-            ))
+        try:
+            for line_no, row in iter_csv_rows(csv_file_path):
+                importer.add_row(row, line_no)
+            stats = importer.finish()
+        except (OSError, UnicodeDecodeError) as e:
+            self.stderr.write(self.style.ERROR(f"Error saat membaca atau memproses CSV: {e}"))
+            return
 
-        except FileNotFoundError:
-            self.stderr.write(self.style.ERROR(f"File {csv_file_path} tidak ditemukan."))
-        except Exception as e:
-            self.stderr.write(self.style.ERROR(f"Error saat membaca atau memproses CSV: {e}"))
\ No newline at end of file
+        mode = " (dry run, tidak ada yang disimpan)" if options['dry_run'] else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"\nPopulasi selesai{mode}! {stats.added} artikel baru ditambahkan. "
+            f"{stats.updated} diperbarui. {stats.skipped} dilewati (duplikat, {stats.near_duplicates} hampir sama). "
+            f"{stats.errors} error. "
+            f"Total {stats.rows} baris diproses dalam {stats.elapsed:.2f} detik "
+            f"({stats.rows_per_second:,.0f} baris/detik)."
+        ))
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+
+from news import fingerprint
+from news.models import Article, ArticleFingerprint
+
+
+class Command(BaseCommand):
+    help = (
+        'Membangun ulang fingerprint MinHash (deteksi artikel hampir sama) untuk semua artikel. '
+        'Perlu dijalankan sekali untuk data yang sudah ada sebelum fingerprint dibuat.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Jumlah artikel yang dibaca per batch (default 500).'
+        )
+
+    def handle(self, *args, **options):
+        # Tidak ada delete() besar di awal: tiap batch mengganti fingerprint artikelnya
+        # sendiri dalam satu transaksi, jadi import/deteksi duplikat yang berjalan
+        # bersamaan tidak pernah melihat tabel kosong
+        batch_size = options['batch_size']
+        # Dari yang paling lama, supaya duplicate_of selalu menunjuk artikel yang terbit lebih dulu
+        articles = (
+            Article.objects.only('id', 'content').order_by('created_at', 'id').iterator(chunk_size=batch_size)
+        )
+        index = fingerprint.BandIndex()
+        total = duplicates = 0
+        batch = []
+        unsigned = []
+        for article in articles:
+            value = fingerprint.signature(article.content)
+            if value is None:
+                unsigned.append(article.pk)
+                continue
+            match = index.match(value)
+            if match:
+                duplicates += 1
+            index.add(article.pk, value)
+            batch.append(fingerprint.make_fingerprint(article.pk, value, match[0] if match else None))
+            if len(batch) >= batch_size:
+                fingerprint.save_fingerprints(batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            fingerprint.save_fingerprints(batch)
+            total += len(batch)
+        # Artikel yang kontennya terlalu pendek untuk di-fingerprint: buang sisa fingerprint lama
+        for start in range(0, len(unsigned), batch_size):
+            ArticleFingerprint.objects.filter(article_id__in=unsigned[start:start + batch_size]).delete()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Selesai! {total} artikel di-fingerprint, {duplicates} ditandai hampir sama dengan artikel lain."
+        ))
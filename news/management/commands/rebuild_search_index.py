@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from news import search
+from news.models import Article, SearchDocument
+
+
+class Command(BaseCommand):
+    help = (
+        'Membangun ulang index full-text (BM25) untuk semua artikel. '
+        'Perlu dijalankan sekali untuk data yang sudah ada sebelum index dibuat.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Jumlah artikel yang dibaca per batch (default 500).'
+        )
+        parser.add_argument(
+            '--clear', action='store_true',
+            help='Hapus seluruh index lama sebelum membangun ulang.'
+        )
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            SearchDocument.objects.all().delete()
+            search.invalidate_stats()
+
+        batch_size = options['batch_size']
+        articles = Article.objects.only('id', 'title', 'content').order_by().iterator(chunk_size=batch_size)
+        total = 0
+        batch = []
+        for article in articles:
+            batch.append(article)
+            if len(batch) >= batch_size:
+                search.index_articles(batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            search.index_articles(batch)
+            total += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Selesai! {total} artikel diindeks."))
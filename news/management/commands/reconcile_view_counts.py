@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from news import view_counter
+
+
+class Command(BaseCommand):
+    help = (
+        'Menulis view yang masih tertahan di buffer view counter ke database. '
+        'Dengan VIEW_COUNTER_BACKEND=cache, counter di jurnal dirty ikut ditulis '
+        '(termasuk milik worker yang sudah mati).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Jumlah entri jurnal dirty yang dibaca per batch (default 1000).'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        total = view_counter.flush_views()
+
+        buffer = view_counter.get_buffer()
+        if getattr(settings, 'VIEW_COUNTER_BACKEND', 'local') == 'cache':
+            # Hanya key di jurnal dirty, bukan semua pk Article/Event
+            for batch in view_counter.dirty_batches(batch_size):
+                total += self._apply(buffer, batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Selesai! {total} view ditulis ke database."))
+
+    def _apply(self, buffer, keys):
+        counts = buffer.drain(keys)
+        if not counts:
+            return 0
+        try:
+            view_counter.apply_counts(counts)
+        except Exception:
+            buffer.restore(counts)
+            raise
+        return sum(counts.values())
@@ -0,0 +1,90 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from news import archive
+from news.pipeline import CsvSink
+
+
+class Command(BaseCommand):
+    help = (
+        'Parse ulang halaman detail artikel dari arsip HTML scrape_cnn (tanpa request ke CNN) '
+        'dan tulis hasilnya ke CSV, mis. setelah selector parser diperbaiki.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--archive', dest='archive_dir', help='Direktori arsip (default SCRAPER_ARCHIVE_DIR).')
+        parser.add_argument('--output', help='Path file CSV (default news/articles/cnn_articles.csv).')
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Timpa file --output yang sudah ada (mis. dataset news/articles/cnn_articles.csv).'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Jumlah proses parser (default jumlah CPU).'
+        )
+        parser.add_argument('--chunk-size', type=int, default=200, help='Jumlah halaman per tugas worker (default 200).')
+
+    def handle(self, *args, **options):
+        csv_file_path = options['output']
+        if not csv_file_path:
+            app_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+            csv_file_path = os.path.join(app_dir, 'articles', 'cnn_articles.csv')
+        if os.path.exists(csv_file_path) and not options['force']:
+            raise CommandError(
+                f"{csv_file_path} sudah ada. Pakai --output ke file lain atau --force untuk menimpanya."
+            )
+
+        directory = options['archive_dir'] or archive.get_archive_dir()
+        entries = archive.latest_entries(directory)
+        if not entries:
+            self.stderr.write(self.style.ERROR(f"Tidak ada halaman artikel di arsip {directory}."))
+            return
+
+        self.stdout.write(self.style.NOTICE(
+            f"Parse ulang {len(entries)} halaman dari {directory} dengan {options['workers']} proses..."
+        ))
+        started = time.monotonic()
+        errors = 0
+        missing = {'content': 0, 'publish_date_str': 0}
+        # Baris langsung ditulis ke file sementara (tidak ditampung di memori);
+        # file tujuan baru diganti setelah semua halaman selesai di-parse
+        tmp_path = f"{csv_file_path}.tmp"
+        sink = CsvSink(tmp_path)
+        try:
+            for entry, row, error in archive.reparse(
+                entries, directory, workers=options['workers'], chunk_size=options['chunk_size']
+            ):
+                if error:
+                    errors += 1
+                    self.stderr.write(self.style.ERROR(f"  > ERROR {error}"))
+                    continue
+                sink.write(row)
+                for field in missing:
+                    if not row[field]:
+                        missing[field] += 1
+            sink.close()
+            if sink.written:
+                os.replace(tmp_path, csv_file_path)
+        except OSError as e:
+            self.stderr.write(self.style.ERROR(f"Gagal menulis CSV: {e}"))
+            return
+        finally:
+            sink.close()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        elapsed = time.monotonic() - started
+
+        if not sink.written:
+            self.stderr.write(self.style.WARNING(
+                f"Tidak ada artikel yang berhasil di-parse ({errors} error): tidak ada yang ditulis, "
+                f"{csv_file_path} dibiarkan seperti semula."
+            ))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Selesai! {sink.written} artikel ditulis ke {csv_file_path}, {errors} error, "
+            f"dalam {elapsed:.2f} detik ({len(entries) / elapsed if elapsed else 0:,.0f} halaman/detik). "
+            f"Tanpa konten: {missing['content']}, tanpa tanggal: {missing['publish_date_str']}."
+        ))
+        self.stdout.write("Jalankan 'populate_articles_from_csv --update-existing' untuk memperbarui database.")
@@ -1,155 +1,299 @@
 # news/management/commands/scrape_cnn.py
 
-import requests
-from bs4 import BeautifulSoup
-import time 
-import locale 
-from datetime import datetime
-from django.core.management.base import BaseCommand
-import csv 
-import os # Pastikan os diimport
+import locale
+import os
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from news import archive, frontier, pipeline, scraper
+from news.crawl_fixture import FixtureServer
+from news.crawler import Fetcher
+from news.importer import NEAR_DUPLICATE_MODES
+from news.models import CrawlUrl
+
 
 class Command(BaseCommand):
     help = 'Scrapes news articles from CNN Olahraga and saves them to news/articles/cnn_articles.csv'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--target', type=int, default=500, help='Jumlah artikel maksimum (default 500).')
+        parser.add_argument('--max-pages', type=int, default=4, help='Jumlah halaman indeks maksimum (default 4).')
+        parser.add_argument('--workers', type=int, default=8, help='Jumlah request bersamaan (default 8).')
+        parser.add_argument(
+            '--rate', type=float, default=4.0,
+            help='Batas request per detik per host, 0 = tanpa batas (default 4).'
+        )
+        parser.add_argument('--burst', type=float, default=None, help='Ukuran burst token bucket (default = rate).')
+        parser.add_argument('--retries', type=int, default=3, help='Jumlah retry untuk error koneksi/5xx (default 3).')
+        parser.add_argument(
+            '--output',
+            help='Path file CSV (default news/articles/cnn_articles.csv; dengan --to-db CSV hanya ditulis '
+                 'jika opsi ini diberikan).'
+        )
+        parser.add_argument(
+            '--to-db', action='store_true',
+            help='Simpan artikel langsung ke database secara streaming (per batch), tanpa lewat CSV.'
+        )
+        parser.add_argument('--batch-size', type=int, default=50, help='Dengan --to-db: artikel per batch (default 50).')
+        parser.add_argument(
+            '--update-existing', action='store_true',
+            help='Dengan --to-db: perbarui artikel yang judulnya sudah ada.'
+        )
+        parser.add_argument(
+            '--near-duplicates', choices=NEAR_DUPLICATE_MODES, default='skip',
+            help='Dengan --to-db: artikel yang isinya hampir sama dengan artikel lain di-skip (default), '
+                 'di-flag, atau tidak dicek (off).'
+        )
+        parser.add_argument(
+            '--queue-size', type=int, default=pipeline.DEFAULT_QUEUE_SIZE,
+            help=f'Ukuran antrean antar tahap pipeline (default {pipeline.DEFAULT_QUEUE_SIZE}).'
+        )
+        parser.add_argument(
+            '--base-url', default=scraper.BASE_URL,
+            help=f'Origin yang di-crawl (default {scraper.BASE_URL}).'
+        )
+        parser.add_argument(
+            '--incremental', action='store_true',
+            help='Hanya ambil artikel baru (frontier persisten di database). Paging berhenti di artikel '
+                 'yang sudah dikenal dan baris baru ditambahkan di akhir CSV, bukan menimpa.'
+        )
+        parser.add_argument(
+            '--recheck', type=int, default=0,
+            help='Dengan --incremental: crawl ulang N artikel lama dengan conditional request '
+                 '(If-None-Match/If-Modified-Since); yang tidak berubah dilewati.'
+        )
+        parser.add_argument(
+            '--archive', dest='archive_dir',
+            help='Direktori arsip HTML mentah (default SCRAPER_ARCHIVE_DIR / media/scrape_archive). '
+                 'Halaman di arsip bisa di-parse ulang dengan "reparse_archive".'
+        )
+        parser.add_argument('--no-archive', action='store_true', help='Jangan simpan HTML mentah ke arsip.')
+        parser.add_argument(
+            '--benchmark', action='store_true',
+            help='Crawl server fixture lokal (tanpa internet) dan laporkan throughput. '
+                 'CSV/arsip hanya ditulis jika --output/--archive diberikan.'
+        )
+        parser.add_argument('--benchmark-latency', type=float, default=0.05,
+                            help='Latensi per response server fixture dalam detik (default 0.05).')
+
     def handle(self, *args, **options):
-        self.stdout.write(self.style.NOTICE('Memulai scraping CNN Indonesia Olahraga ke CSV...'))
-        HEADERS = {
-           'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
-        BASE_URL = "https://www.cnnindonesia.com"; INDEX_BASE_URL = f"{BASE_URL}/olahraga/indeks/7"
-        TOTAL_ARTICLES_TARGET = 500; all_article_elements = []; current_page = 1; max_pages_to_try = 4
-        
-        try: locale.setlocale(locale.LC_TIME, 'id_ID.UTF-8') 
-        except locale.Error: self.stderr.write(self.style.WARNING("Gagal set locale 'id_ID.UTF-8'."))
-        
-        self.stdout.write(f"Target: {TOTAL_ARTICLES_TARGET} artikel dari max {max_pages_to_try} halaman...")
-        # ... (Loop while pagination - TIDAK BERUBAH) ...
-        while len(all_article_elements) < TOTAL_ARTICLES_TARGET and current_page <= max_pages_to_try:
-            # ... (kode get halaman list, find container, find articles) ...
-            if current_page == 1: paginated_url = INDEX_BASE_URL
-            else: paginated_url = f"{INDEX_BASE_URL}?page={current_page}"
-            # self.stdout.write(f"\nMengambil: {paginated_url}")
-            try: list_page = requests.get(paginated_url, headers=HEADERS, timeout=15); list_page.raise_for_status()
-            except requests.RequestException as e: self.stderr.write(self.style.ERROR(f' Gagal: {e}. Stop.')); break 
-            list_soup = BeautifulSoup(list_page.content, "html.parser")
-            list_container = list_soup.find("div", class_="flex flex-col gap-5") 
-            if not list_container: self.stderr.write(self.style.WARNING(f" No container di hal {current_page}. Stop.")); break 
-            page_article_elements = list_container.find_all("article")
-            if not page_article_elements: self.stdout.write(self.style.WARNING(f" No <article> di hal {current_page}. Stop.")); break 
-            self.stdout.write(f" > Hal {current_page}: Ditemukan {len(page_article_elements)} artikel.")
-            all_article_elements.extend(page_article_elements)
-            if len(all_article_elements) >= TOTAL_ARTICLES_TARGET: self.stdout.write(f" > Target tercapai."); break
-            current_page += 1
-            if len(all_article_elements) < TOTAL_ARTICLES_TARGET: time.sleep(1) # Jeda lebih singkat
-
-        articles_to_process = all_article_elements[:TOTAL_ARTICLES_TARGET]
-        self.stdout.write(f"\nTotal artikel yang akan diproses ke CSV: {len(articles_to_process)}.")
-        
-        processed_count, skipped_count = 0, 0
-        scraped_data_list = [] 
-        
-        # --- Loop Pemrosesan Artikel ---
-        for article_element in articles_to_process: 
-            processed_count += 1
-            
-            try:
-                # ... (Ambil link, title, thumbnail_small) ...
-                link_element = article_element.find("a")
-                if not (link_element and link_element.has_attr('href')): skipped_count += 1; continue
-                link_relative = link_element['href']
-                link_absolute = f"{BASE_URL}{link_relative}" if not link_relative.startswith('http') else link_relative
-                title_tag = link_element.find("h2"); list_img_tag = link_element.find("img")
-                if not title_tag: skipped_count += 1; continue
-                title = title_tag.text.strip()
-                thumbnail_small = list_img_tag['src'] if list_img_tag and list_img_tag.has_attr('src') else None
-                
-                # ... (Filter judul) ...
-                title_lower = title.lower()
-                if title_lower.startswith(("video:", "foto:", "link", "infografis:")): skipped_count += 1; continue
-                
-                
-                time.sleep(0.5) # Jeda lebih singkat
-                
-                try:
-                    detail_page = requests.get(link_absolute, headers=HEADERS, timeout=15)
-                    detail_page.raise_for_status()
-                    detail_soup = BeautifulSoup(detail_page.content, "html.parser")
-                except requests.RequestException as e: skipped_count += 1; self.stderr.write(self.style.ERROR(f"  > Gagal detail: {e}")); continue 
-
-                # ... (Ambil Gambar - SAMA) ...
-                image_container = detail_soup.find("div", class_="detail-image")
-                thumbnail_large = None
-                if image_container: img_tag_detail = image_container.find("img"); thumbnail_large = img_tag_detail['src'] if img_tag_detail and img_tag_detail.has_attr('src') else None
-                thumbnail_to_save = thumbnail_large if thumbnail_large else thumbnail_small
-
-                # ... (Ambil Tanggal String - SAMA) ...
-                publish_date_str = "" 
-                date_div = detail_soup.find("div", class_="text-cnn_grey text-sm mb-4")
-                if date_div: publish_date_str = date_div.text.strip()
-                
-                # ... (Ambil Konten - SAMA) ...
-                content_div = detail_soup.find("div", class_="detail-text")
-                if not content_div: content = "" # String kosong jika gagal
-                else: 
-                    paragraphs = content_div.find_all("p")
-                    content_lines = [ p.text.strip() for p in paragraphs if not p.find('a', class_="embed") and p.text.strip()]
-                    content = "\n\n".join(content_lines)
-                    content = content.replace("ADVERTISEMENT", "").replace("SCROLL TO CONTINUE WITH CONTENT", "")
-                    content = "\n".join([line for line in content.splitlines() if line.strip()]) 
-                
-                # ... (Deteksi Kategori - SAMA) ...
-                detected_category = "olahraga lain"; valid_categories_temp = ['sepakbola', 'f1', 'moto gp', 'raket', 'olahraga lain']
-                breadcrumb = detail_soup.find("a", class_="gtm_breadcrumb_subkanal"); is_olahraga_lain = False
-                if breadcrumb and "Olahraga Lainnya" in breadcrumb.text: detected_category = "olahraga lain"; is_olahraga_lain = True
-                if not is_olahraga_lain:
-                    subkanal_meta = detail_soup.find("meta", {"name": "subkanal"})
-                    if subkanal_meta and subkanal_meta.has_attr('content'): sc = subkanal_meta['content'].lower(); 
-                    if sc == "sepakbola": detected_category = "sepakbola"
-                    elif sc == "raket": detected_category = "raket"
-                if detected_category == "olahraga lain":
-                    dtk_kw = detail_soup.find("meta", {"name": "dtk:keywords"}); kw = detail_soup.find("meta", {"name": "keywords"})
-                    if dtk_kw and dtk_kw.has_attr('content') and "motogp" in dtk_kw['content'].lower(): detected_category = "moto gp"
-                    if detected_category == "olahraga lain" and kw and kw.has_attr('content') and "f1" in kw['content'].lower(): detected_category = "f1"
-                
-                # --- Tambahkan data ke list ---
-                scraped_data_list.append({
-                    'title': title, 'content': content,
-                    'thumbnail': thumbnail_to_save if thumbnail_to_save else "", 
-                    'category': detected_category, 'publish_date_str': publish_date_str,
-                    'author_username': 'CNN Indonesia' 
-                })
-                self.stdout.write(f"  + {title[:40]}...") # Konfirmasi data ditambahkan
-
-            except Exception as e: 
-                self.stderr.write(self.style.ERROR(f"  > ERROR proses item {link_absolute}: {e}"))
-                skipped_count += 1; continue
-        
-        if scraped_data_list:
+        self.archive = None
+        # (CrawlUrl, FetchResult, judul) yang barisnya sudah dikirim ke sink tapi belum dicatat di frontier
+        self.unsettled = []
+        if options['benchmark']:
+            options['no_archive'] = options['no_archive'] or not options['archive_dir']
+            sinks = self.open_sinks(options, default_csv=False)
+            with FixtureServer(articles=options['target'], latency=options['benchmark_latency']) as server:
+                self.stdout.write(self.style.NOTICE(f'Benchmark crawler terhadap {server.base_url}...'))
+                count, stats = self.crawl(server.base_url, options, sinks)
+            self.stdout.write(self.style.SUCCESS(
+                f"\nBenchmark: {stats.pages} halaman dalam {stats.elapsed:.2f} detik "
+                f"({stats.pages_per_second:,.1f} halaman/detik, {options['workers']} worker, "
+                f"rate {options['rate'] or 'tanpa batas'}/detik). "
+                f"{stats.retries} retry, {stats.failed} gagal, {stats.bytes / 1024:,.0f} KB."
+            ))
+            return
+
+        self.stdout.write(self.style.NOTICE('Memulai scraping CNN Indonesia Olahraga...'))
+        try:
+            locale.setlocale(locale.LC_TIME, 'id_ID.UTF-8')
+        except locale.Error:
+            self.stderr.write(self.style.WARNING("Gagal set locale 'id_ID.UTF-8'."))
+
+        sinks = self.open_sinks(options, default_csv=not options['to_db'])
+        count, stats = self.crawl(options['base_url'], options, sinks)
+        if not count:
+            self.stdout.write(self.style.WARNING("Tidak ada data baru untuk disimpan."))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"\nSelesai! {count} artikel, {stats.not_modified} tidak berubah (304), {stats.failed} gagal, "
+            f"{stats.pages} halaman dalam {stats.elapsed:.1f} detik ({stats.pages_per_second:.1f} halaman/detik)."
+        ))
+
+    def open_sinks(self, options, default_csv):
+        sinks = []
+        if options['to_db']:
             try:
-                # Dapatkan path root app 'news'
-                # (__file__ -> scrape_cnn.py -> commands -> management -> news)
-                app_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-                # Tentukan path folder 'articles' di dalam app 'news'
-                articles_dir = os.path.join(app_dir, 'articles')
-                # Buat folder jika belum ada
-                os.makedirs(articles_dir, exist_ok=True) 
-                # Tentukan path file CSV di dalam folder 'articles'
-                csv_file_path = os.path.join(articles_dir, 'cnn_articles.csv')
-
-                fieldnames = ['title', 'content', 'thumbnail', 'category', 'publish_date_str', 'author_username']
-                
-                self.stdout.write(f"\nMenulis {len(scraped_data_list)} artikel ke {csv_file_path}...")
-                with open(csv_file_path, 'w', newline='', encoding='utf-8') as csvfile:
-                    writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                    writer.writeheader() 
-                    writer.writerows(scraped_data_list) 
-                    
-                self.stdout.write(self.style.SUCCESS(f"Berhasil menyimpan data ke {csv_file_path}"))
-            except IOError as e: self.stderr.write(self.style.ERROR(f"Gagal menulis CSV: {e}"))
-            except Exception as e: self.stderr.write(self.style.ERROR(f"Error tak terduga saat tulis CSV: {e}"))
-        else: self.stdout.write(self.style.WARNING("Tidak ada data untuk disimpan ke CSV."))
-        # ----------------------------------------
-
-        self.stdout.write(self.style.SUCCESS(f"\nSelesai! {len(scraped_data_list)} data siap ditulis, {skipped_count} dilewati, {processed_count} diproses."))
\ No newline at end of file
+                author = User.objects.get(username=scraper.AUTHOR_USERNAME)
+            except User.DoesNotExist:
+                raise CommandError(f'User "{scraper.AUTHOR_USERNAME}" tidak ditemukan di database. Buat dulu.')
+
+            def on_error(line_no, message):
+                self.stderr.write(self.style.ERROR(f" {message}"))
+
+            def on_warning(line_no, message):
+                self.stderr.write(self.style.WARNING(f" {message}"))
+
+            def on_batch(stats):
+                self.stdout.write(f"  {stats.added} baru, {stats.updated} diperbarui, {stats.skipped} duplikat")
+
+            sinks.append(pipeline.ArticleSink(
+                author, batch_size=options['batch_size'], update_existing=options['update_existing'],
+                near_duplicates=options['near_duplicates'],
+                on_error=on_error, on_warning=on_warning, on_batch=on_batch, on_flush=self.settle_frontier,
+            ))
+
+        csv_file_path = options['output']
+        if not csv_file_path and default_csv:
+            # (__file__ -> scrape_cnn.py -> commands -> management -> news)
+            app_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+            articles_dir = os.path.join(app_dir, 'articles')
+            os.makedirs(articles_dir, exist_ok=True)
+            csv_file_path = os.path.join(articles_dir, 'cnn_articles.csv')
+        if csv_file_path:
+            sinks.append(pipeline.CsvSink(csv_file_path, append=options['incremental']))
+        return sinks
+
+    def settle_frontier(self, rejected=frozenset()):
+        """Catat URL yang barisnya sudah tersimpan di sink; yang ditolak database ditandai gagal."""
+        for entry, result, title in self.unsettled:
+            if title in rejected:
+                frontier.fail(entry)
+            else:
+                frontier.record(entry, result)
+        self.unsettled = []
+
+    def close_sinks(self, sinks):
+        for sink in sinks:
+            result = sink.close()
+            if isinstance(sink, pipeline.CsvSink) and sink.written:
+                verb = "ditambahkan ke" if sink.append else "ditulis ke"
+                self.stdout.write(self.style.SUCCESS(f"{sink.written} artikel {verb} {sink.path}"))
+            elif isinstance(sink, pipeline.ArticleSink):
+                self.stdout.write(self.style.SUCCESS(
+                    f"Database: {result.added} artikel baru, {result.updated} diperbarui, "
+                    f"{result.skipped} duplikat ({result.near_duplicates} hampir sama), {result.errors} error."
+                ))
+        # Baris yang dilewati importer (duplikat) tidak memicu flush lagi: tetap selesai
+        self.settle_frontier()
+
+    def crawl(self, base_url, options, sinks):
+        """Return ``(jumlah artikel, FetchStats)``; setiap artikel langsung diteruskan ke ``sinks``."""
+        fetcher = Fetcher(
+            workers=options['workers'], rate=options['rate'], burst=options['burst'],
+            retries=options['retries'],
+        )
+        if not options['no_archive']:
+            self.archive = archive.ArchiveWriter(options['archive_dir'])
+        try:
+            with fetcher:
+                self.stdout.write(f"Target: {options['target']} artikel dari max {options['max_pages']} halaman...")
+                if options['incremental']:
+                    count = self.crawl_incremental(fetcher, base_url, options, sinks)
+                else:
+                    items = self.walk_index(fetcher, base_url, options)[:options['target']]
+                    self.stdout.write(f"\nTotal artikel yang akan diproses: {len(items)}.")
+                    count = self.fetch_details(fetcher, items, options, sinks)
+        finally:
+            # Sisa batch tetap disimpan walau crawl berhenti karena error
+            self.close_sinks(sinks)
+            if self.archive:
+                self.stdout.write(f"{self.archive.written} halaman diarsipkan di {self.archive.directory}.")
+                self.archive.close()
+        return count, fetcher.stats
+
+    def fetch_index_page(self, fetcher, base_url, page, headers=None):
+        """Return ``(FetchResult, items)``; items None jika paging harus berhenti."""
+        result = fetcher.fetch(scraper.index_page_url(page, base_url), headers)
+        if result.not_modified:
+            self.stdout.write(f" > Hal {page}: tidak berubah sejak crawl sebelumnya.")
+            return result, None
+        if not result.ok:
+            self.stderr.write(self.style.ERROR(f' Gagal: {result.error}. Stop.'))
+            return result, None
+        if self.archive:
+            self.archive.write(result, kind=archive.KIND_INDEX)
+        page_items = scraper.parse_index_page(result.content, base_url)
+        if page_items is None:
+            self.stderr.write(self.style.WARNING(f" No container di hal {page}. Stop."))
+            return result, None
+        if not page_items:
+            self.stdout.write(self.style.WARNING(f" No <article> di hal {page}. Stop."))
+            return result, None
+        self.stdout.write(f" > Hal {page}: Ditemukan {len(page_items)} artikel.")
+        return result, page_items
+
+    def walk_index(self, fetcher, base_url, options):
+        # Halaman indeks diambil berurutan: berhenti begitu halaman kosong / target tercapai
+        items = []
+        for page in range(1, options['max_pages'] + 1):
+            _, page_items = self.fetch_index_page(fetcher, base_url, page)
+            if page_items is None:
+                break
+            items.extend(page_items)
+            if len(items) >= options['target']:
+                break
+        return items
+
+    def crawl_incremental(self, fetcher, base_url, options, sinks):
+        discovered = 0
+        for page in range(1, options['max_pages'] + 1):
+            entry = frontier.get_entry(scraper.index_page_url(page, base_url))
+            result, page_items = self.fetch_index_page(
+                fetcher, base_url, page, frontier.conditional_headers(entry)
+            )
+            if page_items is None:
+                if result.not_modified:
+                    frontier.record(entry, result, kind=CrawlUrl.KIND_INDEX)
+                break
+            known = frontier.known(page_items)
+            new_items = [item for item in page_items if item.url not in known]
+            frontier.discover(new_items)
+            # Validator halaman indeks baru disimpan setelah artikelnya masuk frontier
+            frontier.record(entry, result, kind=CrawlUrl.KIND_INDEX)
+            discovered += len(new_items)
+            if known:
+                self.stdout.write(f" > Hal {page}: sampai di artikel yang sudah dikenal. Stop.")
+                break
+            if discovered >= options['target']:
+                break
+
+        # Antrean: artikel baru + sisa run sebelumnya yang belum berhasil, lalu re-crawl
+        entries = frontier.pending(options['target'])
+        entries += frontier.stale(options['recheck']) if options['recheck'] else []
+        self.stdout.write(
+            f"\n{discovered} artikel baru ditemukan, {len(entries)} URL di antrean frontier."
+        )
+        items = [scraper.IndexItem(e.url, e.title, e.thumbnail or None) for e in entries]
+        headers = {e.url: frontier.conditional_headers(e) for e in entries}
+        return self.fetch_details(fetcher, items, options, sinks, headers=headers, entries=entries)
+
+    def fetch_details(self, fetcher, items, options, sinks, headers=None, entries=None):
+        """
+        Pipeline fetch -> parse -> sinks. Paling banyak ``2 * workers`` request
+        in-flight dan ``queue_size`` halaman menunggu di-parse / disimpan.
+        """
+        count = 0
+        results = fetcher.fetch_all((item.url for item in items), headers, window=fetcher.workers * 2)
+        parsed = pipeline.buffered(pipeline.parse_results(items, results), options['queue_size'])
+        # Hasil keluar sesuai urutan indeks walau di-fetch paralel
+        # URL baru dicatat "done" setelah barisnya tersimpan: langsung untuk CSV,
+        # setelah flush batch (on_flush) untuk ArticleSink
+        batched = any(isinstance(sink, pipeline.ArticleSink) for sink in sinks)
+        for n, (item, result, row, error) in enumerate(parsed):
+            entry = entries[n] if entries is not None else None
+            if result.not_modified or not result.ok:
+                if entry is not None:
+                    frontier.record(entry, result)
+                if not result.not_modified:
+                    self.stderr.write(self.style.ERROR(f"  > Gagal detail {item.url}: {result.error}"))
+                continue
+            if self.archive:
+                self.archive.write(result, title=item.title, thumbnail=item.thumbnail)
+            if error:
+                if entry is not None:
+                    frontier.fail(entry)
+                self.stderr.write(self.style.ERROR(f"  > ERROR proses item {item.url}: {error}"))
+                continue
+            if entry is not None:
+                # Didaftarkan sebelum write: baris ini bisa langsung ikut flush batch
+                self.unsettled.append((entry, result, (row.get('title') or '').strip()))
+            for sink in sinks:
+                sink.write(row)
+            if not batched:
+                self.settle_frontier()
+            count += 1
+            if options['verbosity'] >= 2:
+                self.stdout.write(f"  + {item.title[:40]}...")
+        return count
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from news import trending
+
+
+class Command(BaseCommand):
+    help = (
+        'Memperbarui skor trending artikel yang punya views/komentar baru. '
+        'Jalankan berkala (mis. cron tiap 5 menit).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Jumlah artikel yang dihitung per batch (default 500).'
+        )
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Bangun ulang semua skor dari awal (mis. setelah half-life diganti).'
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        updated = trending.refresh(full=options['full'], batch_size=options['batch_size'])
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f"Selesai! {updated} skor trending diperbarui ({elapsed:.2f} detik)."))
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:00
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0006_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CrawlUrl',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.CharField(max_length=500, unique=True)),
+                ('kind', models.CharField(choices=[('article', 'Article'), ('index', 'Index')], default='article', max_length=10)),
+                ('title', models.CharField(blank=True, max_length=255)),
+                ('thumbnail', models.CharField(blank=True, max_length=500)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('etag', models.CharField(blank=True, max_length=255)),
+                ('last_modified', models.CharField(blank=True, max_length=64)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('discovered_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('fetched_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'status', 'discovered_at'], name='news_crawlurl_queue_idx')],
+            },
+        ),
+    ]
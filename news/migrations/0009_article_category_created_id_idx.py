@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0008_article_fingerprint'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='article',
+            name='news_article_cat_created_idx',
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['category', '-created_at', '-id'], name='news_article_cat_created_idx'),
+        ),
+    ]
@@ -1,7 +1,6 @@
 import uuid
 from django.db import models
 from django.contrib.auth.models import User
-from django.db.models import F
 from django.urls import reverse
 from django.utils import timezone
 
@@ -37,6 +36,14 @@ class Article(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination show_json: ORDER BY created_at DESC, id DESC
+            models.Index(fields=['-created_at', '-id'], name='news_article_created_id_idx'),
+            # ArticleListView/grid ?category=: WHERE category = ? ORDER BY created_at DESC, id DESC
+            models.Index(fields=['category', '-created_at', '-id'], name='news_article_cat_created_idx'),
+            # Urutan berdasarkan views (artikel terpopuler)
+            models.Index(fields=['-news_views'], name='news_article_views_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -49,6 +56,138 @@ class Article(models.Model):
         return (timezone.now() - self.created_at).days <= 2 and self.news_views > 10
         
     def increment_views(self):
-        self.news_views = F('news_views') + 1
-        self.save(update_fields=['news_views'])
-        self.refresh_from_db()
\ No newline at end of file
+        # Write-behind: hit dicatat di buffer view counter, ditulis ke DB saat flush
+        from .view_counter import record_view
+        record_view(self)
+
+class FeedVersion(models.Model):
+    """
+    Counter versi per feed JSON (news, event, ticketing) dan per forum artikel ("forum:<article_id>").
+    Dinaikkan oleh signal model (lihat news/feed_versions.py) dan dipakai
+    untuk ETag/Last-Modified tanpa perlu men-serialize payload.
+    """
+    key = models.CharField(max_length=50, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.key} v{self.version}"
+
+
+class SearchDocument(models.Model):
+    """Statistik dokumen untuk BM25 (satu baris per Article yang terindeks)."""
+    article = models.OneToOneField(Article, on_delete=models.CASCADE, primary_key=True, related_name='search_document')
+    length = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.article_id} ({self.length} token)"
+
+
+class SearchPosting(models.Model):
+    """Inverted index: satu baris per (term, dokumen). ``tf`` sudah diberi bobot judul."""
+    document = models.ForeignKey(SearchDocument, on_delete=models.CASCADE, related_name='postings')
+    term = models.CharField(max_length=64)
+    tf = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('term', 'document')
+
+    def __str__(self):
+        return f"{self.term} -> {self.document_id} ({self.tf})"
+
+
+class TrendingScore(models.Model):
+    """
+    Skor trending per Article (lihat news/trending.py). ``score`` disimpan
+    dalam bentuk log2 "forward decay" terhadap epoch tetap, jadi urutannya
+    tidak berubah seiring waktu dan hanya artikel dengan aktivitas baru yang
+    perlu dihitung ulang.
+    """
+    article = models.OneToOneField(Article, on_delete=models.CASCADE, primary_key=True, related_name='trending')
+    score = models.FloatField(default=0.0)
+    # Jumlah views/komentar yang sudah masuk ke score
+    views_seen = models.PositiveIntegerField(default=0)
+    comments_seen = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # Top-N trending: ORDER BY score DESC, article_id DESC LIMIT n
+            models.Index(fields=['-score', '-article'], name='news_trending_score_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.article_id} ({self.score:.3f})"
+
+
+class CrawlUrl(models.Model):
+    """
+    Frontier + seen-URL store crawler ``scrape_cnn --incremental``. Setiap URL
+    detail artikel yang pernah ditemukan di halaman indeks punya satu baris;
+    validator ``etag``/``last_modified`` dipakai untuk conditional request
+    saat URL di-crawl ulang (halaman indeks juga dicatat, ``kind='index'``).
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    KIND_ARTICLE = 'article'
+    KIND_INDEX = 'index'
+    KIND_CHOICES = [
+        (KIND_ARTICLE, 'Article'),
+        (KIND_INDEX, 'Index'),
+    ]
+
+    url = models.CharField(max_length=500, unique=True)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, default=KIND_ARTICLE)
+    title = models.CharField(max_length=255, blank=True)
+    thumbnail = models.CharField(max_length=500, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    etag = models.CharField(max_length=255, blank=True)
+    last_modified = models.CharField(max_length=64, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    discovered_at = models.DateTimeField(default=timezone.now)
+    fetched_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Antrean frontier: WHERE kind = ... AND status IN (...) ORDER BY discovered_at
+            models.Index(fields=['kind', 'status', 'discovered_at'], name='news_crawlurl_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.url} ({self.status})"
+
+
+class ArticleFingerprint(models.Model):
+    """
+    Signature MinHash isi Article untuk deteksi artikel yang hampir sama
+    (lihat news/fingerprint.py). Kandidat dicari lewat ``ArticleFingerprintBand``
+    (LSH), signature dipakai untuk menghitung kemiripan kandidat.
+    """
+    article = models.OneToOneField(Article, on_delete=models.CASCADE, primary_key=True, related_name='fingerprint')
+    # fingerprint.NUM_PERM nilai minimum 32-bit (little-endian)
+    signature = models.BinaryField()
+    # Artikel lama yang paling mirip saat artikel ini masuk (ditandai, tidak dihapus)
+    duplicate_of = models.ForeignKey(
+        Article, on_delete=models.SET_NULL, null=True, blank=True, related_name='near_duplicates'
+    )
+
+    def __str__(self):
+        return f"Fingerprint {self.article_id}"
+
+
+class ArticleFingerprintBand(models.Model):
+    """Satu band LSH: hash dari potongan signature. Artikel dengan key yang sama adalah kandidat."""
+    fingerprint = models.ForeignKey(ArticleFingerprint, on_delete=models.CASCADE, related_name='bands')
+    key = models.BigIntegerField()
+
+    class Meta:
+        indexes = [models.Index(fields=['key'], name='news_fp_band_key_idx')]
+
+    def __str__(self):
+        return f"{self.fingerprint_id} {self.key}"
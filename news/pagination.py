@@ -0,0 +1,43 @@
+"""
+Helper untuk keyset (cursor) pagination.
+
+Cursor adalah list nilai kolom urutan dari baris terakhir di halaman
+sebelumnya, di-encode sebagai JSON lalu base64 (url-safe) supaya bisa
+langsung dipakai di query string (``?after=...``).
+"""
+import base64
+import binascii
+import json
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values):
+    raw = json.dumps([str(v) if not isinstance(v, (int, float)) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, size):
+    """Decode cursor menjadi list berisi ``size`` nilai; raise InvalidCursor jika rusak."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursor("Cursor tidak valid")
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor("Cursor tidak valid")
+    return values
+
+
+def parse_limit(value, default=DEFAULT_LIMIT, maximum=MAX_LIMIT):
+    """Parse ``?limit=``; nilai kosong/rusak jatuh ke default, dibatasi ``maximum``."""
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(limit, maximum))
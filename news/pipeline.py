@@ -0,0 +1,125 @@
+"""
+Pipeline streaming scraper -> database (``scrape_cnn --to-db``).
+
+    fetch (thread pool, paling banyak ``window`` request in-flight)
+      -> parse (thread sendiri, antrean ``queue_size``)
+      -> normalise tanggal/kategori + dedupe + batch upsert (``ArticleImporter``)
+      -> sink opsional: CSV
+
+Setiap tahap dihubungkan generator/antrean berukuran tetap, jadi memori
+konstan berapa pun jumlah artikelnya, dan artikel sudah tersimpan (dan
+terlihat di situs) per batch selama crawl berjalan; crash di tengah jalan
+hanya kehilangan batch yang belum di-flush.
+"""
+import csv
+import os
+import queue
+import threading
+
+from . import scraper
+from .importer import ArticleImporter
+
+DEFAULT_QUEUE_SIZE = 64
+_DONE = object()
+
+
+class _Failure:
+    def __init__(self, exc):
+        self.exc = exc
+
+
+def buffered(iterable, maxsize=DEFAULT_QUEUE_SIZE):
+    """
+    Jalankan ``iterable`` di thread sendiri dan yield hasilnya lewat antrean
+    berukuran ``maxsize`` (producer memblok jika antrean penuh). Exception
+    di producer di-raise ulang di consumer.
+    """
+    items = queue.Queue(maxsize)
+    stopped = threading.Event()
+
+    def put(item):
+        while not stopped.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+        except BaseException as e:
+            put(_Failure(e))
+        else:
+            put(_DONE)
+
+    thread = threading.Thread(target=produce, daemon=True, name='pipeline-stage')
+    thread.start()
+    try:
+        while True:
+            item = items.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failure):
+                raise item.exc
+            yield item
+    finally:
+        # Consumer berhenti lebih awal (break/exception): hentikan producer
+        stopped.set()
+        thread.join()
+
+
+def parse_results(items, results):
+    """Tahap parse: yield ``(item, FetchResult, row, error)`` sesuai urutan ``items``."""
+    for item, result in zip(items, results):
+        row = error = None
+        if result.ok:
+            try:
+                row = scraper.parse_detail_page(result.content, item)
+            except Exception as e:
+                error = str(e)
+        yield item, result, row, error
+
+
+class CsvSink:
+    """Tulis baris ke CSV begitu tiba (file baru dibuka saat baris pertama datang)."""
+
+    def __init__(self, path, append=False):
+        self.path = path
+        self.append = append
+        self.written = 0
+        self._file = None
+        self._writer = None
+
+    def write(self, row):
+        if self._file is None:
+            write_header = not (self.append and os.path.exists(self.path) and os.path.getsize(self.path))
+            self._file = open(self.path, 'a' if self.append else 'w', newline='', encoding='utf-8')
+            self._writer = csv.DictWriter(self._file, fieldnames=scraper.CSV_FIELDNAMES)
+            if write_header:
+                self._writer.writeheader()
+        self._writer.writerow(row)
+        # Baris yang sudah ditulis tidak hilang walau proses mati
+        self._file.flush()
+        self.written += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class ArticleSink:
+    """Normalise + dedupe + batch upsert ke ``Article`` lewat ``ArticleImporter``."""
+
+    def __init__(self, author, **importer_kwargs):
+        self.importer = ArticleImporter(author, **importer_kwargs)
+
+    def write(self, row):
+        self.importer.add_row(row)
+
+    def close(self):
+        return self.importer.finish()
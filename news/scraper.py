@@ -0,0 +1,127 @@
+"""
+Parser halaman CNN Indonesia Olahraga (halaman indeks & detail artikel).
+
+Murni parsing HTML -> dict, tanpa network; fetch dilakukan oleh
+``news.crawler.Fetcher`` di command ``scrape_cnn``.
+"""
+import csv
+import os
+from dataclasses import dataclass
+
+from bs4 import BeautifulSoup
+
+BASE_URL = "https://www.cnnindonesia.com"
+INDEX_PATH = "/olahraga/indeks/7"
+AUTHOR_USERNAME = 'CNN Indonesia'
+CSV_FIELDNAMES = ['title', 'content', 'thumbnail', 'category', 'publish_date_str', 'author_username']
+SKIPPED_TITLE_PREFIXES = ("video:", "foto:", "link", "infografis:")
+
+
+@dataclass
+class IndexItem:
+    url: str
+    title: str
+    thumbnail: str = None
+
+
+def index_page_url(page, base_url=BASE_URL):
+    url = f"{base_url}{INDEX_PATH}"
+    return url if page == 1 else f"{url}?page={page}"
+
+
+def parse_index_page(html, base_url=BASE_URL):
+    """
+    List IndexItem dari satu halaman indeks, atau None jika container daftar
+    artikel tidak ditemukan. Item tanpa link/judul dan konten non-artikel
+    (video, foto, infografis) dilewati.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    container = soup.find("div", class_="flex flex-col gap-5")
+    if not container:
+        return None
+    items = []
+    for element in container.find_all("article"):
+        link = element.find("a")
+        if not (link and link.has_attr('href')):
+            continue
+        title_tag = link.find("h2")
+        if not title_tag:
+            continue
+        title = title_tag.text.strip()
+        if title.lower().startswith(SKIPPED_TITLE_PREFIXES):
+            continue
+        href = link['href']
+        img = link.find("img")
+        items.append(IndexItem(
+            url=href if href.startswith('http') else f"{base_url}{href}",
+            title=title,
+            thumbnail=img['src'] if img and img.has_attr('src') else None,
+        ))
+    return items
+
+
+def _detect_category(soup):
+    breadcrumb = soup.find("a", class_="gtm_breadcrumb_subkanal")
+    if breadcrumb and "Olahraga Lainnya" in breadcrumb.text:
+        return "olahraga lain"
+
+    category = "olahraga lain"
+    subkanal = soup.find("meta", {"name": "subkanal"})
+    if subkanal and subkanal.has_attr('content'):
+        sc = subkanal['content'].lower()
+        if sc == "sepakbola":
+            category = "sepakbola"
+        elif sc == "raket":
+            category = "raket"
+    if category == "olahraga lain":
+        dtk_kw = soup.find("meta", {"name": "dtk:keywords"})
+        kw = soup.find("meta", {"name": "keywords"})
+        if dtk_kw and dtk_kw.has_attr('content') and "motogp" in dtk_kw['content'].lower():
+            category = "moto gp"
+        elif kw and kw.has_attr('content') and "f1" in kw['content'].lower():
+            category = "f1"
+    return category
+
+
+def _extract_content(soup):
+    content_div = soup.find("div", class_="detail-text")
+    if not content_div:
+        return ""
+    lines = [
+        p.text.strip() for p in content_div.find_all("p")
+        if not p.find('a', class_="embed") and p.text.strip()
+    ]
+    content = "\n\n".join(lines)
+    content = content.replace("ADVERTISEMENT", "").replace("SCROLL TO CONTINUE WITH CONTENT", "")
+    return "\n".join(line for line in content.splitlines() if line.strip())
+
+
+def parse_detail_page(html, item):
+    """Baris CSV (dict dengan ``CSV_FIELDNAMES``) dari halaman detail artikel."""
+    soup = BeautifulSoup(html, "html.parser")
+
+    thumbnail = None
+    image_container = soup.find("div", class_="detail-image")
+    if image_container:
+        img = image_container.find("img")
+        thumbnail = img['src'] if img and img.has_attr('src') else None
+
+    date_div = soup.find("div", class_="text-cnn_grey text-sm mb-4")
+    return {
+        'title': item.title,
+        'content': _extract_content(soup),
+        'thumbnail': thumbnail or item.thumbnail or "",
+        'category': _detect_category(soup),
+        'publish_date_str': date_div.text.strip() if date_div else "",
+        'author_username': AUTHOR_USERNAME,
+    }
+
+
+def write_csv(path, rows, append=False):
+    """Tulis ``rows`` ke CSV; dengan ``append`` baris ditambahkan di akhir file."""
+    write_header = not (append and os.path.exists(path) and os.path.getsize(path))
+    with open(path, 'a' if append else 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=CSV_FIELDNAMES)
+        if write_header:
+            writer.writeheader()
+        writer.writerows(rows)
@@ -0,0 +1,308 @@
+"""
+Pencarian full-text Article: inverted index + ranking BM25.
+
+Index disimpan di tabel ``SearchDocument`` (panjang dokumen) dan
+``SearchPosting`` (term -> dokumen, tf) sehingga jalan di SQLite maupun
+PostgreSQL tanpa service tambahan. Index diperbarui lewat signal
+post_save Article; baris index ikut terhapus (CASCADE) saat Article dihapus.
+Untuk data lama jalankan ``python manage.py rebuild_search_index``.
+
+Skor BM25 dihitung di database (SUM per dokumen) supaya hanya ``limit``
+baris teratas yang dibawa ke Python. Jumlah dokumen dan total panjang index
+(untuk idf dan panjang rata-rata) di-cache ``STATS_TTL`` detik dan dibuang
+setiap kali index ditulis atau Article dihapus, jadi pencarian tidak memindai
+seluruh ``SearchDocument``. Dengan cache per proses, worker lain memakai
+angka lama paling lama ``STATS_TTL`` detik (skor hanya bergeser sedikit).
+"""
+import math
+import re
+from collections import Counter
+from functools import lru_cache
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Case, Count, FloatField, Sum, Value, When
+from django.db.models.functions import Cast
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Article, SearchDocument, SearchPosting
+
+K1 = 1.2
+B = 0.75
+# tf token judul dikalikan bobot ini (judul lebih penting dari isi)
+TITLE_WEIGHT = 3
+MAX_TERM_LENGTH = 64
+SNIPPET_CHARS = 200
+STATS_CACHE_KEY = 'search:stats'
+STATS_TTL = 600
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+STOPWORDS = frozenset("""
+ada adalah agar akan aku anda antara apa atau bagi bahwa baik banyak bisa
+dalam dan dari dengan di dia hal hanya harus ia ini itu jadi jika juga kami
+kamu kata ke kita lagi lain lalu maka mereka masih namun oleh pada para saat
+saja sama sampai sangat satu saya se sebagai sebuah secara sedang sejak
+sekitar seperti serta setelah sudah telah tentang tersebut tetapi tidak untuk
+walau yaitu yakni yang
+""".split())
+
+_PARTICLES = ('lah', 'kah', 'tah', 'pun')
+_POSSESSIVES = ('nya', 'ku', 'mu')
+_SUFFIXES = ('kan', 'an', 'i')
+# Aturan prefiks (regex, pengganti) mengikuti peluluhan me-/pe- (mis. menendang
+# -> tendang, memakai -> pakai, menyapu -> sapu)
+def _prefix_rules(*rules):
+    return [(re.compile(pattern), replacement) for pattern, replacement in rules]
+
+
+_ME_PREFIXES = _prefix_rules(
+    (r'^meng(?=[aiueogkh])', ''), (r'^meny(?=[aiueo])', 's'),
+    (r'^men(?=[cdjtsz])', ''), (r'^men(?=[aiueo])', 't'),
+    (r'^mem(?=[bfvp])', ''), (r'^mem(?=[aiueo])', 'p'),
+    (r'^me(?=[lrwymn])', ''),
+)
+_PE_PREFIXES = _prefix_rules(
+    (r'^peng(?=[aiueogkh])', ''), (r'^peny(?=[aiueo])', 's'),
+    (r'^pen(?=[cdjtsz])', ''), (r'^pen(?=[aiueo])', 't'),
+    (r'^pem(?=[bfvp])', ''), (r'^pem(?=[aiueo])', 'p'),
+)
+_FIRST_PREFIXES = _ME_PREFIXES + _PE_PREFIXES + _prefix_rules((r'^di', ''), (r'^ter', ''), (r'^ke', ''))
+_SECOND_PREFIXES = _prefix_rules(
+    (r'^ber', ''), (r'^be(?=r)', ''), (r'^per', ''), (r'^pe(?=[lrwy])', ''),
+)
+# Prefiks yang bisa diikuti prefiks pe- (ke-pem-impin-an, ter-peng-aruh). Kombinasi
+# dengan me- tidak ada (ke-me-, di-me-), jadi me- setelahnya bagian dari kata dasar:
+# "kemenangan" -> "menang", bukan "tang" (bentrok dengan "tangan")
+_STACKING_PREFIXES = ('di', 'ke', 'ter')
+MIN_STEM = 3
+# Kata dasar minimal dua suku kata (dihitung dari huruf vokal): "menang" tidak
+# menjadi "tang" dan "tangan" tidak menjadi "tang"
+MIN_STEM_VOWELS = 2
+VOWEL_RE = re.compile(r'[aiueo]')
+
+
+def _is_stem(word):
+    return len(word) >= MIN_STEM and len(VOWEL_RE.findall(word)) >= MIN_STEM_VOWELS
+
+
+def _strip_suffix(word, suffixes):
+    for suffix in suffixes:
+        if word.endswith(suffix) and _is_stem(word[:-len(suffix)]):
+            return word[:-len(suffix)], True
+    return word, False
+
+
+def _strip_prefix(word, rules):
+    for pattern, replacement in rules:
+        stripped = pattern.sub(replacement, word, count=1)
+        if stripped != word and _is_stem(stripped):
+            return stripped, True
+    return word, False
+
+
+# Kosakata jauh lebih kecil dari jumlah token, jadi hasil stem di-cache
+@lru_cache(maxsize=100_000)
+def stem(word):
+    """
+    Stemmer ringan Bahasa Indonesia (turunan algoritma Tala): buang partikel,
+    kata ganti milik, prefiks, lalu sufiks derivasi. Tidak memakai kamus,
+    jadi hasilnya bukan kata dasar sempurna, tapi konsisten antara index
+    dan query (mis. "pertandingan"/"bertanding"/"tandingnya" -> "tanding").
+    """
+    if len(word) <= MIN_STEM or word.isdigit():
+        return word
+    word, _ = _strip_suffix(word, _PARTICLES)
+    word, _ = _strip_suffix(word, _POSSESSIVES)
+    stripped, removed = _strip_prefix(word, _FIRST_PREFIXES)
+    if removed and word.startswith(_STACKING_PREFIXES):
+        stripped, _ = _strip_prefix(stripped, _PE_PREFIXES)
+    # prefiks kedua bisa berdiri sendiri atau menempel setelah prefiks pertama (mem-per-)
+    word, _ = _strip_prefix(stripped, _SECOND_PREFIXES)
+    word, _ = _strip_suffix(word, _SUFFIXES)
+    return word
+
+
+def tokenize(text):
+    """Token mentah (lowercase) beserta posisinya di ``text``."""
+    for match in TOKEN_RE.finditer(text or ''):
+        yield match.group().lower(), match.start(), match.end()
+
+
+def analyze(text):
+    """List term (sudah di-stem, tanpa stopword) dari ``text``."""
+    terms = []
+    for token, _, _ in tokenize(text):
+        if token in STOPWORDS or token == '_':
+            continue
+        term = stem(token)[:MAX_TERM_LENGTH]
+        if term:
+            terms.append(term)
+    return terms
+
+
+def index_articles(articles, replace=True):
+    """
+    (Re)index banyak artikel sekaligus (dipakai juga oleh import CSV).
+    ``replace=False`` untuk artikel yang pasti belum punya index (baru dibuat).
+
+    Baris index ditulis dengan ``executemany`` langsung, bukan ``bulk_create``:
+    satu artikel bisa menghasilkan ratusan posting dan membuat instance model
+    untuk masing-masing mendominasi waktu import massal.
+    """
+    pk_field = SearchDocument._meta.pk
+    # Satu kali lewat ``articles`` (boleh generator / ``.iterator()``)
+    pks, documents, postings = [], [], []
+    for article in articles:
+        pks.append(article.pk)
+        counts = Counter()
+        title_terms = analyze(article.title)
+        content_terms = analyze(article.content)
+        for term in title_terms:
+            counts[term] += TITLE_WEIGHT
+        for term in content_terms:
+            counts[term] += 1
+        document_id = pk_field.get_db_prep_value(article.pk, connection)
+        documents.append((document_id, len(title_terms) * TITLE_WEIGHT + len(content_terms)))
+        postings.extend((document_id, term, tf) for term, tf in counts.items())
+
+    quote = connection.ops.quote_name
+    document_sql = 'INSERT INTO {} ({}, {}) VALUES (%s, %s)'.format(
+        quote(SearchDocument._meta.db_table), quote(pk_field.column),
+        quote(SearchDocument._meta.get_field('length').column),
+    )
+    posting_sql = 'INSERT INTO {} ({}, {}, {}) VALUES (%s, %s, %s)'.format(
+        quote(SearchPosting._meta.db_table), quote(SearchPosting._meta.get_field('document').column),
+        quote(SearchPosting._meta.get_field('term').column), quote(SearchPosting._meta.get_field('tf').column),
+    )
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Dibuang sekarang dan setelah commit (worker lain bisa mengisinya lagi di antaranya)
+        invalidate_stats()
+        transaction.on_commit(invalidate_stats)
+        if replace:
+            for start in range(0, len(pks), 500):
+                # Posting lama ikut terhapus (CASCADE)
+                SearchDocument.objects.filter(article_id__in=pks[start:start + 500]).delete()
+        cursor.executemany(document_sql, documents)
+        cursor.executemany(posting_sql, postings)
+
+
+def index_article(article):
+    """(Re)index satu artikel."""
+    index_articles([article])
+
+
+def update_index(sender, instance, update_fields=None, **kwargs):
+    """Receiver post_save Article: reindex hanya jika judul/isi mungkin berubah."""
+    if update_fields is not None and not {'title', 'content'} & set(update_fields):
+        return
+    index_article(instance)
+
+
+def get_stats():
+    """``(jumlah dokumen, total panjang)`` index, dari cache atau satu agregat."""
+    stats = cache.get(STATS_CACHE_KEY)
+    if stats is None:
+        row = SearchDocument.objects.aggregate(documents=Count('pk'), length=Sum('length'))
+        stats = (row['documents'], row['length'] or 0)
+        cache.set(STATS_CACHE_KEY, stats, STATS_TTL)
+    return stats
+
+
+def invalidate_stats(**kwargs):
+    """Buang statistik index yang di-cache (juga receiver post_delete Article)."""
+    cache.delete(STATS_CACHE_KEY)
+
+
+def search(query, limit=10, offset=0, queryset=None):
+    """
+    Return list ``(article, score)`` terurut BM25 menurun.
+    ``queryset`` opsional untuk membatasi artikel (mis. filter kategori).
+    """
+    terms = list(dict.fromkeys(analyze(query)))
+    if not terms:
+        return []
+
+    total_docs, total_length = get_stats()
+    if not total_docs:
+        return []
+    avgdl = total_length / total_docs or 1.0
+
+    doc_freqs = dict(
+        SearchPosting.objects.filter(term__in=terms)
+        .values('term').annotate(df=Count('id')).values_list('term', 'df')
+    )
+    if not doc_freqs:
+        return []
+    idf = {
+        term: math.log(1 + (total_docs - df + 0.5) / (df + 0.5))
+        for term, df in doc_freqs.items()
+    }
+
+    tf = Cast('tf', FloatField())
+    doc_length = Cast('document__length', FloatField())
+    term_idf = Case(
+        *[When(term=term, then=Value(weight)) for term, weight in idf.items()],
+        default=Value(0.0), output_field=FloatField(),
+    )
+    score = Sum(
+        term_idf * tf * Value(K1 + 1)
+        / (tf + Value(K1 * (1 - B)) + Value(K1 * B / avgdl) * doc_length),
+        output_field=FloatField(),
+    )
+
+    postings = SearchPosting.objects.filter(term__in=list(idf))
+    if queryset is not None:
+        postings = postings.filter(document__article__in=queryset.values('pk'))
+    ranked = list(
+        postings.values('document_id')
+        .annotate(score=score)
+        .order_by('-score', 'document_id')
+        .values_list('document_id', 'score')[offset:offset + limit]
+    )
+
+    articles = Article.objects.select_related('author').in_bulk([pk for pk, _ in ranked])
+    return [(articles[pk], score) for pk, score in ranked if pk in articles]
+
+
+def search_ids(query, limit=1000):
+    """pk artikel yang cocok dengan ``query`` (dipakai admin search)."""
+    return [article.pk for article, _ in search(query, limit=limit)]
+
+
+def highlight(text, query, max_chars=SNIPPET_CHARS):
+    """
+    Potongan ``text`` di sekitar kecocokan pertama dengan term query dibungkus
+    ``<mark>``. Hasil sudah di-escape dan aman dirender.
+    """
+    query_terms = set(analyze(query))
+    text = text or ''
+    matches = [
+        (start, end) for token, start, end in tokenize(text)
+        if token not in STOPWORDS and stem(token) in query_terms
+    ]
+
+    if matches:
+        first = matches[0][0]
+        begin = max(0, first - max_chars // 3)
+        # Mulai di awal kata
+        if begin:
+            space = text.rfind(' ', 0, begin)
+            begin = space + 1 if space != -1 else begin
+    else:
+        begin = 0
+    end = min(len(text), begin + max_chars)
+
+    parts = ['…' if begin else '']
+    cursor = begin
+    for start, stop in matches:
+        if start < begin or stop > end:
+            continue
+        parts.append(escape(text[cursor:start]))
+        parts.append('<mark>' + escape(text[start:stop]) + '</mark>')
+        cursor = stop
+    parts.append(escape(text[cursor:end]))
+    if end < len(text):
+        parts.append('…')
+    return mark_safe(''.join(parts))
@@ -0,0 +1,17 @@
+from django import template
+
+from news.thumbnails import DEFAULT_FORMAT, variant_url
+
+register = template.Library()
+
+
+@register.filter
+def thumbnail(source_url, spec):
+    """
+    URL varian thumbnail. Pemakaian: ``{{ article.thumbnail|thumbnail:640 }}``
+    atau ``{{ article.thumbnail|thumbnail:"640,webp" }}``.
+    """
+    if not source_url:
+        return ''
+    width, _, fmt = str(spec).partition(',')
+    return variant_url(source_url, int(width), fmt or DEFAULT_FORMAT)
@@ -1,14 +1,34 @@
+import csv
 import uuid
 import time
 import json
+import re
 from django.test import TestCase, Client
 from django.contrib.auth.models import User
 from django.urls import reverse
 from django.utils import timezone
 from datetime import timedelta, datetime
 from django.contrib import messages
-from .models import Article
+from .models import Article, ArticleFingerprint, CrawlUrl, FeedVersion, TrendingScore
+from . import view_counter
 from django.http import JsonResponse
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
+from io import StringIO
+from unittest import mock
+import os
+import shutil
+import tempfile
+import threading
+import requests
+from . import archive, fingerprint, grid_cache, image_proxy, pipeline, scraper, search, thumbnails, trending
+from .crawl_fixture import FixtureServer, fixture_category, fixture_title
+from .crawler import Fetcher, TokenBucket
+from io import BytesIO
+from django.core import signing
+from PIL import Image
 
 # --- Test 1: Model (Article) ---
 
@@ -83,6 +103,11 @@ class ArticleModelTest(TestCase):
         self.article.increment_views()
         self.assertEqual(self.article.news_views, initial_views + 2)
 
+        # Ditulis ke database saat buffer view counter di-flush
+        view_counter.flush_views()
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.news_views, initial_views + 2)
+
     def test_is_news_hot_property(self):
         """Test logika @property is_news_hot."""
         self.assertTrue(self.hot_article.is_news_hot)
@@ -191,6 +216,7 @@ class PublicViewsTest(TestCase):
         self.assertTemplateUsed(response, 'news/article_detail.html')
         self.assertEqual(response.context['article'], self.detail_article)
 
+        view_counter.flush_views()
         self.detail_article.refresh_from_db()
         self.assertEqual(self.detail_article.news_views, initial_views + 1)
 
@@ -385,3 +411,1513 @@ class ProtectedViewsTest(TestCase):
         messages_list = list(response.context['messages'])
         self.assertEqual(len(messages_list), 1)
         self.assertEqual(messages_list[0].level_tag, 'error')
+
+
+# --- Test 4: Write-behind View Counter ---
+
+class ViewCounterTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='viewer', password='password')
+        cls.article = Article.objects.create(title='Hot', content='...', author=cls.user, news_views=3)
+        cls.other = Article.objects.create(title='Other', content='...', author=cls.user)
+        cls.detail_url = reverse('news:article-detail', kwargs={'pk': cls.article.pk})
+
+    def setUp(self):
+        # Pastikan buffer bersih dari test lain, dan interval flush dihitung dari sekarang
+        # (bukan dari flush terakhir test sebelumnya)
+        view_counter.get_buffer().drain()
+        view_counter._last_flush = time.monotonic()
+
+    def test_detail_view_does_not_write(self):
+        """Halaman detail tidak menjalankan UPDATE di request path."""
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.detail_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(any(q['sql'].startswith('UPDATE') for q in ctx.captured_queries))
+        # View yang sedang dilihat sudah termasuk hit ini
+        self.assertEqual(response.context['article'].news_views, 4)
+
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.news_views, 3)
+
+    def test_flush_coalesces_hits(self):
+        """Hit yang terkumpul ditulis dengan satu UPDATE per kelompok jumlah hit."""
+        for _ in range(5):
+            view_counter.record_view(Article.objects.get(pk=self.article.pk))
+        for _ in range(5):
+            view_counter.record_view(Article.objects.get(pk=self.other.pk))
+
+        with CaptureQueriesContext(connection) as ctx:
+            written = view_counter.flush_views()
+        self.assertEqual(written, 10)
+        self.assertEqual(len([q for q in ctx.captured_queries if q['sql'].startswith('UPDATE "news_article"')]), 1)
+
+        self.article.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual(self.article.news_views, 8)
+        self.assertEqual(self.other.news_views, 5)
+        self.assertEqual(view_counter.flush_views(), 0)
+
+    def test_flush_after_max_hits(self):
+        """request_finished memicu flush setelah VIEW_COUNTER_FLUSH_HITS hit."""
+        with self.settings(VIEW_COUNTER_FLUSH_HITS=2, VIEW_COUNTER_FLUSH_INTERVAL=3600):
+            self.client.get(self.detail_url)
+            self.client.get(self.detail_url)
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.news_views, 5)
+
+    def test_cache_backend_and_reconcile_command(self):
+        """Counter di cache bersama dipindahkan ke database oleh reconcile_view_counts."""
+        with self.settings(VIEW_COUNTER_BACKEND='cache', VIEW_COUNTER_FLUSH_HITS=1000, VIEW_COUNTER_FLUSH_INTERVAL=3600):
+            view_counter.get_buffer().drain()
+            self.client.get(self.detail_url)
+            self.client.get(self.detail_url)
+            # Simulasikan worker yang mati sebelum sempat flush
+            view_counter.get_buffer()._dirty.clear()
+
+            out = StringIO()
+            with CaptureQueriesContext(connection) as ctx:
+                call_command('reconcile_view_counts', stdout=out)
+        self.assertIn('2 view', out.getvalue())
+        # Hanya key dari jurnal dirty yang dibaca, tanpa memindai semua pk
+        self.assertFalse([q for q in ctx.captured_queries if q['sql'].startswith('SELECT')])
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.news_views, 5)
+
+    def test_cache_backend_rejournals_hits_during_drain(self):
+        """Hit yang masuk selama drain tetap ditemukan reconcile_view_counts."""
+        with self.settings(VIEW_COUNTER_BACKEND='cache', VIEW_COUNTER_FLUSH_HITS=1000, VIEW_COUNTER_FLUSH_INTERVAL=3600):
+            buffer = view_counter.get_buffer()
+            buffer.drain()
+            list(view_counter.dirty_batches())
+            label, pk = 'news.article', str(self.other.pk)
+            buffer.record(label, pk, 2)
+            real_decr = view_counter.cache.decr
+
+            def decr_with_hit(key, amount):
+                # Hit dari worker lain di antara get_many() dan decr()
+                view_counter.cache.incr(key, 1)
+                return real_decr(key, amount)
+
+            with mock.patch.object(view_counter.cache, 'decr', side_effect=decr_with_hit):
+                self.assertEqual(buffer.drain(), {(label, pk): 2})
+            self.assertEqual(list(view_counter.dirty_batches()), [[(label, pk)]])
+            buffer.drain([(label, pk)])
+
+
+# --- Test 5: Cursor Pagination show_json ---
+
+class ShowJsonPaginationTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='jsonuser', password='password')
+        now = timezone.now()
+        for i in range(5):
+            Article.objects.create(
+                title=f'JSON {i}', content='...', author=cls.user,
+                created_at=now - timedelta(minutes=i)
+            )
+        # Dua artikel dengan created_at sama untuk menguji tie-breaker id
+        cls.same_time = now - timedelta(hours=1)
+        for i in range(2):
+            Article.objects.create(title=f'Same {i}', content='...', author=cls.user, created_at=cls.same_time)
+        cls.url = reverse('news:show_json')
+
+    def test_legacy_shape_without_params(self):
+        """Tanpa ?limit/?after, response tetap list semua artikel."""
+        response = self.client.get(self.url)
+        data = response.json()
+        self.assertIsInstance(data, list)
+        self.assertEqual(len(data), 7)
+
+    def test_walk_all_pages(self):
+        """Mengikuti cursor 'next' mengembalikan semua artikel tanpa duplikat."""
+        seen = []
+        response = self.client.get(self.url, {'limit': 3})
+        while True:
+            data = response.json()
+            self.assertLessEqual(len(data['results']), 3)
+            seen.extend(item['pk'] for item in data['results'])
+            if not data['next']:
+                break
+            response = self.client.get(self.url, {'limit': 3, 'after': data['next']})
+
+        expected = [str(pk) for pk in Article.objects.order_by('-created_at', '-id').values_list('pk', flat=True)]
+        self.assertEqual(seen, expected)
+
+    def test_last_page_has_no_next(self):
+        data = self.client.get(self.url, {'limit': 50}).json()
+        self.assertEqual(len(data['results']), 7)
+        self.assertIsNone(data['next'])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url, {'after': 'bukan-cursor'})
+        self.assertEqual(response.status_code, 400)
+
+
+# --- Test 6: Jumlah Query show_json ---
+
+class ShowJsonQueryCountTest(TestCase):
+
+    def _create_articles(self, n, offset=0):
+        from profile_user.models import UserProfile
+        for i in range(offset, offset + n):
+            user = User.objects.create_user(username=f'penulis{i}', password='password')
+            if i % 2 == 0:
+                UserProfile.objects.create(user=user, full_name=f'Penulis {i}', profile_picture=f'https://img.test/{i}.png')
+            Article.objects.create(title=f'Q {i}', content='...', author=user)
+
+    def test_query_count_independent_of_rows(self):
+        """show_json (list & paginated) memakai jumlah query tetap (2 query versi feed + 1 query artikel)."""
+        url = reverse('news:show_json')
+        self._create_articles(2)
+        with self.assertNumQueries(3):
+            self.client.get(url)
+        with self.assertNumQueries(3):
+            self.client.get(url, {'limit': 50})
+
+        self._create_articles(10, offset=2)
+        with self.assertNumQueries(3):
+            data = self.client.get(url).json()
+        with self.assertNumQueries(3):
+            self.client.get(url, {'limit': 50})
+        self.assertEqual(len(data), 12)
+        self.assertTrue(any(item['fields']['author_pfp'] for item in data))
+
+
+# --- Test 7: Conditional GET show_json ---
+
+class ShowJsonConditionalGetTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='etaguser', password='password')
+        cls.article = Article.objects.create(title='ETag', content='...', author=cls.user)
+        cls.url = reverse('news:show_json')
+
+    def setUp(self):
+        view_counter.get_buffer().drain()
+
+    def test_not_modified_without_payload_query(self):
+        """If-None-Match yang cocok dijawab 304 tanpa query ke tabel artikel."""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertTrue(response.has_header('Last-Modified'))
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(any('news_article' in q['sql'] for q in ctx.captured_queries))
+
+    def test_etag_changes_on_article_change(self):
+        etag = self.client.get(self.url)['ETag']
+        Article.objects.create(title='Baru', content='...', author=self.user)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_view_flush_keeps_etag(self):
+        """Flush view counter tidak menaikkan versi feed (feed tetap bisa 304 saat ramai)."""
+        etag = self.client.get(self.url)['ETag']
+        view_counter.record_view(self.article)
+        with CaptureQueriesContext(connection) as ctx:
+            view_counter.flush_views()
+        self.assertFalse([q for q in ctx.captured_queries if 'news_feedversion' in q['sql']])
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_etag_depends_on_query_string(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, {'limit': 5}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+# --- Test 8: Image Proxy dengan cache disk ---
+
+class _FakeImageResponse:
+    def __init__(self, body, content_type='image/png', delay=0):
+        self.body = body
+        self.headers = {'Content-Type': content_type}
+        self.delay = delay
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        time.sleep(self.delay)
+        for i in range(0, len(self.body), chunk_size):
+            yield self.body[i:i + chunk_size]
+
+
+class _FakeSession:
+    def __init__(self, body=b'\x89PNG' + b'x' * 100, delay=0):
+        self.body = body
+        self.delay = delay
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def get(self, url, **kwargs):
+        with self._lock:
+            self.calls.append(url)
+        if 'gagal' in url:
+            time.sleep(self.delay)
+            raise requests.ConnectionError('origin down')
+        return _FakeImageResponse(self.body, delay=self.delay)
+
+
+class ImageProxyTest(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir, ignore_errors=True)
+        override = self.settings(IMAGE_PROXY_CACHE_DIR=self.tmpdir)
+        override.enable()
+        self.addCleanup(override.disable)
+        image_proxy._lru._total = None
+
+        self.session = _FakeSession()
+        patcher = mock.patch.object(image_proxy, 'get_session', return_value=self.session)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.url = reverse('news:proxy_image')
+
+    def test_missing_url(self):
+        self.assertEqual(self.client.get(self.url).status_code, 400)
+
+    def test_second_request_served_from_disk(self):
+        """Request kedua tidak menghubungi origin dan di-stream dari disk."""
+        for _ in range(2):
+            response = self.client.get(self.url, {'url': 'https://img.test/a.png'})
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.streaming)
+            self.assertEqual(b''.join(response.streaming_content), self.session.body)
+            self.assertEqual(response['Content-Type'], 'image/png')
+            self.assertIn('max-age=', response['Cache-Control'])
+        self.assertEqual(len(self.session.calls), 1)
+
+    def test_forum_proxy_shares_cache(self):
+        self.client.get(self.url, {'url': 'https://img.test/b.png'})
+        response = self.client.get(reverse('forumdiskusi:proxy_image'), {'url': 'https://img.test/b.png'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.session.calls), 1)
+
+    def test_origin_error(self):
+        response = self.client.get(self.url, {'url': 'https://img.test/gagal.png'})
+        self.assertEqual(response.status_code, 500)
+        self.assertFalse(any(name.startswith('.tmp') for _, _, files in os.walk(self.tmpdir) for name in files))
+
+    def test_rejects_non_http_url(self):
+        response = self.client.get(self.url, {'url': 'file:///etc/passwd'})
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(self.session.calls, [])
+
+    def test_lru_eviction(self):
+        """File yang paling lama tidak diakses dihapus saat cache melebihi batas."""
+        size = len(self.session.body)
+        with self.settings(IMAGE_PROXY_CACHE_MAX_BYTES=size * 2):
+            path_a, _ = image_proxy.fetch('https://img.test/1.png')
+            os.utime(path_a, (1, 1))
+            path_b, _ = image_proxy.fetch('https://img.test/2.png')
+            path_c, _ = image_proxy.fetch('https://img.test/3.png')
+        self.assertFalse(os.path.exists(path_a))
+        self.assertTrue(os.path.exists(path_c))
+
+    def test_single_flight(self):
+        """Miss bersamaan untuk URL yang sama hanya mengunduh sekali."""
+        self.session.delay = 0.2
+        results = []
+
+        def worker():
+            results.append(image_proxy.fetch('https://img.test/ramai.png'))
+
+        threads = [threading.Thread(target=worker) for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(results), 5)
+        self.assertEqual(len(self.session.calls), 1)
+
+
+    def test_single_flight_shares_failure(self):
+        """Download leader gagal: yang menunggu menerima error yang sama, origin hanya dihubungi sekali."""
+        self.session.delay = 0.2
+        errors = []
+
+        def worker():
+            try:
+                image_proxy.fetch('https://img.test/gagal-ramai.png')
+            except requests.ConnectionError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker) for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(errors), 5)
+        self.assertEqual(len(self.session.calls), 1)
+
+
+# --- Test 9: Varian Thumbnail ---
+
+def _png_bytes(width, height, mode='RGBA'):
+    buffer = BytesIO()
+    Image.new(mode, (width, height), (200, 30, 30, 128) if mode == 'RGBA' else (200, 30, 30)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class ThumbnailVariantTest(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir, ignore_errors=True)
+        override = self.settings(
+            IMAGE_PROXY_CACHE_DIR=os.path.join(self.tmpdir, 'proxy'),
+            THUMBNAIL_VARIANT_DIR=os.path.join(self.tmpdir, 'thumbs'),
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        image_proxy._lru._total = None
+
+        self.session = _FakeSession(body=_png_bytes(1200, 800))
+        patcher = mock.patch.object(image_proxy, 'get_session', return_value=self.session)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user(username='thumbuser', password='password')
+
+    def _get_image(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, Image.open(BytesIO(b''.join(response.streaming_content)))
+
+    def test_variant_resized_and_recompressed(self):
+        url = thumbnails.variant_url('https://img.test/besar.png', 300)
+        response, img = self._get_image(url)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(img.format, 'JPEG')
+        self.assertEqual(img.size, (320, 213))  # dibulatkan ke bucket 320
+
+        response, img = self._get_image(thumbnails.variant_url('https://img.test/besar.png', 640, 'webp'))
+        self.assertEqual(img.format, 'WEBP')
+        self.assertEqual(img.width, 640)
+        # Original hanya diunduh sekali untuk semua varian
+        self.assertEqual(len(self.session.calls), 1)
+
+    def test_tampered_token_404(self):
+        token = thumbnails.variant_url('https://img.test/besar.png', 320).rstrip('/').split('/')[-1]
+        payload, signature = token.rsplit(':', 1)
+        forged = signing.Signer(salt='lain').sign_object({'u': 'https://evil.test/x.png', 'w': 320, 'f': 'jpeg'})
+        forged = forged.rsplit(':', 1)[0] + ':' + signature
+        self.assertEqual(self.client.get(reverse('news:thumbnail', args=[forged])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('news:thumbnail', args=['abc'])).status_code, 404)
+
+    def test_fallback_to_original_on_error(self):
+        url = thumbnails.variant_url('https://img.test/gagal.png', 320)
+        response = self.client.get(url)
+        self.assertRedirects(response, 'https://img.test/gagal.png', fetch_redirect_response=False)
+
+    def test_prewarm_on_article_save(self):
+        with mock.patch.object(thumbnails._executor, 'submit', side_effect=lambda fn, *a: fn(*a)):
+            with self.captureOnCommitCallbacks(execute=True):
+                Article.objects.create(title='Bergambar', content='...', author=self.user, thumbnail='https://img.test/baru.png')
+        for width in thumbnails.PREWARM_WIDTHS:
+            self.assertTrue(os.path.exists(thumbnails._variant_path('https://img.test/baru.png', width, 'jpeg')))
+
+    def test_templates_and_json_reference_variants(self):
+        Article.objects.create(title='Bergambar', content='...', author=self.user, thumbnail='https://img.test/kartu.png')
+        response = self.client.get(reverse('news:article-list'))
+        self.assertContains(response, '/news/thumb/')
+        self.assertNotContains(response, 'src="https://img.test/kartu.png"')
+
+        data = self.client.get(reverse('news:show_json')).json()
+        variants = data[0]['fields']['thumbnail_variants']
+        self.assertEqual(set(variants), {'320', '640', '1024'})
+        self.assertTrue(variants['320'].startswith('http://testserver/news/thumb/'))
+
+
+# --- Test 10: Pencarian Full-text (BM25) ---
+
+class SearchTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='searchuser', password='password')
+        cls.final = Article.objects.create(
+            title='Pertandingan Final Liga Champions', author=cls.user,
+            content='Real Madrid memenangkan pertandingan final melawan Dortmund.',
+        )
+        cls.mention = Article.objects.create(
+            title='Jadwal Bulu Tangkis Pekan Ini', author=cls.user, category='raket',
+            content='Selain bulu tangkis, ada juga siaran pertandingan sepak bola.',
+        )
+        cls.other = Article.objects.create(
+            title='Verstappen Juara Lagi', author=cls.user, category='f1',
+            content='Pembalap Red Bull kembali menang di Suzuka.',
+        )
+
+    def setUp(self):
+        # Statistik index di cache bisa tersisa dari test lain (rollback tidak membuangnya)
+        search.invalidate_stats()
+
+    def test_stem_variants_share_root(self):
+        self.assertEqual(search.stem('pertandingan'), 'tanding')
+        self.assertEqual(search.stem('bertanding'), 'tanding')
+        self.assertEqual(search.stem('tandingnya'), 'tanding')
+        self.assertEqual(search.stem('menendang'), search.stem('tendangan'))
+        self.assertEqual(search.stem('pembalap'), search.stem('balapan'))
+
+    def test_stem_does_not_overstrip(self):
+        """ke-me- bukan kombinasi prefiks, dan kata dasar minimal dua suku kata."""
+        self.assertEqual(search.stem('kemenangan'), 'menang')
+        self.assertEqual(search.stem('menang'), 'menang')
+        self.assertEqual(search.stem('tangan'), 'tangan')
+        self.assertEqual(search.stem('kepemimpinan'), 'pimpin')
+        self.assertEqual(search.stem('keberhasilan'), 'hasil')
+
+    def test_stats_cached_until_index_write(self):
+        search.search('tanding')
+        with CaptureQueriesContext(connection) as ctx:
+            search.search('tanding')
+        self.assertFalse([q for q in ctx.captured_queries if 'FROM "news_searchdocument"' in q['sql']])
+        self.assertEqual(search.get_stats()[0], 3)
+
+        Article.objects.create(title='Kemenangan Besar', content='...', author=self.user)
+        self.assertEqual(search.get_stats()[0], 4)
+        self.other.delete()
+        self.assertEqual(search.get_stats()[0], 3)
+
+    def test_index_articles_accepts_iterator(self):
+        Article.objects.filter(pk=self.other.pk).update(title='Verstappen Juara Pertandingan Sprint')
+        search.index_articles(Article.objects.filter(pk=self.other.pk).iterator())
+        self.assertIn(self.other.pk, search.search_ids('sprint'))
+        self.assertEqual(search.get_stats()[0], 3)
+
+    def test_stopwords_not_indexed(self):
+        self.assertEqual(search.analyze('yang dan di Pembalap'), ['balap'])
+
+    def test_ranking_prefers_title_match(self):
+        results = search.search('tanding')
+        self.assertEqual([article for article, _ in results], [self.final, self.mention])
+        self.assertGreater(results[0][1], results[1][1])
+
+    def test_no_match(self):
+        self.assertEqual(search.search('kriket'), [])
+        self.assertEqual(search.search('yang dan'), [])
+
+    def test_queryset_filter(self):
+        results = search.search('pertandingan', queryset=Article.objects.filter(category='raket'))
+        self.assertEqual([article for article, _ in results], [self.mention])
+
+    def test_index_follows_save_and_delete(self):
+        self.other.title = 'Verstappen Juara Pertandingan Sprint'
+        self.other.save()
+        self.assertIn(self.other.pk, search.search_ids('tanding'))
+
+        self.other.delete()
+        self.assertFalse(search.search_ids('verstappen'))
+
+    def test_view_only_update_skips_reindex(self):
+        with mock.patch.object(search, 'index_article') as index_article:
+            self.other.increment_views()
+        index_article.assert_not_called()
+
+    def test_highlight_escapes_html(self):
+        snippet = search.highlight('<b>Final</b> pertandingan seru', 'bertanding')
+        self.assertEqual(snippet, '&lt;b&gt;Final&lt;/b&gt; <mark>pertandingan</mark> seru')
+
+    def test_rebuild_command(self):
+        from .models import SearchDocument
+        SearchDocument.objects.all().delete()
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('3 artikel', out.getvalue())
+        self.assertEqual(search.search_ids('juara'), [self.other.pk])
+
+    def test_search_page(self):
+        response = self.client.get(reverse('news:article-search'), {'q': 'pertandingan final'})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Pertandingan Final Liga Champions')
+        self.assertContains(response, '<mark>pertandingan</mark>')
+        self.assertNotContains(response, 'Verstappen')
+
+    def test_search_json(self):
+        data = self.client.get(reverse('news:search_json'), {'q': 'tanding'}).json()
+        self.assertEqual([item['pk'] for item in data['results']], [str(self.final.pk), str(self.mention.pk)])
+        self.assertFalse(data['has_next'])
+
+        data = self.client.get(reverse('news:search_json'), {'q': ''}).json()
+        self.assertEqual(data['results'], [])
+
+    def test_admin_search_uses_index(self):
+        admin = User.objects.create_superuser(username='searchadmin', password='password')
+        self.client.force_login(admin)
+        response = self.client.get(reverse('admin:news_article_changelist'), {'q': 'bertanding'})
+        self.assertContains(response, 'Pertandingan Final Liga Champions')
+        self.assertNotContains(response, 'Verstappen Juara Lagi')
+
+
+# --- Test 11: Skor Trending ---
+
+class TrendingTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='trenduser', password='password')
+        now = timezone.now()
+        cls.old_popular = Article.objects.create(
+            title='Lama Populer', content='...', author=cls.user,
+            news_views=500, created_at=now - timedelta(days=10),
+        )
+        cls.fresh = Article.objects.create(title='Baru', content='...', author=cls.user, created_at=now)
+        cls.yesterday = Article.objects.create(
+            title='Kemarin', content='...', author=cls.user, created_at=now - timedelta(days=1),
+        )
+
+    def _add_comments(self, article, n):
+        from forumdiskusi.models import ForumDiskusi, Post
+        forum, _ = ForumDiskusi.objects.get_or_create(article=article)
+        Post.objects.bulk_create([Post(forum=forum, author=self.user, content='Mantap') for _ in range(n)])
+
+    def test_new_article_is_seeded(self):
+        self.assertTrue(TrendingScore.objects.filter(article=self.fresh).exists())
+        self.assertEqual(trending.top_articles(3), [self.fresh, self.yesterday, self.old_popular])
+
+    def test_old_views_decay(self):
+        """500 view 10 hari lalu (half-life 24 jam) kalah dari artikel baru."""
+        trending.refresh()
+        self.assertEqual(trending.top_articles(1), [self.fresh])
+
+    def test_recent_activity_boosts_score(self):
+        trending.refresh()
+        Article.objects.filter(pk=self.yesterday.pk).update(news_views=40)
+        self._add_comments(self.yesterday, 3)
+
+        self.assertEqual(trending.refresh(), 1)
+        self.assertEqual(trending.top_articles(1), [self.yesterday])
+        row = TrendingScore.objects.get(article=self.yesterday)
+        self.assertEqual((row.views_seen, row.comments_seen), (40, 3))
+
+    def test_refresh_is_incremental(self):
+        trending.refresh()
+        with self.assertNumQueries(2):
+            # Tidak ada aktivitas baru: cuma cari kandidat, tidak ada yang ditulis
+            self.assertEqual(trending.refresh(), 0)
+
+    def test_full_rebuild_matches_incremental_backfill(self):
+        TrendingScore.objects.all().delete()
+        trending.refresh()
+        backfilled = dict(TrendingScore.objects.values_list('article_id', 'score'))
+        trending.refresh(full=True)
+        rebuilt = dict(TrendingScore.objects.values_list('article_id', 'score'))
+        self.assertEqual(backfilled.keys(), rebuilt.keys())
+        for pk, score in backfilled.items():
+            self.assertAlmostEqual(score, rebuilt[pk])
+
+    def test_current_score_halves_after_half_life(self):
+        now = timezone.now()
+        log_score = trending._log_weight(8, now)
+        self.assertAlmostEqual(trending.current_score(log_score, now), 8)
+        self.assertAlmostEqual(trending.current_score(log_score, now + timedelta(hours=24)), 4)
+
+    def test_update_trending_command(self):
+        out = StringIO()
+        call_command('update_trending', '--full', stdout=out)
+        self.assertIn('3 skor trending diperbarui', out.getvalue())
+
+    def test_sort_trending_list_and_json(self):
+        Article.objects.filter(pk=self.yesterday.pk).update(news_views=1000)
+        trending.refresh()
+
+        response = self.client.get(reverse('news:article-list'), {'sort': 'trending'})
+        self.assertEqual(response.context['articles'][0], self.yesterday)
+
+        data = self.client.get(reverse('news:show_json'), {'sort': 'trending'}).json()
+        self.assertEqual(data[0]['pk'], str(self.yesterday.pk))
+
+        seen = []
+        data = self.client.get(reverse('news:show_json'), {'sort': 'trending', 'limit': 2}).json()
+        seen.extend(item['pk'] for item in data['results'])
+        data = self.client.get(reverse('news:show_json'), {'sort': 'trending', 'limit': 2, 'after': data['next']}).json()
+        seen.extend(item['pk'] for item in data['results'])
+        self.assertIsNone(data['next'])
+        self.assertEqual(seen, [str(a.pk) for a in (self.yesterday, self.fresh, self.old_popular)])
+
+    def test_refresh_bumps_feed_version(self):
+        etag = self.client.get(reverse('news:show_json'), {'sort': 'trending'})['ETag']
+        Article.objects.filter(pk=self.yesterday.pk).update(news_views=1000)
+        trending.refresh()
+        response = self.client.get(reverse('news:show_json'), {'sort': 'trending'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_landing_and_forum_sidebar_use_trending(self):
+        Article.objects.filter(pk=self.old_popular.pk).update(news_views=100000)
+        trending.refresh()
+        response = self.client.get(reverse('landing-page'))
+        self.assertEqual(response.context['hottest_articles'][0], self.old_popular)
+
+        data = self.client.get(reverse('forumdiskusi:forum_json', args=[self.fresh.pk])).json()
+        self.assertEqual(
+            [item['pk'] for item in data['hottest_articles']],
+            [str(self.old_popular.pk), str(self.yesterday.pk)],
+        )
+
+
+# --- Test 12: Grid "muat lebih banyak" + cache fragmen ---
+
+class ArticleGridTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='griduser', password='password')
+        now = timezone.now()
+        for i in range(12):
+            Article.objects.create(
+                title=f'Grid {i}', content='...', author=cls.user,
+                category='f1' if i % 3 == 0 else 'sepakbola',
+                created_at=now - timedelta(minutes=i),
+            )
+        cls.url = reverse('news:article-grid')
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+    def _walk(self, params):
+        titles = []
+        data = self.client.get(self.url, params).json()
+        while True:
+            titles.extend(re.findall(r'Grid \d+', data['html']))
+            if not data['next']:
+                return titles
+            data = self.client.get(self.url, {**params, 'after': data['next']}).json()
+
+    def test_walk_all_pages(self):
+        self.assertEqual(self._walk({'limit': 5}), [f'Grid {i}' for i in range(12)])
+
+    def test_category(self):
+        self.assertEqual(self._walk({'limit': 2, 'category': 'f1'}), ['Grid 0', 'Grid 3', 'Grid 6', 'Grid 9'])
+
+    def test_list_view_provides_first_cursor(self):
+        response = self.client.get(reverse('news:article-list'))
+        self.assertContains(response, 'id="load-more-button"')
+        data = self.client.get(self.url, {'after': response.context['grid_next']}).json()
+        self.assertEqual(re.findall(r'Grid \d+', data['html']), ['Grid 9', 'Grid 10', 'Grid 11'])
+        self.assertIsNone(data['next'])
+
+    def test_list_view_and_grid_with_same_created_at(self):
+        """Artikel dengan created_at sama (mis. hasil import) tidak terlewat/terduplikasi di batas halaman."""
+        same_time = timezone.now() - timedelta(hours=1)
+        for i in range(12, 30):
+            Article.objects.create(title=f'Grid {i}', content='...', author=self.user, category='raket', created_at=same_time)
+        response = self.client.get(reverse('news:article-list'), {'category': 'raket'})
+        titles = [article.title for article in response.context['articles']]
+        data = self.client.get(self.url, {'category': 'raket', 'after': response.context['grid_next']}).json()
+        titles += re.findall(r'Grid \d+', data['html'])
+        self.assertEqual(sorted(titles), sorted(f'Grid {i}' for i in range(12, 30)))
+
+    def test_cache_hit_skips_database(self):
+        first = self.client.get(self.url, {'limit': 4}).json()
+        # Hanya baca generasi dari FeedVersion, tanpa query artikel
+        with self.assertNumQueries(1):
+            second = self.client.get(self.url, {'limit': 4}).json()
+        self.assertEqual(first, second)
+
+    def test_save_and_delete_invalidate(self):
+        self.client.get(self.url, {'limit': 4})
+        Article.objects.create(title='Grid Baru', content='...', author=self.user)
+        self.assertIn('Grid Baru', self.client.get(self.url, {'limit': 4}).json()['html'])
+
+        Article.objects.get(title='Grid Baru').delete()
+        self.assertNotIn('Grid Baru', self.client.get(self.url, {'limit': 4}).json()['html'])
+
+    def test_invalidate_without_generation_row(self):
+        FeedVersion.objects.filter(key=grid_cache.GENERATION_KEY).delete()
+        grid_cache.invalidate()
+        self.assertEqual(FeedVersion.objects.get(key=grid_cache.GENERATION_KEY).version, 1)
+
+    def test_invalidation_reaches_other_processes(self):
+        self.client.get(self.url, {'limit': 4})
+        # Worker lain punya LocMemCache sendiri: simulasikan dengan update yang
+        # tidak melewati cache proses ini sama sekali
+        Article.objects.filter(title='Grid 0').update(title='Grid Diubah')
+        FeedVersion.objects.filter(key=grid_cache.GENERATION_KEY).update(version=F('version') + 1)
+        self.assertIn('Grid Diubah', self.client.get(self.url, {'limit': 4}).json()['html'])
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get(self.url, {'after': 'rusak'}).status_code, 400)
+
+
+# --- Test 13: Import CSV batch ---
+
+class PopulateArticlesFromCsvTest(TestCase):
+
+    FIELDS = ['title', 'content', 'thumbnail', 'category', 'publish_date_str', 'author_username']
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='CNN Indonesia', password='password')
+        cls.existing = Article.objects.create(title='Sudah Ada', content='Lama', author=cls.author, category='f1')
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'articles.csv')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _write_csv(self, rows):
+        with open(self.path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=self.FIELDS)
+            writer.writeheader()
+            for row in rows:
+                writer.writerow({field: row.get(field, '') for field in self.FIELDS})
+
+    def _run(self, *args):
+        out, err = StringIO(), StringIO()
+        call_command('populate_articles_from_csv', '--file', self.path, *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def _rows(self):
+        return [
+            {'title': 'Final Liga Champions', 'content': 'Pertandingan seru', 'category': 'sepakbola',
+             'publish_date_str': 'Kamis, 23 Okt 2025 21:30 WIB', 'thumbnail': 'https://img.test/a.jpg'},
+            {'title': 'Sudah Ada', 'content': 'Baru', 'category': 'raket', 'publish_date_str': 'Jumat, 24 Okt 2025 08:00 WIB'},
+            {'title': 'Final Liga Champions', 'content': 'Duplikat di file'},
+            {'title': '', 'content': 'Tanpa judul'},
+            {'title': 'Tanggal Rusak', 'publish_date_str': '99 Foo 2025'},
+            {'title': 'Kategori Aneh', 'content': 'Lari pagi', 'category': 'catur'},
+        ]
+
+    def test_import(self):
+        self._write_csv(self._rows())
+        out, err = self._run('--batch-size', '2')
+        self.assertIn('2 artikel baru ditambahkan', out)
+        self.assertIn('2 dilewati', out)
+        self.assertIn('2 error', out)
+        self.assertIn('baris/detik', out)
+        self.assertIn('Judul kosong', err)
+
+        final = Article.objects.get(title='Final Liga Champions')
+        self.assertEqual(final.author, self.author)
+        self.assertEqual(timezone.localtime(final.created_at).strftime('%Y-%m-%d %H:%M'), '2025-10-23 21:30')
+        self.assertEqual(Article.objects.get(title='Kategori Aneh').category, 'olahraga lain')
+        self.assertEqual(Article.objects.get(pk=self.existing.pk).content, 'Lama')
+
+        # Hook yang biasanya dijalankan post_save tetap jalan untuk bulk_create
+        self.assertEqual(search.search_ids('pertandingan'), [final.pk])
+        self.assertTrue(TrendingScore.objects.filter(article=final).exists())
+
+    def test_update_existing(self):
+        self._write_csv(self._rows())
+        out, _ = self._run('--update-existing')
+        self.assertIn('1 diperbarui', out)
+        existing = Article.objects.get(pk=self.existing.pk)
+        self.assertEqual((existing.content, existing.category), ('Baru', 'raket'))
+        self.assertEqual(search.search_ids('baru'), [existing.pk])
+
+    def test_prewarms_new_and_changed_thumbnails(self):
+        Article.objects.create(title='Gambar Sama', content='...', author=self.author, thumbnail='https://img.test/sama.jpg')
+        Article.objects.filter(pk=self.existing.pk).update(thumbnail='https://img.test/lama.jpg')
+        self._write_csv([
+            {'title': 'Artikel Baru', 'content': 'Isi', 'thumbnail': 'https://img.test/baru.jpg'},
+            {'title': 'Sudah Ada', 'content': 'Baru', 'thumbnail': 'https://img.test/ganti.jpg'},
+            {'title': 'Gambar Sama', 'content': 'Isi lain', 'thumbnail': 'https://img.test/sama.jpg'},
+        ])
+        with mock.patch.object(thumbnails._executor, 'submit') as submit:
+            with self.captureOnCommitCallbacks(execute=True):
+                self._run('--update-existing')
+        self.assertEqual(
+            sorted(call.args[1] for call in submit.call_args_list),
+            ['https://img.test/baru.jpg', 'https://img.test/ganti.jpg'],
+        )
+
+    def test_dry_run_writes_nothing(self):
+        self._write_csv(self._rows())
+        with self.assertNumQueries(2):
+            # user author + preload judul
+            out, _ = self._run('--dry-run', '--update-existing')
+        self.assertIn('2 artikel baru ditambahkan', out)
+        self.assertIn('1 diperbarui', out)
+        self.assertEqual(Article.objects.count(), 1)
+
+    def test_bad_row_in_batch_is_isolated(self):
+        from news.importer import ArticleImporter
+        importer = ArticleImporter(self.author, batch_size=10)
+        importer.add_row({'title': 'Baik 1', 'content': '...'})
+        importer.add_row({'title': 'Baik 2', 'content': '...'})
+        original_write = importer._write
+
+        def failing_write(to_create, to_update):
+            from django.db import IntegrityError
+            if any(article.title == 'Baik 2' for article in to_create):
+                raise IntegrityError('boom')
+            return original_write(to_create, to_update)
+
+        with mock.patch.object(importer, '_write', side_effect=failing_write):
+            stats = importer.finish()
+        self.assertEqual((stats.added, stats.errors), (1, 1))
+        self.assertTrue(Article.objects.filter(title='Baik 1').exists())
+
+    def test_large_import_is_batched(self):
+        n = 20000
+        self._write_csv(
+            {'title': f'Artikel {i}', 'content': 'isi singkat', 'category': 'f1',
+             'publish_date_str': 'Senin, 01 Des 2025 10:00 WIB'}
+            for i in range(n)
+        )
+        with CaptureQueriesContext(connection) as ctx:
+            started = time.monotonic()
+            out, _ = self._run('--batch-size', '5000')
+            elapsed = time.monotonic() - started
+        self.assertIn(f'{n} artikel baru ditambahkan', out)
+        self.assertEqual(Article.objects.count(), n + 1)
+        # Jumlah query sebanding dengan jumlah batch (dipecah sesuai batas parameter
+        # database), jauh di bawah 2 query per baris seperti sebelumnya
+        self.assertLess(len(ctx.captured_queries), n // 20)
+        self.assertLess(elapsed, 60)
+
+
+# --- Test 14: Crawler konkuren + rate limit ---
+
+class _FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class CrawlerTest(TestCase):
+
+    def test_token_bucket_limits_rate(self):
+        clock = _FakeClock()
+        bucket = TokenBucket(rate=5, burst=2, clock=clock, sleep=clock.sleep)
+        for _ in range(12):
+            bucket.acquire()
+        # 2 token burst gratis, 10 sisanya dengan laju 5/detik
+        self.assertAlmostEqual(clock.now, 2.0)
+
+    def test_token_bucket_unlimited(self):
+        clock = _FakeClock()
+        bucket = TokenBucket(rate=0, clock=clock, sleep=clock.sleep)
+        for _ in range(100):
+            bucket.acquire()
+        self.assertEqual(clock.now, 0.0)
+
+    def test_fetch_all_keeps_order_and_runs_concurrently(self):
+        with FixtureServer(articles=16, latency=0.2) as server:
+            urls = [f'{server.base_url}/olahraga/artikel-{i}' for i in reversed(range(16))]
+            with Fetcher(workers=8, rate=0) as fetcher:
+                started = time.monotonic()
+                results = list(fetcher.fetch_all(urls))
+                elapsed = time.monotonic() - started
+        self.assertEqual([r.url for r in results], urls)
+        self.assertTrue(all(r.ok for r in results))
+        self.assertEqual(fetcher.stats.pages, 16)
+        # Sekuensial butuh >= 3.2 detik
+        self.assertLess(elapsed, 2.0)
+
+    def test_retries_with_backoff(self):
+        sleeps = []
+        with FixtureServer(articles=1, flaky=2) as server:
+            with Fetcher(workers=1, rate=0, retries=3, sleep=sleeps.append) as fetcher:
+                result = fetcher.fetch(f'{server.base_url}/olahraga/artikel-0')
+        self.assertTrue(result.ok)
+        self.assertEqual(result.attempts, 3)
+        self.assertEqual(fetcher.stats.retries, 2)
+        self.assertEqual(len(sleeps), 2)
+        self.assertGreater(sleeps[1], sleeps[0] * 1.3)
+
+    def test_gives_up_after_retries(self):
+        with FixtureServer(articles=1, flaky=10) as server:
+            with Fetcher(workers=1, rate=0, retries=2, sleep=lambda s: None) as fetcher:
+                result = fetcher.fetch(f'{server.base_url}/olahraga/artikel-0')
+                missing = fetcher.fetch(f'{server.base_url}/olahraga/artikel-5')
+        self.assertFalse(result.ok)
+        self.assertEqual((result.status_code, result.attempts), (503, 3))
+        # 404 tidak di-retry
+        self.assertEqual((missing.status_code, missing.attempts), (404, 1))
+        self.assertEqual(fetcher.stats.failed, 2)
+
+    def test_connection_error_is_reported(self):
+        with Fetcher(workers=1, rate=0, retries=1, sleep=lambda s: None) as fetcher:
+            with mock.patch.object(fetcher.session, 'get', side_effect=requests.ConnectionError('down')):
+                result = fetcher.fetch('http://example.invalid/')
+        self.assertFalse(result.ok)
+        self.assertEqual((result.error, result.attempts), ('down', 2))
+
+    def test_parse_detail_page(self):
+        server = FixtureServer(articles=5)
+        try:
+            for i in range(5):
+                item = scraper.IndexItem(url='x', title=fixture_title(i), thumbnail='small.jpg')
+                row = scraper.parse_detail_page(server.detail_html(i), item)
+                self.assertEqual(row['category'], fixture_category(i))
+                self.assertEqual(row['thumbnail'], f'/img/{i}-large.jpg')
+                self.assertTrue(row['publish_date_str'].endswith('WIB'))
+                self.assertNotIn('ADVERTISEMENT', row['content'])
+        finally:
+            server.stop()
+
+    def test_scrape_command_against_fixture(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        path = os.path.join(tmpdir, 'out.csv')
+        out = StringIO()
+        call_command(
+            'scrape_cnn', '--benchmark', '--benchmark-latency', '0', '--target', '30',
+            '--max-pages', '5', '--workers', '4', '--rate', '0', '--output', path,
+            stdout=out, stderr=StringIO(),
+        )
+        self.assertIn('Benchmark: 32 halaman', out.getvalue())
+        with open(path, encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+        # Urutan CSV mengikuti urutan halaman indeks
+        self.assertEqual([r['title'] for r in rows], [fixture_title(i) for i in reversed(range(30))])
+
+
+# --- Test 15: Crawl incremental (frontier + conditional request) ---
+
+class IncrementalCrawlTest(TestCase):
+
+    def setUp(self):
+        self.server = FixtureServer(articles=30, per_page=10).start()
+        self.addCleanup(self.server.stop)
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        self.csv_path = os.path.join(tmpdir, 'cnn.csv')
+
+    def _crawl(self, *args):
+        out = StringIO()
+        call_command(
+            'scrape_cnn', '--incremental', '--base-url', self.server.base_url, '--output', self.csv_path,
+            '--no-archive', '--workers', '4', '--rate', '0', '--max-pages', '5', *args,
+            stdout=out, stderr=StringIO(),
+        )
+        return out.getvalue()
+
+    def _csv_titles(self):
+        with open(self.csv_path, encoding='utf-8') as f:
+            return [row['title'] for row in csv.DictReader(f)]
+
+    def _detail_hits(self):
+        return sum(n for path, n in self.server.hits.items() if '/artikel-' in path)
+
+    def test_first_run_fetches_everything(self):
+        self._crawl()
+        self.assertEqual(len(self._csv_titles()), 30)
+        self.assertEqual(CrawlUrl.objects.filter(kind='article', status='done').count(), 30)
+        self.assertTrue(CrawlUrl.objects.filter(kind='article').exclude(etag='').exists())
+
+    def test_second_run_fetches_only_delta(self):
+        self._crawl()
+        self.server.hits.clear()
+
+        # Tidak ada artikel baru: halaman indeks 1 dijawab 304, tidak ada fetch detail
+        out = self._crawl()
+        self.assertIn('tidak berubah', out)
+        self.assertEqual(self._detail_hits(), 0)
+        self.assertEqual(len(self._csv_titles()), 30)
+
+        # Tiga artikel baru terbit: hanya halaman 1 dan tiga detail yang diambil
+        self.server.articles = 33
+        self.server.hits.clear()
+        self._crawl()
+        self.assertEqual(self._detail_hits(), 3)
+        self.assertEqual(sum(n for path, n in self.server.hits.items() if 'indeks' in path), 1)
+        self.assertEqual(self._csv_titles()[30:], [fixture_title(i) for i in (32, 31, 30)])
+
+    def test_stops_paging_at_articles_already_in_db(self):
+        user = User.objects.create_user(username='CNN Indonesia')
+        for i in range(15):
+            Article.objects.create(title=fixture_title(i), content='...', author=user)
+        self._crawl()
+        # Halaman 1 (29..20) baru semua, halaman 2 (19..10) berhenti di 14
+        self.assertEqual(self._csv_titles(), [fixture_title(i) for i in range(29, 14, -1)])
+        self.assertNotIn('?page=3', ''.join(self.server.hits))
+
+    def test_failed_urls_are_retried_next_run(self):
+        self.server.flaky = 100
+        self._crawl('--retries', '0')
+        self.assertFalse(os.path.exists(self.csv_path))
+        self.assertEqual(CrawlUrl.objects.filter(kind='article', status='failed').count(), 30)
+
+        self.server.flaky = 0
+        self._crawl()
+        self.assertEqual(len(self._csv_titles()), 30)
+
+    def test_parse_error_is_retried_without_validators(self):
+        broken = fixture_title(7)
+        original = scraper.parse_detail_page
+
+        def parse_detail_page(html, item):
+            if item.title == broken:
+                raise ValueError('selector berubah')
+            return original(html, item)
+
+        with mock.patch.object(scraper, 'parse_detail_page', side_effect=parse_detail_page):
+            self._crawl()
+        entry = CrawlUrl.objects.get(title=broken)
+        self.assertEqual((entry.status, entry.etag, entry.last_modified), ('failed', '', ''))
+        self.assertEqual(CrawlUrl.objects.filter(kind='article', status='done').count(), 29)
+
+        self.server.hits.clear()
+        self._crawl()
+        self.assertEqual(self._detail_hits(), 1)
+        self.assertEqual(self._csv_titles()[29:], [broken])
+
+    def test_to_db_records_urls_only_after_batch_is_saved(self):
+        User.objects.create_user(username='CNN Indonesia')
+        from .importer import ArticleImporter
+        original_write = ArticleImporter._write
+
+        def write(importer, to_create, to_update):
+            from django.db import IntegrityError
+            if any(article.title == fixture_title(3) for article in to_create):
+                raise IntegrityError('boom')
+            return original_write(importer, to_create, to_update)
+
+        with mock.patch.object(ArticleImporter, '_write', write):
+            self._crawl('--to-db', '--batch-size', '4')
+        self.assertEqual(CrawlUrl.objects.get(title=fixture_title(3)).status, 'failed')
+        self.assertEqual(CrawlUrl.objects.filter(kind='article', status='done').count(), 29)
+
+        # Proses mati sebelum batch terakhir di-flush: URL-nya tetap di antrean
+        CrawlUrl.objects.all().delete()
+        Article.objects.all().delete()
+        with mock.patch.object(ArticleImporter, 'finish', side_effect=KeyboardInterrupt):
+            with self.assertRaises(KeyboardInterrupt):
+                self._crawl('--to-db', '--batch-size', '4')
+        self.assertEqual(CrawlUrl.objects.filter(kind='article', status='done').count(), Article.objects.count())
+        self.assertEqual(CrawlUrl.objects.filter(kind='article', status='pending').count(), 30 - Article.objects.count())
+
+    def test_recheck_uses_conditional_requests(self):
+        self._crawl()
+        self.server.revise(5)
+        self.server.hits.clear()
+        out = self._crawl('--recheck', '30')
+        self.assertEqual(self._detail_hits(), 30)
+        # 29 detail + halaman indeks 1
+        self.assertIn('30 tidak berubah (304)', out)
+        # Hanya artikel yang berubah yang ditulis ulang
+        self.assertEqual(self._csv_titles()[30:], [fixture_title(5)])
+
+
+# --- Test 16: Arsip HTML mentah + parse ulang offline ---
+
+class ScrapeArchiveTest(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.archive_dir = os.path.join(self.tmpdir, 'archive')
+
+    def _result(self, i, body=None):
+        from .crawler import FetchResult
+        return FetchResult(
+            url=f'http://cnn.test/olahraga/artikel-{i}', status_code=200,
+            content=body or FixtureServer(articles=0).detail_html(i).encode(),
+            headers={'Content-Type': 'text/html', 'ETag': f'"a{i}"', 'Content-Encoding': 'gzip'},
+        )
+
+    def test_write_and_read_by_offset(self):
+        with archive.ArchiveWriter(self.archive_dir) as writer:
+            entries = [writer.write(self._result(i), title=fixture_title(i)) for i in range(5)]
+        status, headers, body = archive.read_record(entries[3], self.archive_dir)
+        self.assertEqual(status, 200)
+        self.assertEqual(headers['ETag'], '"a3"')
+        self.assertNotIn('Content-Encoding', headers)
+        self.assertIn(b'artikel fixture 3 ', body)
+        self.assertEqual([e['offset'] for e in archive.iter_index(self.archive_dir)], [e['offset'] for e in entries])
+
+    def test_segments_rotate_and_writer_appends(self):
+        with archive.ArchiveWriter(self.archive_dir, segment_bytes=1000) as writer:
+            for i in range(6):
+                writer.write(self._result(i))
+        with archive.ArchiveWriter(self.archive_dir, segment_bytes=1000) as writer:
+            writer.write(self._result(6))
+        entries = list(archive.iter_index(self.archive_dir))
+        self.assertEqual(len(entries), 7)
+        self.assertGreater(len({e['segment'] for e in entries}), 2)
+        for n, entry in enumerate(entries):
+            self.assertIn(f'artikel fixture {n} '.encode(), archive.read_record(entry, self.archive_dir)[2])
+
+    def test_latest_entry_per_url(self):
+        with archive.ArchiveWriter(self.archive_dir) as writer:
+            writer.write(self._result(1, b'<html>lama</html>'))
+            writer.write(self._result(2))
+            writer.write(self._result(1, b'<html>baru</html>'))
+        entries = archive.latest_entries(self.archive_dir)
+        self.assertEqual([e['url'][-1] for e in entries], ['1', '2'])
+        self.assertEqual(archive.read_record(entries[0], self.archive_dir)[2], b'<html>baru</html>')
+
+    def test_scrape_then_reparse_offline(self):
+        crawl_csv = os.path.join(self.tmpdir, 'crawl.csv')
+        reparse_csv = os.path.join(self.tmpdir, 'reparse.csv')
+        call_command(
+            'scrape_cnn', '--benchmark', '--benchmark-latency', '0', '--target', '25', '--max-pages', '5',
+            '--rate', '0', '--archive', self.archive_dir, '--output', crawl_csv,
+            stdout=StringIO(), stderr=StringIO(),
+        )
+        with mock.patch.object(requests.Session, 'request', side_effect=AssertionError('network')) as request:
+            out = StringIO()
+            call_command(
+                'reparse_archive', '--archive', self.archive_dir, '--output', reparse_csv,
+                '--workers', '2', '--chunk-size', '5', stdout=out, stderr=StringIO(),
+            )
+        request.assert_not_called()
+        self.assertIn('25 artikel ditulis', out.getvalue())
+        with open(crawl_csv, encoding='utf-8') as a, open(reparse_csv, encoding='utf-8') as b:
+            self.assertEqual(a.read(), b.read())
+
+    def test_reparse_keeps_file_when_nothing_parsed(self):
+        with archive.ArchiveWriter(self.archive_dir) as writer:
+            writer.write(self._result(1), title=fixture_title(1))
+        output = os.path.join(self.tmpdir, 'ada.csv')
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write('isi lama')
+        out, err = StringIO(), StringIO()
+        with mock.patch.object(scraper, 'parse_detail_page', side_effect=ValueError('rusak')):
+            call_command(
+                'reparse_archive', '--archive', self.archive_dir, '--output', output, '--workers', '1', '--force',
+                stdout=out, stderr=err,
+            )
+        self.assertNotIn('Selesai!', out.getvalue())
+        self.assertIn('tidak ada yang ditulis', err.getvalue())
+        with open(output, encoding='utf-8') as f:
+            self.assertEqual(f.read(), 'isi lama')
+
+    def test_reparse_streams_chunks(self):
+        with archive.ArchiveWriter(self.archive_dir) as writer:
+            for i in range(6):
+                writer.write(self._result(i), title=fixture_title(i))
+        with mock.patch.object(scraper, 'parse_detail_page', return_value={'title': 'x'}) as parse:
+            results = archive.reparse(archive.latest_entries(self.archive_dir), self.archive_dir, workers=1, chunk_size=2)
+            next(results)
+            # Hanya potongan pertama yang sudah di-parse
+            self.assertEqual(parse.call_count, 2)
+            self.assertEqual(len(list(results)), 5)
+
+    def test_reparse_refuses_to_overwrite_without_force(self):
+        with archive.ArchiveWriter(self.archive_dir) as writer:
+            for i in range(3):
+                writer.write(self._result(i), title=fixture_title(i))
+        output = os.path.join(self.tmpdir, 'ada.csv')
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write('isi lama')
+        args = ['reparse_archive', '--archive', self.archive_dir, '--output', output, '--workers', '1']
+
+        with self.assertRaises(CommandError):
+            call_command(*args, stdout=StringIO(), stderr=StringIO())
+        with open(output, encoding='utf-8') as f:
+            self.assertEqual(f.read(), 'isi lama')
+
+        call_command(*args, '--force', stdout=StringIO(), stderr=StringIO())
+        with open(output, encoding='utf-8') as f:
+            self.assertEqual(len(list(csv.DictReader(f))), 3)
+        self.assertFalse(os.path.exists(f'{output}.tmp'))
+
+    def test_reparse_uses_fixed_parser(self):
+        with archive.ArchiveWriter(self.archive_dir) as writer:
+            for i in range(4):
+                writer.write(self._result(i), title=fixture_title(i))
+
+        def parse_detail_page(html, item):
+            return {'title': item.title, 'content': 'diperbaiki'}
+
+        # Parser diganti (mis. selector baru) -> cukup parse ulang arsip
+        with mock.patch.object(scraper, 'parse_detail_page', side_effect=parse_detail_page):
+            results = list(archive.reparse(archive.latest_entries(self.archive_dir), self.archive_dir, workers=1))
+        self.assertEqual([row['content'] for _, row, _ in results], ['diperbaiki'] * 4)
+        self.assertEqual([row['title'] for _, row, _ in results], [fixture_title(i) for i in range(4)])
+
+
+# --- Test 17: Pipeline streaming scrape -> database ---
+
+class ScrapePipelineTest(TestCase):
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='CNN Indonesia')
+        self.server = FixtureServer(articles=40, per_page=20).start()
+        self.addCleanup(self.server.stop)
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+
+    def _scrape(self, *args):
+        out = StringIO()
+        call_command(
+            'scrape_cnn', '--to-db', '--base-url', self.server.base_url, '--no-archive',
+            '--workers', '4', '--rate', '0', '--max-pages', '5', '--batch-size', '10', *args,
+            stdout=out, stderr=StringIO(),
+        )
+        return out.getvalue()
+
+    def test_streams_into_database_without_csv(self):
+        with mock.patch.object(pipeline.CsvSink, 'write') as csv_write:
+            out = self._scrape()
+        csv_write.assert_not_called()
+        self.assertIn('Database: 40 artikel baru', out)
+        self.assertEqual(Article.objects.filter(author=self.author).count(), 40)
+        article = Article.objects.get(title=fixture_title(7))
+        self.assertEqual(article.category, fixture_category(7))
+        self.assertEqual(timezone.localtime(article.created_at).strftime('%d %m %Y %H:%M'), '23 10 2025 07:07')
+        self.assertNotIn('ADVERTISEMENT', article.content)
+        # Hook yang biasanya dari post_save ikut jalan (bulk_create)
+        self.assertEqual(TrendingScore.objects.count(), 40)
+        self.assertIn(article.pk, search.search_ids('fixture 7'))
+
+    def test_rows_visible_while_crawling(self):
+        counts = []
+        original_write = pipeline.ArticleSink.write
+
+        def write(sink, row):
+            counts.append(Article.objects.count())
+            return original_write(sink, row)
+
+        with mock.patch.object(pipeline.ArticleSink, 'write', write):
+            self._scrape()
+        # Batch 10: artikel ke-31 datang saat 30 artikel sebelumnya sudah tersimpan
+        self.assertEqual(counts[30], 30)
+
+    def test_csv_is_optional_sink(self):
+        path = os.path.join(self.tmpdir, 'out.csv')
+        self._scrape('--output', path)
+        with open(path, encoding='utf-8') as f:
+            titles = [row['title'] for row in csv.DictReader(f)]
+        self.assertEqual(titles, [fixture_title(i) for i in reversed(range(40))])
+        self.assertEqual(Article.objects.count(), 40)
+
+    def test_dedupes_against_existing_articles(self):
+        Article.objects.create(title=fixture_title(3), content='lama', author=self.author)
+        out = self._scrape()
+        self.assertIn('39 artikel baru, 0 diperbarui, 1 duplikat', out)
+        self.assertEqual(Article.objects.get(title=fixture_title(3)).content, 'lama')
+
+        self._scrape('--update-existing')
+        self.assertIn('artikel fixture 3', Article.objects.get(title=fixture_title(3)).content)
+
+    def test_missing_author(self):
+        self.author.delete()
+        with self.assertRaises(CommandError):
+            self._scrape()
+
+    def test_buffered_queue_is_bounded(self):
+        produced = []
+
+        def source():
+            for i in range(100):
+                produced.append(i)
+                yield i
+
+        stage = pipeline.buffered(source(), maxsize=5)
+        self.assertEqual(next(stage), 0)
+        time.sleep(0.2)
+        # 1 sudah dikonsumsi + 5 di antrean + 1 yang sedang menunggu put()
+        self.assertLessEqual(len(produced), 7)
+        self.assertEqual(list(stage), list(range(1, 100)))
+
+    def test_buffered_propagates_errors_and_stops_producer(self):
+        def failing():
+            yield 1
+            raise ValueError('rusak')
+
+        with self.assertRaisesMessage(ValueError, 'rusak'):
+            list(pipeline.buffered(failing()))
+
+        produced = []
+
+        def endless():
+            i = 0
+            while True:
+                produced.append(i)
+                yield i
+                i += 1
+
+        stage = pipeline.buffered(endless(), maxsize=3)
+        self.assertEqual(next(stage), 0)
+        stage.close()
+        stopped_at = len(produced)
+        time.sleep(0.2)
+        self.assertEqual(len(produced), stopped_at)
+
+    def test_fetch_all_window_limits_in_flight(self):
+        consumed = []
+
+        def urls():
+            for i in range(40):
+                consumed.append(i)
+                yield f'{self.server.base_url}/olahraga/artikel-{i}'
+
+        with Fetcher(workers=4, rate=0) as fetcher:
+            results = fetcher.fetch_all(urls(), window=8)
+            first = next(results)
+            self.assertEqual(len(consumed), 8)
+            self.assertTrue(first.ok)
+            self.assertEqual(len([first, *results]), 40)
+
+
+# --- Test 18: Deteksi artikel hampir sama (SimHash) ---
+
+def _random_text(seed, words=300):
+    import random
+    from .crawl_fixture import WORDS
+    rng = random.Random(seed)
+    return ' '.join(rng.choice(WORDS) for _ in range(words)) + '.'
+
+
+class NearDuplicateTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='CNN Indonesia', password='password')
+        cls.original = Article.objects.create(
+            title='Timnas Menang Telak', content=_random_text(1), author=cls.author, category='sepakbola'
+        )
+
+    def _edited(self, text):
+        # Satu kata diganti, satu kalimat ditambahkan
+        words = text.split()
+        words[40] = 'berubah'
+        return ' '.join(words) + ' Dikutip dari berbagai sumber.'
+
+    def test_signature_similarity(self):
+        text = _random_text(1)
+        self.assertEqual(fingerprint.signature(text), fingerprint.signature(text))
+        self.assertGreaterEqual(
+            fingerprint.similarity(fingerprint.signature(text), fingerprint.signature(self._edited(text))),
+            fingerprint.THRESHOLD,
+        )
+        self.assertLess(
+            fingerprint.similarity(fingerprint.signature(text), fingerprint.signature(_random_text(2))), 0.1
+        )
+        self.assertIsNone(fingerprint.signature('Terlalu pendek.'))
+
+    def test_band_index(self):
+        sig = fingerprint.signature(_random_text(3))
+        index = fingerprint.BandIndex()
+        index.add('asli', sig)
+        index.add('lain', fingerprint.signature(_random_text(4)))
+        self.assertEqual(index.match(fingerprint.signature(self._edited(_random_text(3))))[0], 'asli')
+        self.assertIsNone(index.match(fingerprint.signature(_random_text(5))))
+
+    def test_signal_flags_near_duplicate(self):
+        copy = Article.objects.create(
+            title='Judul Lain Sama Sekali', content=self._edited(self.original.content), author=self.author
+        )
+        self.assertEqual(fingerprint.duplicate_of(copy), self.original)
+        self.assertIsNone(fingerprint.duplicate_of(self.original))
+        other = Article.objects.create(title='Berbeda', content=_random_text(5), author=self.author)
+        self.assertIsNone(fingerprint.duplicate_of(other))
+
+    def test_lookup_is_one_indexed_query(self):
+        Article.objects.bulk_create([
+            Article(title=f'Artikel {i}', content=_random_text(100 + i), author=self.author) for i in range(50)
+        ])
+        call_command('rebuild_fingerprints', stdout=StringIO())
+        sig = fingerprint.signature(self._edited(self.original.content))
+        with self.assertNumQueries(1):
+            matches = fingerprint.find_near_duplicates({'baru': sig})
+        self.assertEqual(matches['baru'][0], self.original.pk)
+
+    def test_create_flutter_reports_near_duplicate(self):
+        self.client.force_login(self.author)
+        response = self.client.post(
+            reverse('news:create_article_flutter'),
+            data=json.dumps({'title': 'Salinan', 'content': self.original.content, 'category': 'sepakbola'}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()['near_duplicate'], {'id': str(self.original.pk), 'title': self.original.title}
+        )
+
+        response = self.client.post(
+            reverse('news:create_article_flutter'),
+            data=json.dumps({'title': 'Asli', 'content': _random_text(9), 'category': 'f1'}),
+            content_type='application/json',
+        )
+        self.assertIsNone(response.json()['near_duplicate'])
+
+    def test_create_view_warns(self):
+        self.client.force_login(self.author)
+        response = self.client.post(reverse('news:article-create'), {
+            'title': 'Salinan Form', 'content': self._edited(self.original.content), 'category': 'sepakbola',
+        }, follow=True)
+        self.assertTrue(Article.objects.filter(title='Salinan Form').exists())
+        self.assertIn(self.original.title, ' '.join(str(m) for m in response.context['messages']))
+
+    def _import(self, rows, *args):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        path = os.path.join(tmpdir, 'articles.csv')
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=['title', 'content', 'category'])
+            writer.writeheader()
+            writer.writerows(rows)
+        out = StringIO()
+        call_command('populate_articles_from_csv', '--file', path, *args, stdout=out, stderr=StringIO())
+        return out.getvalue()
+
+    def test_importer_skips_near_duplicates(self):
+        rows = [
+            {'title': 'Headline Diubah', 'content': self._edited(self.original.content), 'category': 'sepakbola'},
+            {'title': 'Baru A', 'content': _random_text(20), 'category': 'f1'},
+            # Duplikat dari baris sebelumnya di file yang sama
+            {'title': 'Baru A (update)', 'content': self._edited(_random_text(20)), 'category': 'f1'},
+        ]
+        out = self._import(rows)
+        self.assertIn('1 artikel baru ditambahkan', out)
+        self.assertIn('2 dilewati (duplikat, 2 hampir sama)', out)
+        self.assertFalse(Article.objects.filter(title__in=['Headline Diubah', 'Baru A (update)']).exists())
+        self.assertTrue(ArticleFingerprint.objects.filter(article__title='Baru A').exists())
+
+    def test_importer_flag_mode(self):
+        rows = [
+            {'title': 'Baru B', 'content': _random_text(30), 'category': 'f1'},
+            {'title': 'Headline Diubah', 'content': self._edited(self.original.content), 'category': 'sepakbola'},
+            {'title': 'Baru B lagi', 'content': _random_text(30), 'category': 'f1'},
+        ]
+        self._import(rows, '--near-duplicates', 'flag', '--batch-size', '2')
+        self.assertEqual(fingerprint.duplicate_of(Article.objects.get(title='Headline Diubah')), self.original)
+        self.assertEqual(
+            fingerprint.duplicate_of(Article.objects.get(title='Baru B lagi')), Article.objects.get(title='Baru B')
+        )
+        self.assertIsNone(fingerprint.duplicate_of(Article.objects.get(title='Baru B')))
+
+    def test_rebuild_fingerprints(self):
+        Article.objects.bulk_create([
+            Article(title='Lama 1', content=_random_text(40), author=self.author),
+            Article(title='Lama 2', content=_random_text(40), author=self.author),
+        ])
+        out = StringIO()
+        call_command('rebuild_fingerprints', stdout=out)
+        self.assertIn('3 artikel di-fingerprint, 1 ditandai', out.getvalue())
+        self.assertEqual(
+            fingerprint.duplicate_of(Article.objects.get(title='Lama 2')), Article.objects.get(title='Lama 1')
+        )
+
+    def test_rebuild_fingerprints_replaces_per_batch(self):
+        Article.objects.bulk_create([
+            Article(title=f'Lama {i}', content=_random_text(40), author=self.author) for i in range(4)
+        ] + [Article(title='Pendek', content='singkat', author=self.author)])
+        pendek = Article.objects.get(title='Pendek')
+        # Fingerprint basi dari konten lama artikel yang sekarang terlalu pendek
+        fingerprint.save_fingerprints(
+            [fingerprint.make_fingerprint(pendek.pk, fingerprint.signature(_random_text(40)), None)], replace=False
+        )
+        call_command('rebuild_fingerprints', '--batch-size', '2', stdout=StringIO())
+        self.assertFalse(ArticleFingerprint.objects.filter(article=pendek).exists())
+        self.assertEqual(ArticleFingerprint.objects.count(), 5)
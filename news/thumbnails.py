@@ -0,0 +1,152 @@
+"""
+Varian thumbnail (resize + recompress) untuk gambar artikel dan foto profil.
+
+Gambar asli diambil lewat cache image proxy, diperkecil ke salah satu lebar
+di ``WIDTHS`` lalu disimpan sebagai JPEG/WebP di ``THUMBNAIL_VARIANT_DIR``.
+URL varian ditandatangani (``django.core.signing``) supaya endpoint tidak bisa
+dipakai untuk me-resize URL sembarang.
+
+Settings (opsional):
+    THUMBNAIL_VARIANT_DIR  default MEDIA_ROOT/thumbnails
+    THUMBNAIL_PREWARM      buat varian artikel di background saat disimpan (default True)
+"""
+import hashlib
+import logging
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core import signing
+from django.db import transaction
+from django.urls import reverse
+from PIL import Image, ImageOps
+
+from . import image_proxy
+
+logger = logging.getLogger(__name__)
+
+WIDTHS = (160, 320, 640, 1024)
+FORMATS = {
+    'jpeg': ('JPEG', 'image/jpeg'),
+    'webp': ('WEBP', 'image/webp'),
+}
+DEFAULT_FORMAT = 'jpeg'
+QUALITY = 80
+# Lebar yang dipakai template/JSON untuk thumbnail artikel
+PREWARM_WIDTHS = (320, 640, 1024)
+SIGNING_SALT = 'news.thumbnails'
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='thumbnail-prewarm')
+
+
+class ThumbnailError(Exception):
+    pass
+
+
+def get_variant_dir():
+    return getattr(settings, 'THUMBNAIL_VARIANT_DIR', os.path.join(settings.MEDIA_ROOT, 'thumbnails'))
+
+
+def bucket_width(width):
+    """Bucket terkecil yang >= ``width`` (atau bucket terbesar)."""
+    for bucket in WIDTHS:
+        if width <= bucket:
+            return bucket
+    return WIDTHS[-1]
+
+
+def variant_url(source_url, width, fmt=DEFAULT_FORMAT):
+    """URL bertanda tangan untuk varian ``source_url``; '' jika tidak ada gambar."""
+    if not source_url:
+        return ''
+    if fmt not in FORMATS:
+        fmt = DEFAULT_FORMAT
+    token = signing.Signer(salt=SIGNING_SALT).sign_object(
+        {'u': source_url, 'w': bucket_width(int(width)), 'f': fmt}
+    )
+    return reverse('news:thumbnail', args=[token])
+
+
+def absolute_variant_urls(request, source_url, widths=PREWARM_WIDTHS, fmt=DEFAULT_FORMAT):
+    """``{"320": url, ...}`` absolut untuk feed JSON; {} jika tidak ada gambar."""
+    if not source_url:
+        return {}
+    return {
+        str(width): request.build_absolute_uri(variant_url(source_url, width, fmt))
+        for width in widths
+    }
+
+
+def parse_token(token):
+    """Return ``(source_url, width, fmt)``; raise ``signing.BadSignature`` jika palsu."""
+    data = signing.Signer(salt=SIGNING_SALT).unsign_object(token)
+    width, fmt = data['w'], data['f']
+    if width not in WIDTHS or fmt not in FORMATS:
+        raise signing.BadSignature('Invalid variant')
+    return data['u'], width, fmt
+
+
+def _variant_path(source_url, width, fmt):
+    digest = hashlib.sha256(source_url.encode('utf-8')).hexdigest()
+    return os.path.join(get_variant_dir(), digest[:2], f'{digest}-{width}.{fmt}')
+
+
+def get_variant(source_url, width, fmt=DEFAULT_FORMAT):
+    """Return ``(path, content_type)`` varian, membuatnya dulu jika belum ada."""
+    path = _variant_path(source_url, width, fmt)
+    pil_format, content_type = FORMATS[fmt]
+    if os.path.exists(path):
+        return path, content_type
+
+    original_path, _ = image_proxy.fetch(source_url)
+    try:
+        with Image.open(original_path) as img:
+            img = ImageOps.exif_transpose(img)
+            if img.mode not in ('RGB', 'L'):
+                # JPEG tidak punya alpha: tempel di atas latar putih
+                img = img.convert('RGBA')
+                background = Image.new('RGB', img.size, (255, 255, 255))
+                background.paste(img, mask=img.getchannel('A'))
+                img = background
+            if img.width > width:
+                height = max(1, round(img.height * width / img.width))
+                img = img.resize((width, height), Image.LANCZOS)
+
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+            try:
+                with os.fdopen(fd, 'wb') as tmp:
+                    img.save(tmp, pil_format, quality=QUALITY, optimize=True)
+                os.replace(tmp_path, path)
+            except BaseException:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                raise
+    except (OSError, Image.DecompressionBombError) as e:
+        raise ThumbnailError(f'Cannot create thumbnail: {e}')
+    return path, content_type
+
+
+def prewarm(source_url, widths=PREWARM_WIDTHS, fmt=DEFAULT_FORMAT):
+    for width in widths:
+        try:
+            get_variant(source_url, width, fmt)
+        except Exception:
+            logger.warning("Gagal membuat thumbnail %s (%spx)", source_url, width, exc_info=True)
+
+
+def schedule_prewarm(source_url):
+    """Buat varian di background setelah transaksi commit."""
+    if not source_url or not getattr(settings, 'THUMBNAIL_PREWARM', True):
+        return
+    transaction.on_commit(lambda: _executor.submit(prewarm, source_url))
+
+
+def prewarm_article_thumbnail(sender, instance, created, update_fields=None, **kwargs):
+    """Receiver post_save Article."""
+    if update_fields is not None and 'thumbnail' not in update_fields:
+        return
+    schedule_prewarm(instance.thumbnail)
@@ -0,0 +1,170 @@
+"""
+Skor trending artikel: views dan komentar yang meluruh eksponensial
+(half-life ``TRENDING_HALF_LIFE_HOURS``).
+
+Alih-alih mengalikan semua skor dengan faktor peluruhan setiap kali job
+jalan, setiap aktivitas dengan bobot ``w`` pada waktu ``t`` disimpan sebagai
+``w * 2 ** ((t - EPOCH) / half_life)`` ("forward decay"). Semua skor meluruh
+dengan faktor yang sama, jadi urutannya tetap benar tanpa menyentuh baris
+lama; nilai sebenarnya saat ini cukup dibagi ``2 ** ((now - EPOCH) / half_life)``.
+Supaya tidak overflow, yang disimpan di ``TrendingScore.score`` adalah log2-nya.
+
+- Artikel baru langsung dapat baris (bobot ``CREATED_WEIGHT`` di ``created_at``)
+  lewat signal post_save, jadi selalu ikut urutan trending.
+- ``refresh()`` (command ``update_trending``, jalankan berkala mis. via cron
+  tiap 5 menit) hanya memproses artikel yang views/komentarnya bertambah sejak
+  run sebelumnya. Tambahan views dicatat pada waktu job berjalan.
+- Halaman "hot" membaca top-N langsung dari index ``news_trending_score_idx``.
+
+Settings (opsional):
+    TRENDING_HALF_LIFE_HOURS  default 24
+"""
+import math
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Max, Q
+from django.utils import timezone
+
+from . import feed_versions
+from .models import Article, TrendingScore
+
+EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+VIEW_WEIGHT = 1.0
+COMMENT_WEIGHT = 5.0
+# Bonus kesegaran: artikel baru setara beberapa view saat dipublikasikan
+CREATED_WEIGHT = 10.0
+
+
+def get_half_life():
+    """Half-life dalam detik."""
+    return getattr(settings, 'TRENDING_HALF_LIFE_HOURS', 24) * 3600
+
+
+def _log_weight(weight, when):
+    return math.log2(weight) + (when - EPOCH).total_seconds() / get_half_life()
+
+
+def _log_add(a, b):
+    """log2(2**a + 2**b) tanpa overflow."""
+    if a is None:
+        return b
+    high, low = max(a, b), min(a, b)
+    return high + math.log2(1 + 2 ** (low - high))
+
+
+def current_score(log_score, now=None):
+    """Nilai skor yang sudah diluruhkan ke waktu ``now`` (untuk ditampilkan)."""
+    if log_score is None:
+        return 0.0
+    now = now or timezone.now()
+    exponent = log_score - (now - EPOCH).total_seconds() / get_half_life()
+    # Skor yang sudah sangat kecil dianggap 0 (hindari underflow warning)
+    return 2 ** exponent if exponent > -1000 else 0.0
+
+
+def _score(log_score, created_at, new_views, new_comments, now):
+    if log_score is None:
+        # Artikel belum punya baris (data lama): anggap aktivitasnya terjadi saat dipublikasikan
+        log_score = _log_weight(CREATED_WEIGHT, created_at)
+        when = created_at
+    else:
+        when = now
+    if new_views > 0:
+        log_score = _log_add(log_score, _log_weight(new_views * VIEW_WEIGHT, when))
+    if new_comments > 0:
+        log_score = _log_add(log_score, _log_weight(new_comments * COMMENT_WEIGHT, when))
+    return log_score
+
+
+def seed_articles(articles):
+    """Baris awal untuk artikel baru (dipakai signal dan import CSV)."""
+    TrendingScore.objects.bulk_create([
+        TrendingScore(
+            article_id=article.pk,
+            score=_score(None, article.created_at, article.news_views, 0, article.created_at),
+            views_seen=article.news_views,
+            # updated_at = waktu terakhir job refresh memproses artikel ini, bukan waktu seeding
+            updated_at=EPOCH,
+        )
+        for article in articles
+    ], ignore_conflicts=True)
+
+
+def seed_article(sender, instance, created, raw=False, **kwargs):
+    """Receiver post_save Article."""
+    if not created or raw:
+        return
+    seed_articles([instance])
+
+
+def _changed_article_ids(full):
+    if full:
+        return Article.objects.values_list('pk', flat=True)
+    changed = Q(trending__isnull=True) | Q(news_views__gt=F('trending__views_seen'))
+    last_run = TrendingScore.objects.aggregate(last=Max('updated_at'))['last']
+    if last_run:
+        changed |= Q(pk__in=Article.objects.filter(forum__posts__created_at__gte=last_run).values('pk'))
+    return Article.objects.filter(changed).values_list('pk', flat=True)
+
+
+def refresh(full=False, batch_size=500, now=None):
+    """
+    Hitung ulang skor artikel yang punya views/komentar baru. Dengan
+    ``full=True`` semua skor dibangun ulang dari awal (mis. setelah bobot atau
+    half-life diganti). Return jumlah artikel yang diperbarui.
+    """
+    now = now or timezone.now()
+    ids = list(_changed_article_ids(full))
+    updated = 0
+    for start in range(0, len(ids), batch_size):
+        rows = (
+            Article.objects.filter(pk__in=ids[start:start + batch_size])
+            .annotate(comment_count=Count('forum__posts'))
+            .values_list(
+                'pk', 'created_at', 'news_views', 'comment_count',
+                'trending__score', 'trending__views_seen', 'trending__comments_seen',
+            )
+        )
+        batch = []
+        for pk, created_at, views, comments, log_score, views_seen, comments_seen in rows:
+            if full or log_score is None:
+                log_score, views_seen, comments_seen = None, 0, 0
+            batch.append(TrendingScore(
+                article_id=pk,
+                score=_score(log_score, created_at, views - views_seen, comments - comments_seen, now),
+                views_seen=views,
+                comments_seen=comments,
+                updated_at=now,
+            ))
+
+        with transaction.atomic():
+            existing = set(
+                TrendingScore.objects.filter(article_id__in=[s.article_id for s in batch])
+                .values_list('article_id', flat=True)
+            )
+            TrendingScore.objects.bulk_create([s for s in batch if s.article_id not in existing])
+            TrendingScore.objects.bulk_update(
+                [s for s in batch if s.article_id in existing],
+                ['score', 'views_seen', 'comments_seen', 'updated_at'],
+            )
+        updated += len(batch)
+
+    if updated:
+        # Urutan ?sort=trending dan sidebar (ETag forum juga memakai versi news)
+        feed_versions.bump(feed_versions.NEWS)
+    return updated
+
+
+def order_by_trending(queryset):
+    """Urutkan queryset Article dari yang paling trending."""
+    return queryset.order_by(F('trending__score').desc(nulls_last=True), '-created_at', '-id')
+
+
+def top_articles(limit, exclude=None):
+    """Top-``limit`` artikel trending, dibaca langsung dari index skor."""
+    rows = TrendingScore.objects.select_related('article__author').order_by('-score', '-article')
+    if exclude is not None:
+        rows = rows.exclude(article_id=exclude)
+    return [row.article for row in rows[:limit]]
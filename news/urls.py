@@ -8,6 +8,10 @@ urlpatterns = [
     
     path('new/', views.ArticleCreateView.as_view(), name='article-create'),
     
+    path('grid/', views.article_grid, name='article-grid'),
+    path('search/', views.search_view, name='article-search'),
+    path('search/json/', views.search_json, name='search_json'),
+    
     path('<uuid:pk>/', views.ArticleDetailView.as_view(), name='article-detail'),
     
     path('<uuid:pk>/edit/', views.ArticleUpdateView.as_view(), name='article-update'),
@@ -15,6 +19,7 @@ urlpatterns = [
     path('<uuid:pk>/delete/', views.ArticleDeleteView.as_view(), name='article-delete'),
     
     path('proxy-image/', views.proxy_image, name='proxy_image'),
+    path('thumb/<str:token>/', views.thumbnail, name='thumbnail'),
     
     path('json/', views.show_json, name='show_json'), 
     path('json/<str:id>/', views.show_json_by_id, name='show_json_by_id'),
@@ -0,0 +1,261 @@
+"""
+Write-behind counter untuk views (Article.news_views & Event.event_views).
+
+Halaman detail tidak lagi menulis ke database: setiap hit hanya dicatat di
+buffer (lokal per-proses atau cache bersama). Buffer di-flush setelah response
+selesai dikirim (signal ``request_finished``) jika sudah lewat
+``VIEW_COUNTER_FLUSH_INTERVAL`` detik atau sudah terkumpul
+``VIEW_COUNTER_FLUSH_HITS`` hit. Flush menggabungkan hit per objek lalu
+menjalankan satu UPDATE ``F() + n`` untuk setiap kelompok objek dengan jumlah
+hit yang sama.
+
+Settings (semuanya opsional):
+    VIEW_COUNTER_BACKEND         'local' (default) atau 'cache'
+    VIEW_COUNTER_FLUSH_INTERVAL  detik antar flush (default 10)
+    VIEW_COUNTER_FLUSH_HITS      jumlah hit sebelum flush (default 100)
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+# Model yang didukung -> nama field counter-nya
+VIEW_FIELDS = {
+    'news.article': 'news_views',
+    'event.event': 'event_views',
+}
+
+CACHE_KEY_PREFIX = 'viewcount'
+
+logger = logging.getLogger(__name__)
+
+
+def _cache_key(label, pk):
+    return f"{CACHE_KEY_PREFIX}:{label}:{pk}"
+
+
+class LocalViewBuffer:
+    """Buffer in-memory per proses (aman untuk banyak thread)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = defaultdict(int)
+        self.hits = 0
+
+    def record(self, label, pk, amount=1):
+        with self._lock:
+            self._counts[(label, str(pk))] += amount
+            self.hits += amount
+
+    def drain(self):
+        with self._lock:
+            counts, self._counts = self._counts, defaultdict(int)
+            self.hits = 0
+        return dict(counts)
+
+    def restore(self, counts):
+        for (label, pk), amount in counts.items():
+            self.record(label, pk, amount)
+
+
+class CacheViewBuffer:
+    """
+    Buffer di Django cache, dipakai bersama oleh semua worker.
+    Counter disimpan per objek dengan ``cache.incr``; proses ini hanya
+    mengingat key mana yang pernah ia sentuh. Key yang tertinggal (mis. worker
+    mati sebelum flush) diambil oleh command ``reconcile_view_counts``.
+
+    Supaya command itu tidak perlu memeriksa semua pk, setiap counter yang naik
+    dari 0 dicatat di jurnal dirty bersama: ``viewcount:dirty:seq`` adalah
+    nomor urut (``incr``) dan ``viewcount:dirty:<n>`` berisi ``(label, pk)``.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._dirty = set()
+        self.hits = 0
+
+    def record(self, label, pk, amount=1):
+        key = _cache_key(label, pk)
+        cache.add(key, 0, timeout=None)
+        try:
+            count = cache.incr(key, amount)
+        except ValueError:
+            # Key hilang di antara add() dan incr() (evicted)
+            cache.set(key, amount, timeout=None)
+            count = amount
+        if count == amount:
+            # Counter baru saja naik dari 0: catat di jurnal
+            mark_dirty(label, pk)
+        with self._lock:
+            self._dirty.add((label, str(pk)))
+            self.hits += amount
+
+    def drain(self, keys=None):
+        if keys is None:
+            with self._lock:
+                keys, self._dirty = self._dirty, set()
+                self.hits = 0
+        keys = list(keys)
+        if not keys:
+            return {}
+
+        cache_keys = {_cache_key(label, pk): (label, pk) for label, pk in keys}
+        values = cache.get_many(list(cache_keys))
+        counts = {}
+        for cache_key, amount in values.items():
+            if not amount:
+                continue
+            # decr (bukan delete) supaya hit yang masuk selama flush tidak hilang
+            try:
+                left = cache.decr(cache_key, amount)
+            except ValueError:
+                left = 0
+            if left > 0:
+                # Hit yang masuk selama flush tidak dicatat ulang oleh record(); catat di jurnal
+                mark_dirty(*cache_keys[cache_key])
+            counts[cache_keys[cache_key]] = amount
+        return counts
+
+    def restore(self, counts):
+        for (label, pk), amount in counts.items():
+            self.record(label, pk, amount)
+
+
+DIRTY_SEQ_KEY = f"{CACHE_KEY_PREFIX}:dirty:seq"
+DIRTY_DONE_KEY = f"{CACHE_KEY_PREFIX}:dirty:done"
+
+
+def _dirty_key(seq):
+    return f"{CACHE_KEY_PREFIX}:dirty:{seq}"
+
+
+def mark_dirty(label, pk):
+    """Catat ``(label, pk)`` di jurnal dirty (backend cache)."""
+    cache.add(DIRTY_SEQ_KEY, 0, timeout=None)
+    try:
+        seq = cache.incr(DIRTY_SEQ_KEY)
+    except ValueError:
+        return
+    cache.set(_dirty_key(seq), (label, str(pk)), timeout=None)
+
+
+def dirty_batches(batch_size=1000):
+    """
+    Keluarkan entri jurnal dirty yang belum diproses, per batch list
+    ``(label, pk)``. Entri yang hilang (evicted, atau ``set`` penulisnya belum
+    selesai) dilewati: worker penulisnya masih hidup dan mem-flush key itu sendiri.
+    """
+    done = cache.get(DIRTY_DONE_KEY, 0)
+    end = cache.get(DIRTY_SEQ_KEY, 0)
+    if end < done:
+        # Nomor urut hilang dari cache dan mulai lagi dari 0
+        done = 0
+    for start in range(done + 1, end + 1, batch_size):
+        seqs = range(start, min(start + batch_size, end + 1))
+        entries = cache.get_many([_dirty_key(seq) for seq in seqs])
+        yield list(set(entries.values()))
+        cache.delete_many(list(entries))
+        cache.set(DIRTY_DONE_KEY, seqs[-1], timeout=None)
+
+
+_buffers = {}
+_buffers_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def get_buffer():
+    backend = getattr(settings, 'VIEW_COUNTER_BACKEND', 'local')
+    with _buffers_lock:
+        if backend not in _buffers:
+            if backend == 'cache':
+                _buffers[backend] = CacheViewBuffer()
+            elif backend == 'local':
+                _buffers[backend] = LocalViewBuffer()
+            else:
+                raise ValueError(f"VIEW_COUNTER_BACKEND tidak dikenal: {backend!r}")
+        return _buffers[backend]
+
+
+def record_view(instance):
+    """
+    Catat satu view untuk ``instance`` tanpa query ke database.
+    Field counter di instance ikut dinaikkan agar halaman menampilkan angka
+    yang sudah termasuk hit ini.
+    """
+    label = instance._meta.label_lower
+    field = VIEW_FIELDS[label]
+    get_buffer().record(label, instance.pk)
+    setattr(instance, field, (getattr(instance, field) or 0) + 1)
+
+
+def apply_counts(counts):
+    """
+    Tulis counts ``{(label, pk): n}`` ke database.
+    Objek dengan n yang sama digabung ke satu UPDATE ... SET f = f + n.
+    """
+    grouped = defaultdict(lambda: defaultdict(list))
+    for (label, pk), amount in counts.items():
+        if amount:
+            grouped[label][amount].append(pk)
+
+    updated = 0
+    with transaction.atomic():
+        for label, by_amount in grouped.items():
+            model = apps.get_model(label)
+            field = VIEW_FIELDS[label]
+            for amount, pks in by_amount.items():
+                updated += model.objects.filter(pk__in=pks).update(
+                    **{field: F(field) + amount}
+                )
+    # Sengaja tanpa feed_versions.bump(): flush tiap beberapa detik akan membuat
+    # feed hampir tidak pernah 304. Angka views di feed ikut terbarui pada perubahan berikutnya.
+    return updated
+
+
+def flush_views(buffer=None):
+    """Kosongkan buffer ke database. Return jumlah hit yang ditulis."""
+    global _last_flush
+    buffer = buffer or get_buffer()
+    _last_flush = time.monotonic()
+    counts = buffer.drain()
+    if not counts:
+        return 0
+    try:
+        apply_counts(counts)
+    except Exception:
+        # Jangan buang hit kalau DB sedang bermasalah; coba lagi di flush berikutnya
+        buffer.restore(counts)
+        raise
+    return sum(counts.values())
+
+
+def maybe_flush(**kwargs):
+    """Receiver ``request_finished``: flush jika interval/jumlah hit terlampaui."""
+    buffer = get_buffer()
+    if not buffer.hits:
+        return
+    interval = getattr(settings, 'VIEW_COUNTER_FLUSH_INTERVAL', 10)
+    max_hits = getattr(settings, 'VIEW_COUNTER_FLUSH_HITS', 100)
+    if buffer.hits >= max_hits or time.monotonic() - _last_flush >= interval:
+        try:
+            flush_views(buffer)
+        except Exception:
+            logger.exception("Gagal flush view counter")
+
+
+def _flush_at_exit():
+    try:
+        flush_views()
+    except Exception:
+        logger.exception("Gagal flush view counter saat shutdown")
+
+
+atexit.register(_flush_at_exit)
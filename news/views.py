@@ -11,13 +11,22 @@ from django.views.generic import (
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from .models import Article
 from django.template.loader import render_to_string
-from django.http import JsonResponse, HttpResponseRedirect, HttpResponse 
+from django.http import JsonResponse, HttpResponseRedirect, HttpResponse, FileResponse
+from django.utils.cache import patch_cache_control
 from django.contrib import messages
 from django.contrib.messages.views import SuccessMessageMixin
 import requests
 from django.core import serializers
 from django.views.decorators.csrf import csrf_exempt
 import json
+import uuid
+from datetime import datetime
+from django.db.models import Q
+from .pagination import InvalidCursor, decode_cursor, encode_cursor, parse_limit
+from django.views.decorators.http import condition
+from . import feed_versions, fingerprint, grid_cache, image_proxy, search, thumbnails, trending
+from django.core import signing
+from django.http import Http404
 
 
 # --- View Landing page ---
@@ -26,7 +35,7 @@ class LandingPageView(TemplateView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['hottest_articles'] = Article.objects.order_by('-created_at')[:3]
+        context['hottest_articles'] = trending.top_articles(3)
         return context
 
 
@@ -38,18 +47,28 @@ class ArticleListView(ListView):
     paginate_by = 9 
 
     def get_queryset(self):
-        queryset = super().get_queryset().order_by('-created_at')
+        queryset = super().get_queryset().order_by('-created_at', '-id')
         category = self.request.GET.get('category')
         if category:
             queryset = queryset.filter(category=category)
+        if self.request.GET.get('sort') == 'trending':
+            queryset = trending.order_by_trending(queryset)
         return queryset
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['categories'] = Article.CATEGORY_CHOICES
         context['current_category'] = self.request.GET.get('category')
+        context['current_sort'] = self.request.GET.get('sort')
+        context['grid_next'] = self._grid_next(context['page_obj'])
         return context
 
+    def _grid_next(self, page_obj):
+        # Cursor "muat lebih banyak" hanya untuk urutan terbaru (keyset created_at, id)
+        if self.request.GET.get('sort') == 'trending' or not page_obj or not page_obj.has_next():
+            return None
+        return _created_cursor(page_obj.object_list[len(page_obj.object_list) - 1])
+
     def get(self, request, *args, **kwargs):
         is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest' or request.GET.get('ajax') == 'true'
 
@@ -62,6 +81,8 @@ class ArticleListView(ListView):
                 'articles': page_obj.object_list,
                 'page_obj': page_obj, 
                 'is_paginated': page_obj.has_other_pages(),
+                'grid_next': self._grid_next(page_obj),
+                'current_category': request.GET.get('category'),
             }
 
             html = render_to_string(
@@ -95,6 +116,9 @@ class ArticleCreateView(SuccessMessageMixin, LoginRequiredMixin, CreateView):
     def form_valid(self, form):
         form.instance.author = self.request.user
         response = super().form_valid(form)
+        similar = fingerprint.duplicate_of(self.object)
+        if similar:
+            messages.warning(self.request, f"Isi artikel ini sangat mirip dengan artikel '{similar.title}'.")
         return response
 
 
@@ -143,48 +167,223 @@ def proxy_image(request):
         return HttpResponse('No URL provided', status=400)
     
     try:
-        # Fetch image from external source
-        response = requests.get(image_url, timeout=10)
-        response.raise_for_status()
-        
-        # Return the image with proper content type
-        return HttpResponse(
-            response.content,
-            content_type=response.headers.get('Content-Type', 'image/jpeg')
-        )
-    except requests.RequestException as e:
+        # Ambil dari cache disk (download sekali jika belum ada)
+        path, content_type = image_proxy.fetch(image_url)
+        response = FileResponse(open(path, 'rb'), content_type=content_type)
+    except (requests.RequestException, image_proxy.ImageProxyError, OSError) as e:
         return HttpResponse(f'Error fetching image: {str(e)}', status=500)
+
+    patch_cache_control(response, public=True, max_age=image_proxy.get_max_age(), immutable=True)
+    return response
+
+def thumbnail(request, token):
+    try:
+        source_url, width, fmt = thumbnails.parse_token(token)
+    except (signing.BadSignature, KeyError, TypeError, ValueError):
+        raise Http404("Thumbnail tidak ditemukan")
+
+    try:
+        path, content_type = thumbnails.get_variant(source_url, width, fmt)
+        response = FileResponse(open(path, 'rb'), content_type=content_type)
+    except (requests.RequestException, image_proxy.ImageProxyError, thumbnails.ThumbnailError, OSError):
+        # Gagal membuat varian: arahkan ke gambar asli
+        return HttpResponseRedirect(source_url)
+
+    patch_cache_control(response, public=True, max_age=image_proxy.get_max_age(), immutable=True)
+    return response
     
-def show_json(request):
-    data = Article.objects.all()
-    list_articles = []
-    
-    for item in data:
+def _serialize_article(item, request):
+    pfp_url = ""
+    try:
+        if hasattr(item.author, 'userprofile'):
+            pfp_url = item.author.userprofile.profile_picture or ""
+    except Exception as e:
         pfp_url = ""
-        try:
-            if hasattr(item.author, 'userprofile'):
-                pfp_url = item.author.userprofile.profile_picture or ""
-        except Exception as e:
-            pfp_url = ""
 
-        list_articles.append({
-            "model": "news.article",
-            "pk": str(item.pk),
-            "fields": {
-                "title": item.title,
-                "content": item.content,
-                "thumbnail": item.thumbnail,
-                "category": item.category,
-                "author": item.author.username if item.author else "Anonymous",
-                "author_pfp": pfp_url, 
-                "news_views": item.news_views,
-                "created_at": item.created_at.isoformat(),
+    return {
+        "model": "news.article",
+        "pk": str(item.pk),
+        "fields": {
+            "title": item.title,
+            "content": item.content,
+            "thumbnail": item.thumbnail,
+            "thumbnail_variants": thumbnails.absolute_variant_urls(request, item.thumbnail),
+            "category": item.category,
+            "author": item.author.username if item.author else "Anonymous",
+            "author_pfp": pfp_url, 
+            "author_pfp_small": thumbnails.absolute_variant_urls(request, pfp_url, widths=[160]).get("160", ""),
+            "news_views": item.news_views,
+            "created_at": item.created_at.isoformat(),
+        }
+    }
+
+def _created_cursor(article):
+    return encode_cursor([article.created_at.isoformat(), article.pk])
+
+def _after_created_cursor(queryset, after):
+    """Filter baris setelah cursor (created_at, id); raise InvalidCursor jika rusak."""
+    try:
+        created_at, pk = decode_cursor(after, 2)
+        created_at = datetime.fromisoformat(created_at)
+        pk = uuid.UUID(pk)
+    except (TypeError, ValueError) as e:
+        raise InvalidCursor(str(e))
+    return queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+
+def _show_json_etag(request):
+    # Host ikut masuk karena URL thumbnail di payload bersifat absolut
+    return feed_versions.make_etag([feed_versions.NEWS], request.get_host(), request.GET.urlencode())
+
+def _show_json_last_modified(request):
+    return feed_versions.last_modified([feed_versions.NEWS])
+
+@condition(etag_func=_show_json_etag, last_modified_func=_show_json_last_modified)
+def show_json(request):
+    sort_trending = request.GET.get('sort') == 'trending'
+
+    # Tanpa ?limit / ?after -> bentuk lama (list semua artikel) untuk kompatibilitas
+    if 'limit' not in request.GET and 'after' not in request.GET:
+        data = Article.objects.select_related('author__userprofile')
+        if sort_trending:
+            data = trending.order_by_trending(data)
+        list_articles = [_serialize_article(item, request) for item in data]
+        return JsonResponse(list_articles, safe=False)
+
+    limit = parse_limit(request.GET.get('limit'))
+    after = request.GET.get('after')
+    if sort_trending:
+        # Keyset di atas (skor trending, id) memakai index news_trending_score_idx
+        queryset = (
+            Article.objects.select_related('author__userprofile', 'trending')
+            .filter(trending__isnull=False)
+            .order_by('-trending__score', '-id')
+        )
+        if after:
+            try:
+                score, pk = decode_cursor(after, 2)
+                score = float(score)
+                pk = uuid.UUID(pk)
+            except (InvalidCursor, TypeError, ValueError):
+                return JsonResponse({"error": "Cursor tidak valid"}, status=400)
+            queryset = queryset.filter(
+                Q(trending__score__lt=score) | Q(trending__score=score, id__lt=pk)
+            )
+    else:
+        # Keyset pagination di atas (created_at, id), urutan terbaru dulu
+        queryset = Article.objects.select_related('author__userprofile').order_by('-created_at', '-id')
+        if after:
+            try:
+                queryset = _after_created_cursor(queryset, after)
+            except InvalidCursor:
+                return JsonResponse({"error": "Cursor tidak valid"}, status=400)
+
+    items = list(queryset[:limit + 1])
+    has_next = len(items) > limit
+    items = items[:limit]
+
+    next_cursor = None
+    if has_next:
+        last = items[-1]
+        if sort_trending:
+            next_cursor = encode_cursor([last.trending.score, last.pk])
+        else:
+            next_cursor = _created_cursor(last)
+
+    return JsonResponse({
+        "results": [_serialize_article(item, request) for item in items],
+        "next": next_cursor,
+    })
+
+GRID_MAX_LIMIT = 36
+
+def article_grid(request):
+    """
+    "Muat lebih banyak" untuk grid artikel: ``?after=<cursor>&category=&limit=``.
+    Return JSON ``{"html": kartu-kartu, "next": cursor}``; fragmen di-cache
+    per (kategori, cursor, limit), lihat news/grid_cache.py.
+    """
+    category = request.GET.get('category') or None
+    after = request.GET.get('after') or None
+    limit = parse_limit(request.GET.get('limit'), default=ArticleListView.paginate_by, maximum=GRID_MAX_LIMIT)
+
+    key = grid_cache.make_key(category, after, limit)
+    cached = grid_cache.get_fragment(key)
+    if cached is None:
+        queryset = Article.objects.select_related('author').order_by('-created_at', '-id')
+        if category:
+            queryset = queryset.filter(category=category)
+        if after:
+            try:
+                queryset = _after_created_cursor(queryset, after)
+            except InvalidCursor:
+                return JsonResponse({"error": "Cursor tidak valid"}, status=400)
+
+        items = list(queryset[:limit + 1])
+        next_cursor = _created_cursor(items[limit - 1]) if len(items) > limit else None
+        html = render_to_string('news/_article_cards.html', {'articles': items[:limit]})
+        cached = (html, next_cursor)
+        grid_cache.set_fragment(key, html, next_cursor)
+
+    html, next_cursor = cached
+    return JsonResponse({'html': html, 'next': next_cursor})
+
+SEARCH_PAGE_SIZE = 10
+
+def _run_search(request):
+    """Return ``(query, page, hits, has_next)`` untuk ``?q=&page=&category=``."""
+    query = request.GET.get('q', '').strip()
+    try:
+        page = max(1, int(request.GET.get('page', 1)))
+    except (TypeError, ValueError):
+        page = 1
+    if not query:
+        return query, page, [], False
+
+    queryset = None
+    category = request.GET.get('category')
+    if category:
+        queryset = Article.objects.filter(category=category)
+    # Ambil satu baris ekstra untuk tahu masih ada halaman berikutnya
+    hits = search.search(query, limit=SEARCH_PAGE_SIZE + 1, offset=(page - 1) * SEARCH_PAGE_SIZE, queryset=queryset)
+    return query, page, hits[:SEARCH_PAGE_SIZE], len(hits) > SEARCH_PAGE_SIZE
+
+def search_view(request):
+    query, page, hits, has_next = _run_search(request)
+    results = [
+        {'article': article, 'score': score, 'snippet': search.highlight(article.content, query)}
+        for article, score in hits
+    ]
+    return render(request, 'news/search.html', {
+        'query': query,
+        'results': results,
+        'page': page,
+        'has_next': has_next,
+        'categories': Article.CATEGORY_CHOICES,
+        'current_category': request.GET.get('category'),
+    })
+
+def search_json(request):
+    query, page, hits, has_next = _run_search(request)
+    return JsonResponse({
+        "query": query,
+        "page": page,
+        "has_next": has_next,
+        "results": [
+            {
+                "pk": str(article.pk),
+                "title": article.title,
+                "snippet": search.highlight(article.content, query),
+                "score": round(score, 4),
+                "category": article.category,
+                "thumbnail": article.thumbnail,
+                "created_at": article.created_at.isoformat(),
             }
-        })
-    return JsonResponse(list_articles, safe=False)
+            for article, score in hits
+        ],
+    })
 
 def show_json_by_id(request, id):
-    data = Article.objects.filter(pk=id)
+    data = Article.objects.filter(pk=id).select_related('author')
     
     list_articles = []
     for item in data:
@@ -277,7 +476,13 @@ def create_article_flutter(request):
 
             new_article.save()
 
-            return JsonResponse({"status": True, "message": "Berita berhasil dibuat!"}, status=200)
+            # Artikel tetap dibuat; klien diberi tahu jika isinya hampir sama dengan artikel lain
+            similar = fingerprint.duplicate_of(new_article)
+            near_duplicate = {"id": similar.pk, "title": similar.title} if similar else None
+
+            return JsonResponse({
+                "status": True, "message": "Berita berhasil dibuat!", "near_duplicate": near_duplicate,
+            }, status=200)
         except Exception as e:
             return JsonResponse({"status": False, "message": str(e)}, status=500)
             
@@ -2,6 +2,8 @@
 ASGI config for sporra project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Live update forum (SSE, forumdiskusi/live.py) hanya jalan di ASGI, mis.
+``uvicorn sporra.asgi:application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -0,0 +1,252 @@
+"""
+Verifikasi query plan untuk query "panas" (ArticleListView, home_event,
+get_events_ajax, forum, top forums, book_ticket, stok tiket yang di-shard).
+
+Setiap test menjalankan view sungguhan sambil merekam SQL-nya, lalu
+menjalankan EXPLAIN untuk query yang membaca tabel utama view tersebut dan
+memastikan database memakai index, bukan full table scan (dan tidak perlu
+sort tambahan untuk ORDER BY). Di PostgreSQL ``enable_seqscan`` dimatikan
+selama EXPLAIN supaya planner memilih index jika memang ada yang cocok,
+walau datanya sedikit.
+"""
+import datetime
+import re
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from event.models import Event
+from forumdiskusi import ranking, stats
+from forumdiskusi.models import ForumDiskusi, Post
+from news.models import Article
+from ticketing import inventory
+from ticketing.models import BookingRequest, Ticket, TicketShard
+
+
+def explain(sql, params=()):
+    """Baris-baris query plan untuk ``sql``."""
+    with transaction.atomic(), connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute('EXPLAIN ' + sql, params or None)
+            return [row[0] for row in cursor.fetchall()]
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def is_full_scan(plan, table):
+    for line in plan:
+        if connection.vendor == 'postgresql':
+            if re.search(rf'Seq Scan on {table}\b', line):
+                return True
+        # SQLite: "SCAN tabel" tanpa "USING (COVERING) INDEX"
+        elif re.fullmatch(rf'SCAN (TABLE )?{table}( AS \w+)?', line.strip()):
+            return True
+    return False
+
+
+def needs_sort(plan):
+    for line in plan:
+        if connection.vendor == 'postgresql':
+            if re.match(r'\s*(->\s*)?(Incremental )?Sort\b', line):
+                return True
+        elif re.search(r'USE TEMP B-TREE FOR (RIGHT PART OF |LAST TERM OF )?ORDER BY', line):
+            return True
+    return False
+
+
+class QueryPlanTestCase(TestCase):
+
+    def capture(self, method, url, data=None):
+        with CaptureQueriesContext(connection) as ctx:
+            response = getattr(self.client, method)(url, data or {})
+        self.assertLess(response.status_code, 400)
+        return [query['sql'] for query in ctx.captured_queries]
+
+    def assertUsesIndex(self, queries, table, where=None):
+        """
+        Semua SELECT dengan ``FROM table`` (opsional: yang SQL-nya memuat
+        ``where``) harus memakai index. Return jumlah query yang diperiksa.
+        """
+        checked = 0
+        for sql in queries:
+            if not sql.startswith('SELECT') or f'FROM "{table}"' not in sql:
+                continue
+            if where and where not in sql:
+                continue
+            plan = explain(sql)
+            self.assertFalse(is_full_scan(plan, table), f"Full scan pada {table}:\n{sql}\n{plan}")
+            if 'ORDER BY' in sql:
+                self.assertFalse(needs_sort(plan), f"Sort tanpa index pada {table}:\n{sql}\n{plan}")
+            checked += 1
+        self.assertTrue(checked, f"Tidak ada query ke {table} yang diperiksa")
+        return checked
+
+    def assertQuerySetUsesIndex(self, queryset, table):
+        sql, params = queryset.query.sql_with_params()
+        plan = explain(sql, params)
+        self.assertFalse(is_full_scan(plan, table), f"Full scan pada {table}:\n{sql}\n{plan}")
+        if queryset.ordered:
+            self.assertFalse(needs_sort(plan), f"Sort tanpa index pada {table}:\n{sql}\n{plan}")
+
+
+class ArticleListPlanTest(QueryPlanTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username='planuser', password='password')
+        now = timezone.now()
+        categories = [value for value, _ in Article.CATEGORY_CHOICES]
+        Article.objects.bulk_create([
+            Article(
+                title=f'Artikel {i}', content='...', author=user, news_views=i,
+                category=categories[i % len(categories)], created_at=now - datetime.timedelta(hours=i),
+            )
+            for i in range(200)
+        ])
+
+    def test_category_filter(self):
+        queries = self.capture('get', reverse('news:article-list'), {'category': 'f1'})
+        # COUNT untuk paginator + halaman pertama
+        self.assertEqual(self.assertUsesIndex(queries, 'news_article', where='"category" ='), 2)
+
+    def test_latest(self):
+        queries = self.capture('get', reverse('news:article-list'), {'page': 2})
+        self.assertUsesIndex(queries, 'news_article', where='LIMIT')
+
+    def test_most_viewed(self):
+        self.assertQuerySetUsesIndex(Article.objects.order_by('-news_views')[:10], 'news_article')
+
+
+class EventPlanTest(QueryPlanTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='planuser', password='password')
+        now = timezone.now()
+        categories = [value for value, _ in Event.CATEGORY_CHOICES]
+        Event.objects.bulk_create([
+            Event(
+                judul=f'Event {i}', deskripsi='...', lokasi='GBK', user=cls.user,
+                kategori=categories[i % len(categories)], date=now + datetime.timedelta(days=i - 100),
+            )
+            for i in range(200)
+        ])
+
+    def test_home_event(self):
+        # Template mengambil data lewat get_events_ajax; queryset di context diperiksa langsung
+        self.client.force_login(self.user)
+        for params in ({}, {'category': 'futsal'}):
+            response = self.client.get(reverse('event:home_event'), params)
+            self.assertQuerySetUsesIndex(response.context['upcoming_events'], 'event_event')
+            self.assertQuerySetUsesIndex(response.context['past_events'], 'event_event')
+
+    def test_get_events_ajax(self):
+        self.client.force_login(self.user)
+        queries = self.capture('get', reverse('event:get_events_ajax'))
+        self.assertUsesIndex(queries, 'event_event', where='"date"')
+
+    def test_get_events_ajax_category(self):
+        queries = self.capture('get', reverse('event:get_events_ajax'), {'category': 'renang'})
+        self.assertEqual(self.assertUsesIndex(queries, 'event_event', where='"kategori" ='), 2)
+
+
+class ForumPlanTest(QueryPlanTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='planuser', password='password')
+        articles = [Article.objects.create(title=f'Forum {i}', content='...', author=cls.user) for i in range(5)]
+        cls.article = articles[0]
+        forums = [ForumDiskusi.objects.create(article=article) for article in articles]
+        Post.objects.bulk_create([
+            Post(forum=forums[i % len(forums)], author=cls.user, content=f'Komentar {i}', score=i % 7)
+            for i in range(200)
+        ])
+        stats.reconcile()
+
+    def test_forum_comments(self):
+        self.client.force_login(self.user)
+        queries = self.capture('get', reverse('forumdiskusi:forum', args=[self.article.pk]))
+        self.assertUsesIndex(queries, 'forumdiskusi_post', where='"forum_id" =')
+
+    def test_forum_comments_next_page(self):
+        first = self.client.get(reverse('forumdiskusi:forum_json', args=[self.article.pk])).json()
+        queries = self.capture(
+            'get', reverse('forumdiskusi:forum_comments_json', args=[self.article.pk]),
+            {'cursor': first['next_cursor']},
+        )
+        self.assertUsesIndex(queries, 'forumdiskusi_post', where='"forum_id" =')
+
+    def test_forum_comment_sort_modes(self):
+        url = reverse('forumdiskusi:forum_comments_json', args=[self.article.pk])
+        for sort in ranking.MODES:
+            first = self.client.get(url, {'sort': sort}).json()
+            queries = self.capture('get', url, {'sort': sort, 'cursor': first['next_cursor']})
+            self.assertUsesIndex(queries, 'forumdiskusi_post', where='"forum_id" =')
+
+    def test_top_forums(self):
+        self.assertQuerySetUsesIndex(stats.top_forums()[:3], 'forumdiskusi_forumdiskusi')
+
+
+class BookTicketPlanTest(QueryPlanTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='planuser', password='password')
+        now = timezone.now()
+        events = Event.objects.bulk_create([
+            Event(judul=f'Event {i}', deskripsi='...', lokasi='GBK', date=now + datetime.timedelta(days=i))
+            for i in range(50)
+        ])
+        Ticket.objects.bulk_create([
+            Ticket(event=event, ticket_type=ticket_type, price=Decimal('50000'), available=100)
+            for event in events for ticket_type in ('regular', 'vip')
+        ])
+        cls.event = events[10]
+        cls.ticket = Ticket.objects.get(event=cls.event, ticket_type='vip')
+
+    def test_book_ticket(self):
+        self.client.force_login(self.user)
+        queries = self.capture(
+            'post', reverse('ticketing:book_ticket', args=[self.event.pk]),
+            {'ticket': self.ticket.pk, 'quantity': 2},
+        )
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.available, 98)
+        self.assertUsesIndex(queries, 'ticketing_ticket')
+
+    def test_available_tickets_for_event(self):
+        self.assertQuerySetUsesIndex(Ticket.objects.filter(event=self.event, available__gt=0), 'ticketing_ticket')
+
+    def test_booking_queue(self):
+        users = User.objects.bulk_create([User(username=f'antre{i}') for i in range(30)])
+        tickets = list(Ticket.objects.all()[:20])
+        BookingRequest.objects.bulk_create([
+            BookingRequest(
+                ticket=ticket, user=user, quantity=1,
+                status=BookingRequest.BOOKED if i % 3 else BookingRequest.PENDING,
+            )
+            for ticket in tickets for i, user in enumerate(users)
+        ])
+        pending = BookingRequest.objects.filter(ticket=self.ticket, status=BookingRequest.PENDING)
+        # Batch worker (FIFO) dan posisi antrean
+        self.assertQuerySetUsesIndex(pending.order_by('pk'), 'ticketing_bookingrequest')
+        self.assertQuerySetUsesIndex(pending.filter(pk__lte=10**6), 'ticketing_bookingrequest')
+
+    def test_sharded_stock(self):
+        hot = list(Ticket.objects.all()[:3])
+        for ticket in hot:
+            inventory.reshard(ticket, 8)
+        queries = self.capture('get', reverse('ticketing:get_tickets'))
+        # ETag: tiket yang di-shard, lalu SUM stok per tiket
+        self.assertUsesIndex(queries, 'ticketing_ticket', where='"shard_count" >')
+        self.assertUsesIndex(queries, 'ticketing_ticketshard')
+        self.assertQuerySetUsesIndex(
+            TicketShard.objects.filter(ticket=hot[0], available__gt=0).order_by('index'), 'ticketing_ticketshard'
+        )
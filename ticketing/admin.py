@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Event, Ticket, Booking
+from .models import Event, Ticket, Booking, BookingRequest
 
 @admin.register(Event)
 class EventAdmin(admin.ModelAdmin):
@@ -7,8 +7,13 @@ class EventAdmin(admin.ModelAdmin):
 
 @admin.register(Ticket)
 class TicketAdmin(admin.ModelAdmin):
-    list_display = ('event', 'ticket_type', 'price', 'available')
+    list_display = ('event', 'ticket_type', 'price', 'available', 'queue_mode', 'shard_count')
 
 @admin.register(Booking)
 class BookingAdmin(admin.ModelAdmin):
     list_display = ('user', 'ticket', 'quantity', 'booked_at')
+
+@admin.register(BookingRequest)
+class BookingRequestAdmin(admin.ModelAdmin):
+    list_display = ('user', 'ticket', 'quantity', 'status', 'created_at', 'processed_at')
+    list_filter = ('status',)
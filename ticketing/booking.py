@@ -0,0 +1,88 @@
+"""
+Booking engine for ticket purchases.
+
+One booking = one short transaction, and stock can never go negative:
+
+1. ``UPDATE ticket SET available = available - q WHERE id = ? AND available >= q``.
+   The database checks and decrements stock in the same statement (the row
+   stays locked until commit). If no row matched, the tickets are sold out and
+   nothing else runs, so a sold-out answer costs a single statement.
+2. Upsert the user's booking (unique ``(user, ticket)``):
+   ``UPDATE booking SET quantity = quantity + q, total_price = (quantity + q) * price``.
+   If there is no booking yet, INSERT it. If a concurrent request from the same
+   user inserted it first, the UPDATE is retried.
+
+If step 2 fails, the stock decrement rolls back with it. Lock conflicts
+(serialization failure/deadlock on PostgreSQL, a locked database on SQLite)
+retry the whole transaction a few times.
+
+Tickets with sharded stock (``Ticket.shard_count``) reserve from their shard
+rows instead of step 1, see ticketing/inventory.py.
+"""
+import random
+import time
+
+from django.db import IntegrityError, OperationalError, transaction
+from django.db.models import F
+
+from . import inventory
+from .models import Booking, Ticket
+
+MAX_ATTEMPTS = 10
+# Max pause between attempts (seconds): random, growing exponentially up to this cap
+MAX_BACKOFF = 0.2
+
+
+class SoldOut(Exception):
+    """Not enough tickets left for the requested quantity."""
+
+
+def _add_to_booking(user, ticket, quantity):
+    return Booking.objects.filter(user=user, ticket=ticket).update(
+        quantity=F('quantity') + quantity,
+        total_price=(F('quantity') + quantity) * ticket.price,
+    )
+
+
+def _upsert_booking(user, ticket, quantity):
+    if _add_to_booking(user, ticket, quantity):
+        return
+    try:
+        with transaction.atomic():
+            Booking.objects.create(user=user, ticket=ticket, quantity=quantity, total_price=ticket.price * quantity)
+    except IntegrityError:
+        # Same user booked concurrently and inserted first
+        _add_to_booking(user, ticket, quantity)
+
+
+def _book(user, ticket, quantity):
+    if ticket.shard_count:
+        # Sharded stock: the Ticket row stays untouched (see ticketing/inventory.py)
+        if not inventory.reserve(ticket, quantity):
+            raise SoldOut(ticket)
+        _upsert_booking(user, ticket, quantity)
+        return
+    # shard_count=0: a stale ticket object must not sell from Ticket.available after a reshard
+    reserved = Ticket.objects.filter(pk=ticket.pk, shard_count=0, available__gte=quantity).update(
+        available=F('available') - quantity
+    )
+    if not reserved:
+        raise SoldOut(ticket)
+    # No feed version bump: the tickets ETag includes the total stock (ticketing/views.py)
+    _upsert_booking(user, ticket, quantity)
+
+
+def book(user, ticket, quantity):
+    """
+    Book ``quantity`` tickets of ``ticket`` for ``user``.
+    Raise ``SoldOut`` if fewer than ``quantity`` tickets are left.
+    """
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            with transaction.atomic():
+                _book(user, ticket, quantity)
+                return
+        except OperationalError:
+            if attempt == MAX_ATTEMPTS:
+                raise
+            time.sleep(random.uniform(0, min(MAX_BACKOFF, 0.002 * 2 ** attempt)))
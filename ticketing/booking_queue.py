@@ -0,0 +1,124 @@
+"""
+Queue mode for flash sales (``Ticket.queue_mode``).
+
+In normal mode every purchase runs its own transaction against the ``Ticket``
+row (ticketing/booking.py). When a popular event opens, all of those
+transactions queue up behind one row lock. In queue mode:
+
+1. ``book_ticket`` only INSERTs a ``BookingRequest`` (no ``Ticket`` row lock)
+   and answers immediately with a token and the queue position.
+2. The worker (``python manage.py process_booking_queue``) locks the
+   ``Ticket`` once per batch, allocates stock to up to ``batch_size`` pending
+   requests in FIFO order, then writes the whole batch with a fixed number of
+   statements: one ``Ticket`` UPDATE, one bulk update/insert of bookings, and
+   one UPDATE per result status. Throughput therefore depends on the batch
+   size, not on row-lock latency.
+3. The client polls ``ticketing/queue/<token>/`` until the status is
+   ``booked`` or ``sold_out``.
+
+A request that does not fit in the remaining stock is rejected (``sold_out``);
+later, smaller requests can still get the remaining tickets. For a ticket with
+sharded stock (ticketing/inventory.py) the batch takes from the locked shards
+with one bulk update instead of the ``Ticket`` UPDATE.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import inventory
+from .models import Booking, BookingRequest, Ticket
+
+DEFAULT_BATCH_SIZE = 500
+
+
+def enqueue(user, ticket, quantity):
+    """Add a request to ``ticket``'s queue. Return ``(BookingRequest, position)``."""
+    request = BookingRequest.objects.create(user=user, ticket=ticket, quantity=quantity)
+    return request, position(request)
+
+
+def position(request):
+    """1-based position among ``request``'s ticket's pending requests, or None if already processed."""
+    if request.status != BookingRequest.PENDING:
+        return None
+    return BookingRequest.objects.filter(
+        ticket_id=request.ticket_id, status=BookingRequest.PENDING, pk__lte=request.pk
+    ).count()
+
+
+def pending_tickets():
+    """Ids of tickets that have pending requests."""
+    return list(
+        BookingRequest.objects.filter(status=BookingRequest.PENDING)
+        .order_by().values_list('ticket_id', flat=True).distinct()
+    )
+
+
+def _save_bookings(ticket, quantities):
+    """Add ``{user_id: quantity}`` to the users' bookings (bulk update + bulk insert)."""
+    existing = {b.user_id: b for b in Booking.objects.filter(ticket=ticket, user_id__in=list(quantities))}
+    new = []
+    for user_id, quantity in quantities.items():
+        booking = existing.get(user_id)
+        if booking is None:
+            new.append(Booking(user_id=user_id, ticket=ticket, quantity=quantity, total_price=ticket.price * quantity))
+        else:
+            booking.quantity += quantity
+            booking.total_price = ticket.price * booking.quantity
+    Booking.objects.bulk_update(existing.values(), ['quantity', 'total_price'])
+    Booking.objects.bulk_create(new)
+
+
+def drain(ticket_id, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Process up to ``batch_size`` pending requests for one ticket in one transaction.
+    Return ``(booked, sold_out)`` request counts.
+    """
+    with transaction.atomic():
+        # The Ticket row lock serializes workers (and normal-mode bookings) per ticket
+        ticket = (
+            Ticket.objects.select_for_update().only('pk', 'price', 'available', 'shard_count')
+            .filter(pk=ticket_id).first()
+        )
+        if ticket is None:
+            return 0, 0
+        batch = list(
+            BookingRequest.objects.filter(ticket_id=ticket_id, status=BookingRequest.PENDING)
+            .order_by('pk').only('pk', 'user_id', 'quantity')[:batch_size]
+        )
+        shards = inventory.lock_shards(ticket) if ticket.shard_count else None
+        available = sum(shard.available for shard in shards) if shards is not None else ticket.available
+        remaining = available
+        booked, sold_out = [], []
+        quantities = defaultdict(int)
+        for request in batch:
+            if request.quantity <= remaining:
+                remaining -= request.quantity
+                quantities[request.user_id] += request.quantity
+                booked.append(request.pk)
+            else:
+                sold_out.append(request.pk)
+
+        if booked:
+            if shards is not None:
+                inventory.take(shards, available - remaining)
+            else:
+                Ticket.objects.filter(pk=ticket_id).update(available=F('available') - (available - remaining))
+            _save_bookings(ticket, quantities)
+        now = timezone.now()
+        for status, pks in ((BookingRequest.BOOKED, booked), (BookingRequest.SOLD_OUT, sold_out)):
+            if pks:
+                BookingRequest.objects.filter(pk__in=pks).update(status=status, processed_at=now)
+    return len(booked), len(sold_out)
+
+
+def process(batch_size=DEFAULT_BATCH_SIZE):
+    """One round over every ticket with a queue: one batch each. Return ``(booked, sold_out)``."""
+    booked = sold_out = 0
+    for ticket_id in pending_tickets():
+        b, s = drain(ticket_id, batch_size)
+        booked += b
+        sold_out += s
+    return booked, sold_out
@@ -0,0 +1,169 @@
+"""
+Sharded stock for hot ticket types (``Ticket.shard_count > 0``).
+
+With a single stock row, the conditional decrement in ticketing/booking.py
+still makes every buyer of one ticket type wait for the previous buyer's row
+lock until commit. A sharded ticket splits its stock across ``shard_count``
+``TicketShard`` rows:
+
+- A buyer starts at a random shard. The whole quantity is taken from the first
+  shard that has enough (``UPDATE ... WHERE available >= q`` per shard), so
+  concurrent buyers usually lock different rows.
+- If no single shard has enough, all non-empty shards are locked in index
+  order (so there are no deadlocks) and the quantity is taken across them.
+  ``reserve`` only fails when the ticket is really sold out.
+- Purchases do not touch the ``Ticket`` row. The total shown by
+  ``get_tickets_ajax``/``all_tickets`` is a SUM over the shards, cached for
+  ``TICKET_SHARD_TOTAL_TTL`` seconds.
+- Purchases do not bump the tickets feed version either. The feed ETag uses
+  ``stock_fingerprint()`` (total stock of all tickets), cached for the same
+  TTL, so a conditional GET costs no aggregate query. The price is that the
+  ETag (like the totals) may lag a purchase by up to the TTL.
+
+Switch with ``python manage.py shard_ticket <id> --shards N`` (0 = back to one
+row). ``python manage.py benchmark_inventory`` compares throughput.
+
+Settings (optional):
+    TICKET_SHARD_TOTAL_TTL  seconds the cached total may lag (default 2)
+"""
+import random
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Sum
+
+from .models import Ticket, TicketShard
+
+CACHE_KEY_PREFIX = 'ticketstock'
+FINGERPRINT_KEY = f'{CACHE_KEY_PREFIX}:fingerprint'
+MAX_SHARDS = 64
+
+
+def get_total_ttl():
+    return getattr(settings, 'TICKET_SHARD_TOTAL_TTL', 2)
+
+
+def _total_key(ticket_id):
+    return f"{CACHE_KEY_PREFIX}:{ticket_id}"
+
+
+def split(total, shards):
+    """Split ``total`` into ``shards`` near-equal parts (the first shards get the remainder)."""
+    base, extra = divmod(total, shards)
+    return [base + (index < extra) for index in range(shards)]
+
+
+def reshard(ticket, shards, available=None):
+    """
+    Spread ``ticket``'s stock (or the new stock ``available``) over ``shards``
+    rows. ``shards=0`` moves it back into ``Ticket.available``.
+    """
+    if not 0 <= shards <= MAX_SHARDS:
+        raise ValueError(f"shards must be between 0 and {MAX_SHARDS}")
+    with transaction.atomic():
+        locked = Ticket.objects.select_for_update().get(pk=ticket.pk)
+        if available is None:
+            available = total_locked(locked) if locked.shard_count else locked.available
+        TicketShard.objects.filter(ticket=locked).delete()
+        if shards:
+            TicketShard.objects.bulk_create(
+                TicketShard(ticket=locked, index=index, available=part)
+                for index, part in enumerate(split(available, shards))
+            )
+        ticket.shard_count, ticket.available = shards, available
+        # save() (not update()) so the tickets feed version is bumped
+        ticket.save(update_fields=['shard_count', 'available'])
+        transaction.on_commit(lambda: invalidate(ticket.pk))
+    return ticket
+
+
+def lock_shards(ticket):
+    """Lock and return ``ticket``'s non-empty shards in index order (inside a transaction)."""
+    return list(
+        TicketShard.objects.select_for_update()
+        .filter(ticket_id=ticket.pk, available__gt=0).order_by('index')
+    )
+
+
+def total_locked(ticket):
+    return sum(shard.available for shard in lock_shards(ticket))
+
+
+def take(shards, quantity):
+    """Take ``quantity`` from locked ``shards`` (in order); the caller has checked the sum."""
+    changed = []
+    for shard in shards:
+        if not quantity:
+            break
+        used = min(shard.available, quantity)
+        shard.available -= used
+        quantity -= used
+        changed.append(shard)
+    TicketShard.objects.bulk_update(changed, ['available'])
+
+
+def reserve(ticket, quantity):
+    """
+    Take ``quantity`` from ``ticket``'s shards inside the current transaction.
+    Return False (and change nothing) if fewer than ``quantity`` are left.
+    """
+    cached = cache.get(_total_key(ticket.pk))
+    # The cached total can only be too high (restocks invalidate it): below quantity means sold out
+    if cached is not None and cached < quantity:
+        return False
+    count = ticket.shard_count
+    start = random.randrange(count)
+    for offset in range(count):
+        index = (start + offset) % count
+        if TicketShard.objects.filter(ticket_id=ticket.pk, index=index, available__gte=quantity).update(
+            available=F('available') - quantity
+        ):
+            return True
+    shards = lock_shards(ticket)
+    if sum(shard.available for shard in shards) < quantity:
+        return False
+    take(shards, quantity)
+    return True
+
+
+def totals(ticket_ids):
+    """``{ticket_id: total stock}`` of sharded tickets, cached for ``TICKET_SHARD_TOTAL_TTL`` seconds."""
+    keys = {_total_key(pk): pk for pk in ticket_ids}
+    result = {keys[key]: total for key, total in cache.get_many(list(keys)).items()}
+    missing = [pk for pk in ticket_ids if pk not in result]
+    if missing:
+        sums = dict(
+            TicketShard.objects.filter(ticket_id__in=missing).order_by()
+            .values('ticket_id').annotate(total=Sum('available')).values_list('ticket_id', 'total')
+        )
+        fresh = {pk: sums.get(pk) or 0 for pk in missing}
+        cache.set_many({_total_key(pk): total for pk, total in fresh.items()}, get_total_ttl())
+        result.update(fresh)
+    return result
+
+
+def apply_totals(tickets):
+    """Set ``available`` of the sharded ``tickets`` to their (cached) total stock."""
+    tickets = list(tickets)
+    sharded = [ticket for ticket in tickets if ticket.shard_count]
+    if sharded:
+        found = totals([ticket.pk for ticket in sharded])
+        for ticket in sharded:
+            ticket.available = found[ticket.pk]
+    return tickets
+
+
+def stock_fingerprint():
+    """Stock of all tickets (plain and sharded) for the tickets feed ETag, cached for the total TTL."""
+    fingerprint = cache.get(FINGERPRINT_KEY)
+    if fingerprint is None:
+        total = Ticket.objects.aggregate(total=Sum('available'))['total']
+        sharded = list(Ticket.objects.filter(shard_count__gt=0).values_list('pk', flat=True))
+        fingerprint = (total, sorted(totals(sharded).items()) if sharded else None)
+        cache.set(FINGERPRINT_KEY, fingerprint, get_total_ttl())
+    return fingerprint
+
+
+def invalidate(ticket_id):
+    cache.delete_many([_total_key(ticket_id), FINGERPRINT_KEY])
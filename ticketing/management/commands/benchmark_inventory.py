@@ -0,0 +1,86 @@
+import threading
+import time
+import uuid
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from event.models import Event
+from ticketing import booking, inventory
+from ticketing.models import Ticket
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures concurrent booking throughput of one ticket type with 1 vs N stock rows '
+        '(ticketing/inventory.py) on the configured database (SQLite locally, PostgreSQL '
+        'with PRODUCTION=true). Creates a temporary event, ticket and users and deletes them afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--shards', default='1,8',
+            help='Comma-separated shard counts to compare, 1 = a plain ticket (default "1,8").'
+        )
+        parser.add_argument('--threads', type=int, default=16, help='Concurrent buyers (default 16).')
+        parser.add_argument('--bookings', type=int, default=50, help='Bookings per buyer (default 50).')
+
+    def handle(self, *args, **options):
+        try:
+            shard_counts = [int(value) for value in options['shards'].split(',')]
+        except ValueError:
+            raise CommandError("--shards must be a comma-separated list of numbers.")
+        if any(not 1 <= count <= inventory.MAX_SHARDS for count in shard_counts):
+            raise CommandError(f"Shard counts must be between 1 and {inventory.MAX_SHARDS}.")
+
+        threads, per_thread = options['threads'], options['bookings']
+        self.stdout.write(
+            f"{connection.vendor}: {threads} buyers x {per_thread} bookings of 1 ticket"
+        )
+        prefix = f"bench-{uuid.uuid4().hex[:8]}"
+        users = User.objects.bulk_create([User(username=f"{prefix}-{i}") for i in range(threads)])
+        event = Event.objects.create(judul=prefix, deskripsi='-', lokasi='-', date=timezone.now())
+        try:
+            for count in shard_counts:
+                ticket = Ticket.objects.create(
+                    event=event, ticket_type='vip' if count == 1 else 'regular',
+                    price=Decimal('10'), available=threads * per_thread,
+                )
+                if count > 1:
+                    inventory.reshard(ticket, count)
+                rate, failed = self._run(ticket, users, per_thread)
+                self.stdout.write(f"  {count:>3} shard(s): {rate:8.0f} bookings/s, {failed} failed")
+                ticket.delete()
+        finally:
+            # Tickets, shards and bookings go with the event and the users (cascade)
+            event.delete()
+            User.objects.filter(pk__in=[user.pk for user in users]).delete()
+
+        self.stdout.write(self.style.SUCCESS("Done!"))
+
+    def _run(self, ticket, users, per_thread):
+        barrier = threading.Barrier(len(users))
+        failed = []
+
+        def buyer(user):
+            try:
+                barrier.wait()
+                for _ in range(per_thread):
+                    try:
+                        booking.book(user, ticket, 1)
+                    except Exception:
+                        failed.append(user.pk)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=buyer, args=(user,)) for user in users]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+        return (len(users) * per_thread - len(failed)) / elapsed, len(failed)
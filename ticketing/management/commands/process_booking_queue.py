@@ -0,0 +1,55 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, close_old_connections
+
+from ticketing import booking_queue
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        'Worker for queue-mode tickets (Ticket.queue_mode): allocates stock to pending '
+        'BookingRequests in FIFO order, one batch per ticket per transaction.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=booking_queue.DEFAULT_BATCH_SIZE,
+            help=f'Requests processed per ticket per transaction (default {booking_queue.DEFAULT_BATCH_SIZE}).'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=0.2,
+            help='Seconds to sleep when the queue is empty (default 0.2).'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Drain the queue until it is empty, then exit (e.g. from cron or tests).'
+        )
+
+    def handle(self, *args, **options):
+        total_booked = total_sold_out = 0
+        while True:
+            try:
+                booked, sold_out = booking_queue.process(options['batch_size'])
+            except OperationalError:
+                if options['once']:
+                    raise
+                # Database briefly unavailable/locked: try again on the next round
+                logger.exception("Booking queue round failed")
+                close_old_connections()
+                booked = sold_out = 0
+            total_booked += booked
+            total_sold_out += sold_out
+            if booked or sold_out:
+                self.stdout.write(f"  {booked} booked, {sold_out} sold out")
+                continue
+            if options['once']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Done! {total_booked} requests booked, {total_sold_out} sold out."
+        ))
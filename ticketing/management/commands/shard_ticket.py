@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ticketing import inventory
+from ticketing.models import Ticket
+
+
+class Command(BaseCommand):
+    help = (
+        'Spreads the stock of a hot ticket type over N shard rows so concurrent buyers '
+        'lock different rows (see ticketing/inventory.py). --shards 0 moves it back to one row.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('ticket_id', type=int)
+        parser.add_argument(
+            '--shards', type=int, default=8,
+            help=f'Number of shard rows, 0-{inventory.MAX_SHARDS} (default 8).'
+        )
+
+    def handle(self, *args, **options):
+        ticket = Ticket.objects.filter(pk=options['ticket_id']).first()
+        if ticket is None:
+            raise CommandError(f"Ticket {options['ticket_id']} not found.")
+        try:
+            inventory.reshard(ticket, options['shards'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(
+            f"Done! {ticket}: {ticket.available} tickets in {ticket.shard_count or 1} row(s)."
+        ))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('event', '0003_hot_query_indexes'),
+        ('ticketing', '0005_alter_ticket_unique_together'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['event', 'available'], name='ticket_event_available_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('event', '0003_hot_query_indexes'),
+        ('ticketing', '0007_booking_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveSmallIntegerField()),
+                ('available', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='shard_count',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(condition=models.Q(('shard_count__gt', 0)), fields=['id'], name='ticket_sharded_idx'),
+        ),
+        migrations.AddField(
+            model_name='ticketshard',
+            name='ticket',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shards', to='ticketing.ticket'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='ticketshard',
+            unique_together={('ticket', 'index')},
+        ),
+    ]
@@ -1,3 +1,5 @@
+import uuid
+
 from django.db import models
 from django.contrib.auth.models import User
 from event.models import Event
@@ -11,11 +13,34 @@ class Ticket(models.Model):
     ])
     price = models.DecimalField(max_digits=15, decimal_places=2)
     available = models.PositiveIntegerField(default=0)  # sisa tiket tersedia
+    # Flash sale: booking masuk antrean BookingRequest dan dialokasikan oleh worker
+    # (python manage.py process_booking_queue), lihat ticketing/booking_queue.py
+    queue_mode = models.BooleanField(default=False)
+    # 0 = stok di kolom available; >0 = stok dibagi ke TicketShard (lihat ticketing/inventory.py),
+    # available hanya total terakhir saat stok dibagi/diubah
+    shard_count = models.PositiveSmallIntegerField(default=0)
     class Meta:
         unique_together = ('event', 'ticket_type')  # <--- mencegah tipe yang sama di 1 event
+        indexes = [
+            # book_ticket / detail event: WHERE event_id = ? AND available > 0
+            models.Index(fields=['event', 'available'], name='ticket_event_available_idx'),
+            # ETag get_tickets_ajax: WHERE shard_count > 0 (biasanya hanya sedikit tiket)
+            models.Index(fields=['id'], name='ticket_sharded_idx', condition=models.Q(shard_count__gt=0)),
+        ]
     def __str__(self):
         return f"{self.ticket_type} - {self.event.judul}"
 
+class TicketShard(models.Model):
+    ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name="shards")
+    index = models.PositiveSmallIntegerField()
+    available = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('ticket', 'index')
+
+    def __str__(self):
+        return f"{self.ticket} #{self.index} ({self.available})"
+
 class Booking(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE)
@@ -30,3 +55,35 @@ class Booking(models.Model):
 
     class Meta:
         unique_together = ('user', 'ticket')  # biar user gak pesan tiket yg sama dua kali
+
+
+class BookingRequest(models.Model):
+    PENDING = 'pending'
+    BOOKED = 'booked'
+    SOLD_OUT = 'sold_out'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (BOOKED, 'Booked'),
+        (SOLD_OUT, 'Sold out'),
+    ]
+
+    token = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name="booking_requests")
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    quantity = models.PositiveIntegerField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # worker: antrean satu tiket urut FIFO; posisi antrean: COUNT range yang sama
+            models.Index(
+                fields=['ticket', 'id'], name='booking_queue_pending_idx',
+                condition=models.Q(status='pending'),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.ticket} x{self.quantity} ({self.status})"
+
@@ -1,15 +1,24 @@
 from event.models import Event 
-from ticketing.models import Ticket, Booking
+from ticketing.models import Ticket, TicketShard, Booking, BookingRequest
 from ticketing.forms import BookingForm, TicketForm, TicketSelectionForm
 from django.contrib.auth.models import User
 from django.urls import reverse, resolve
-from django.test import TestCase, Client, LiveServerTestCase
+from django.core.management import call_command, CommandError
+from django.core.cache import cache
+from io import StringIO
+from django.test import TestCase, TransactionTestCase, Client, LiveServerTestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import DatabaseError, connection
 from django.utils import timezone
 from decimal import Decimal
 import datetime
 import json
+import random
+import threading
+from unittest import mock
 from django.urls import resolve
-from ticketing import views
+from ticketing import booking, booking_queue, inventory, views
+from news import feed_versions
 from profile_user.models import UserProfile
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -137,6 +146,18 @@ class TicketingViewsTest(TestCase):
         data = response.json()
         self.assertIn('tickets', data)
 
+    def test_get_tickets_ajax_not_modified(self):
+        url = reverse('ticketing:get_tickets')
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.ticket.available = 5
+        self.ticket.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['tickets'][0]['available'], 5)
+
     def test_create_ticket_ajax(self):
         url = reverse('ticketing:create_ticket')
         payload = {
@@ -243,6 +264,415 @@ class TicketingViewsTest(TestCase):
         self.assertEqual(response.json()['error'], 'Invalid method')
             
 # ===========================
+# ===========================
+# Booking Engine Test
+# ===========================
+class BookingEngineTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="buyer", password="12345")
+        self.event = Event.objects.create(judul="Flash Sale", user=self.user, date=timezone.now())
+        self.ticket = Ticket.objects.create(event=self.event, ticket_type="regular", price=Decimal("100.00"), available=5)
+
+    def test_book_and_top_up(self):
+        booking.book(self.user, self.ticket, 2)
+        booking.book(self.user, self.ticket, 1)
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.available, 2)
+        b = Booking.objects.get(user=self.user, ticket=self.ticket)
+        self.assertEqual((b.quantity, b.total_price), (3, Decimal("300.00")))
+
+    def test_booking_changes_tickets_etag(self):
+        url = reverse('ticketing:get_tickets')
+        etag = self.client.get(url)['ETag']
+        before = feed_versions.get_versions([feed_versions.TICKETING])
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.book(self.user, self.ticket, 1)
+        # Tanpa UPDATE ke baris FeedVersion global
+        self.assertEqual(feed_versions.get_versions([feed_versions.TICKETING]), before)
+        # 304 dalam TTL fingerprint stok: hanya query FeedVersion, tanpa agregat stok
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # Setelah TTL lewat, ETag berubah lewat total stok
+        cache.delete(inventory.FINGERPRINT_KEY)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['tickets'][0]['available'], 4)
+
+    def test_edit_without_stock_keeps_concurrent_bookings(self):
+        self.client.login(username="buyer", password="12345")
+        stale = Ticket.objects.get(pk=self.ticket.pk)
+        # Pembelian terjadi setelah view membaca tiket, sebelum edit disimpan
+        booking.book(self.user, self.ticket, 3)
+        url = reverse('ticketing:edit_ticket_ajax', args=[self.ticket.id])
+        with mock.patch.object(views, 'get_object_or_404', return_value=stale):
+            self.client.post(url, json.dumps({'price': '120.00'}), content_type='application/json')
+        self.ticket.refresh_from_db()
+        self.assertEqual((self.ticket.price, self.ticket.available), (Decimal('120.00'), 2))
+
+        with mock.patch.object(views, 'get_object_or_404', return_value=stale):
+            self.client.post(url, json.dumps({'available': 8}), content_type='application/json')
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.available, 8)
+
+    def test_sold_out_is_one_statement(self):
+        Ticket.objects.filter(pk=self.ticket.pk).update(available=1)
+        # self.ticket masih menganggap stok 5 (snapshot form yang basi)
+        with CaptureQueriesContext(connection) as ctx:
+            with self.assertRaises(booking.SoldOut):
+                booking.book(self.user, self.ticket, 2)
+        statements = [q['sql'] for q in ctx.captured_queries if 'SAVEPOINT' not in q['sql']]
+        self.assertEqual(len(statements), 1)
+        self.assertTrue(statements[0].startswith('UPDATE "ticketing_ticket"'))
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.available, 1)
+        self.assertFalse(Booking.objects.exists())
+
+    def test_failed_booking_releases_stock(self):
+        with mock.patch.object(booking, '_upsert_booking', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                booking.book(self.user, self.ticket, 2)
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.available, 5)
+
+    def test_view_reports_sold_out(self):
+        self.client.login(username="buyer", password="12345")
+        url = reverse('ticketing:book_ticket', kwargs={'event_id': self.event.id})
+        with mock.patch.object(booking, 'book', side_effect=booking.SoldOut):
+            data = self.client.post(url, {'ticket': self.ticket.id, 'quantity': 2}).json()
+        self.assertEqual((data['status'], data['code']), ('error', 'sold_out'))
+
+        response = self.client.post(url, {'ticket': self.ticket.id, 'quantity': 2})
+        self.assertEqual(response.json()['status'], 'success')
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.available, 3)
+
+    def test_view_requires_login(self):
+        url = reverse('ticketing:book_ticket', kwargs={'event_id': self.event.id})
+        response = self.client.post(url, {'ticket': self.ticket.id, 'quantity': 1})
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(Booking.objects.exists())
+
+
+class BookingStressTest(TransactionTestCase):
+    STOCK = 25
+
+    def setUp(self):
+        owner = User.objects.create_user(username="owner")
+        self.event = Event.objects.create(judul="Flash Sale", user=owner, date=timezone.now())
+        self.ticket = Ticket.objects.create(event=self.event, ticket_type="vip", price=Decimal("50.00"), available=self.STOCK)
+        self.buyers = User.objects.bulk_create([User(username=f"buyer{i}") for i in range(40)])
+        # SQLite in-memory (shared cache) langsung menolak lock tanpa busy timeout,
+        # jadi dengan 40 thread sekaligus percobaan ulangnya perlu lebih banyak
+        patcher = mock.patch.object(booking, 'MAX_ATTEMPTS', 100)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _run_concurrently(self, jobs):
+        barrier = threading.Barrier(len(jobs))
+        sold, sold_out, errors = [], [], []
+
+        def worker(user, quantity):
+            try:
+                # Snapshot stok dari form (sebelum semua mulai bersamaan), seperti di view
+                ticket = Ticket.objects.get(pk=self.ticket.pk)
+                barrier.wait()
+                booking.book(user, ticket, quantity)
+                sold.append(quantity)
+            except booking.SoldOut:
+                sold_out.append(quantity)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=job) for job in jobs]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, [])
+        return sold, sold_out
+
+    def test_never_oversells(self):
+        rng = random.Random(23)
+        jobs = [(user, rng.randint(1, 3)) for user in self.buyers]
+        sold, sold_out = self._run_concurrently(jobs)
+
+        self.ticket.refresh_from_db()
+        booked = sum(Booking.objects.filter(ticket=self.ticket).values_list('quantity', flat=True))
+        self.assertLessEqual(booked, self.STOCK)
+        self.assertEqual(booked, sum(sold))
+        self.assertEqual(self.ticket.available, self.STOCK - booked)
+        self.assertTrue(sold_out)
+        # Yang ditolak memang tidak muat di sisa stok
+        self.assertGreater(min(sold_out), self.ticket.available)
+        for b in Booking.objects.filter(ticket=self.ticket):
+            self.assertEqual(b.total_price, b.quantity * Decimal("50.00"))
+
+    def test_same_user_concurrent_orders(self):
+        buyer = self.buyers[0]
+        sold, sold_out = self._run_concurrently([(buyer, 4)] * 8)
+        self.ticket.refresh_from_db()
+        b = Booking.objects.get(user=buyer, ticket=self.ticket)
+        self.assertEqual(b.quantity, sum(sold))
+        self.assertEqual((b.quantity, len(sold_out)), (24, 2))
+        self.assertEqual(self.ticket.available, 1)
+
+
+# ===========================
+# Booking Queue (Flash Sale) Test
+# ===========================
+class BookingQueueTest(TestCase):
+    def setUp(self):
+        self.users = [User.objects.create_user(username=f"fan{i}", password="12345") for i in range(4)]
+        self.event = Event.objects.create(judul="Konser", user=self.users[0], date=timezone.now())
+        self.ticket = Ticket.objects.create(
+            event=self.event, ticket_type="vip", price=Decimal("75.00"), available=5, queue_mode=True
+        )
+        self.url = reverse('ticketing:book_ticket', kwargs={'event_id': self.event.id})
+
+    def _enqueue(self, user, quantity):
+        return booking_queue.enqueue(user, self.ticket, quantity)[0]
+
+    def test_view_enqueues_without_touching_stock(self):
+        self.client.login(username="fan1", password="12345")
+        first = self.client.post(self.url, {'ticket': self.ticket.id, 'quantity': 2}).json()
+        second = self.client.post(self.url, {'ticket': self.ticket.id, 'quantity': 1}).json()
+        self.assertEqual((first['status'], first['position']), ('queued', 1))
+        self.assertEqual(second['position'], 2)
+        self.assertEqual(first['status_url'], reverse('ticketing:booking_request_status', args=[first['token']]))
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.available, 5)
+        self.assertFalse(Booking.objects.exists())
+
+    def test_fifo_allocation(self):
+        requests = [
+            self._enqueue(self.users[1], 2),
+            self._enqueue(self.users[2], 4),  # tidak muat setelah permintaan pertama
+            self._enqueue(self.users[3], 3),
+            self._enqueue(self.users[1], 1),  # stok sudah habis
+        ]
+        self.assertEqual(booking_queue.drain(self.ticket.pk), (2, 2))
+        statuses = [r.status for r in BookingRequest.objects.order_by('pk')]
+        self.assertEqual(statuses, ['booked', 'sold_out', 'booked', 'sold_out'])
+        self.assertTrue(all(r.processed_at for r in BookingRequest.objects.all()))
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.available, 0)
+        bookings = dict(Booking.objects.values_list('user__username', 'quantity'))
+        self.assertEqual(bookings, {'fan1': 2, 'fan3': 3})
+        self.assertEqual(Booking.objects.get(user=self.users[3]).total_price, Decimal("225.00"))
+        self.assertIsNone(booking_queue.position(BookingRequest.objects.get(pk=requests[0].pk)))
+
+    def test_tops_up_existing_booking(self):
+        Booking.objects.create(user=self.users[1], ticket=self.ticket, quantity=1, total_price=Decimal("75.00"))
+        self._enqueue(self.users[1], 2)
+        self._enqueue(self.users[1], 1)
+        booking_queue.drain(self.ticket.pk)
+        b = Booking.objects.get(user=self.users[1], ticket=self.ticket)
+        self.assertEqual((b.quantity, b.total_price), (4, Decimal("300.00")))
+
+    def test_batch_cost_is_constant(self):
+        self.ticket.available = 1000
+        self.ticket.save()
+        fans = User.objects.bulk_create([User(username=f"crowd{i}") for i in range(60)])
+
+        def drain_queries(users):
+            BookingRequest.objects.bulk_create([BookingRequest(user=u, ticket=self.ticket, quantity=1) for u in users])
+            with CaptureQueriesContext(connection) as ctx:
+                booking_queue.drain(self.ticket.pk)
+            return [q['sql'] for q in ctx.captured_queries]
+
+        small = drain_queries(fans[:3])
+        large = drain_queries(fans[3:])
+        self.assertEqual(len(small), len(large))
+        ticket_updates = [sql for sql in large if sql.startswith('UPDATE "ticketing_ticket"')]
+        self.assertEqual(len(ticket_updates), 1)
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.available, 940)
+
+    def test_batch_size(self):
+        for user in self.users:
+            self._enqueue(user, 1)
+        self.assertEqual(booking_queue.drain(self.ticket.pk, batch_size=3), (3, 0))
+        self.assertEqual(BookingRequest.objects.filter(status=BookingRequest.PENDING).count(), 1)
+
+    def test_status_endpoint(self):
+        queued = self._enqueue(self.users[1], 2)
+        self._enqueue(self.users[2], 1)
+        url = reverse('ticketing:booking_request_status', args=[queued.token])
+        self.client.login(username="fan1", password="12345")
+        data = self.client.get(url).json()
+        self.assertEqual((data['status'], data['position']), ('pending', 1))
+
+        booking_queue.process()
+        data = self.client.get(url).json()
+        self.assertEqual(data['status'], 'booked')
+        self.assertNotIn('position', data)
+
+        # Token milik user lain
+        self.client.login(username="fan2", password="12345")
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_worker_command(self):
+        self._enqueue(self.users[1], 3)
+        self._enqueue(self.users[2], 3)
+        out = StringIO()
+        call_command('process_booking_queue', '--once', stdout=out)
+        self.assertIn('1 requests booked, 1 sold out', out.getvalue())
+        self.assertEqual(booking_queue.pending_tickets(), [])
+
+
+# ===========================
+# Sharded Inventory Test
+# ===========================
+class ShardedInventoryTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username="owner", password="12345")
+        self.buyer = User.objects.create_user(username="buyer", password="12345")
+        self.event = Event.objects.create(judul="Final", user=self.owner, date=timezone.now())
+        self.ticket = Ticket.objects.create(event=self.event, ticket_type="vip", price=Decimal("20.00"), available=10)
+        inventory.reshard(self.ticket, 4)
+
+    def shards(self):
+        return list(TicketShard.objects.filter(ticket=self.ticket).order_by('index').values_list('available', flat=True))
+
+    def test_split(self):
+        self.assertEqual(inventory.split(10, 4), [3, 3, 2, 2])
+        self.assertEqual(inventory.split(2, 4), [1, 1, 0, 0])
+
+    def test_reshard_keeps_total(self):
+        self.assertEqual(self.shards(), [3, 3, 2, 2])
+        booking.book(self.buyer, self.ticket, 3)
+        inventory.reshard(self.ticket, 2)
+        self.assertEqual(self.shards(), [4, 3])
+        inventory.reshard(self.ticket, 0)
+        self.ticket.refresh_from_db()
+        self.assertEqual((self.ticket.shard_count, self.ticket.available), (0, 7))
+        self.assertFalse(TicketShard.objects.exists())
+        with self.assertRaises(ValueError):
+            inventory.reshard(self.ticket, inventory.MAX_SHARDS + 1)
+
+    def test_book_takes_from_one_shard(self):
+        with CaptureQueriesContext(connection) as ctx:
+            booking.book(self.buyer, self.ticket, 2)
+        self.assertEqual(sum(self.shards()), 8)
+        self.assertEqual(Booking.objects.get(user=self.buyer).total_price, Decimal("40.00"))
+        # Baris Ticket tidak disentuh sama sekali
+        self.assertFalse([q for q in ctx.captured_queries if 'UPDATE "ticketing_ticket"' in q['sql']])
+
+    def test_falls_back_across_shards(self):
+        # Tidak ada satu shard pun yang cukup untuk 7: diambil dari beberapa shard
+        booking.book(self.buyer, self.ticket, 7)
+        self.assertEqual(sum(self.shards()), 3)
+        booking.book(self.buyer, self.ticket, 3)
+        self.assertEqual(self.shards(), [0, 0, 0, 0])
+        self.assertEqual(Booking.objects.get(user=self.buyer).quantity, 10)
+
+    def test_sold_out_changes_nothing(self):
+        with self.assertRaises(booking.SoldOut):
+            booking.book(self.buyer, self.ticket, 11)
+        self.assertEqual(self.shards(), [3, 3, 2, 2])
+        self.assertFalse(Booking.objects.exists())
+
+    def test_stale_ticket_after_reshard(self):
+        stale = Ticket.objects.get(pk=self.ticket.pk)
+        stale.shard_count = 0
+        # Objek lama (shard_count=0) tidak boleh menjual dari Ticket.available
+        with self.assertRaises(booking.SoldOut):
+            booking.book(self.buyer, stale, 1)
+        self.assertEqual(sum(self.shards()), 10)
+
+    def test_cached_total_in_views(self):
+        self.client.login(username="owner", password="12345")
+        url = reverse('ticketing:get_tickets')
+        first = self.client.get(url)
+        self.assertEqual(first.json()['tickets'][0]['available'], 10)
+        self.assertEqual(first.json()['tickets'][0]['shard_count'], 4)
+
+        booking.book(self.buyer, self.ticket, 4)
+        # Total di cache boleh tertinggal (TTL) dan ETag tetap sama
+        cached = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(cached.status_code, 304)
+
+        inventory.invalidate(self.ticket.pk)
+        fresh = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(fresh.status_code, 200)
+        self.assertEqual(fresh.json()['tickets'][0]['available'], 6)
+        response = self.client.get(reverse('ticketing:all_tickets'))
+        self.assertEqual(response.context['tickets'][0].available, 6)
+
+    def test_cached_total_fast_fails(self):
+        self.assertEqual(inventory.totals([self.ticket.pk]), {self.ticket.pk: 10})
+        booking.book(self.buyer, self.ticket, 8)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertFalse(inventory.reserve(self.ticket, 11))
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+    def test_edit_restocks_shards(self):
+        self.client.login(username="owner", password="12345")
+        url = reverse('ticketing:edit_ticket_ajax', args=[self.ticket.id])
+        self.client.post(url, json.dumps({'available': 21}), content_type='application/json')
+        self.assertEqual(self.shards(), [6, 5, 5, 5])
+
+    def test_edit_rolls_back_when_reshard_fails(self):
+        self.client.login(username="owner", password="12345")
+        url = reverse('ticketing:edit_ticket_ajax', args=[self.ticket.id])
+        with mock.patch.object(inventory, 'reshard', side_effect=DatabaseError('boom')):
+            with self.assertRaises(DatabaseError):
+                self.client.post(url, json.dumps({'available': 21, 'price': '99'}), content_type='application/json')
+        self.ticket.refresh_from_db()
+        self.assertNotEqual(self.ticket.price, Decimal('99'))
+        self.assertEqual(self.shards(), [3, 3, 2, 2])
+
+    def test_queue_drain_uses_shards(self):
+        self.ticket.queue_mode = True
+        self.ticket.save()
+        booking_queue.enqueue(self.buyer, self.ticket, 6)
+        booking_queue.enqueue(self.owner, self.ticket, 5)
+        booking_queue.enqueue(self.owner, self.ticket, 4)
+        self.assertEqual(booking_queue.drain(self.ticket.pk), (2, 1))
+        self.assertEqual(self.shards(), [0, 0, 0, 0])
+
+    def test_shard_ticket_command(self):
+        out = StringIO()
+        call_command('shard_ticket', str(self.ticket.pk), '--shards', '0', stdout=out)
+        self.assertIn('10 tickets in 1 row(s)', out.getvalue())
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.shard_count, 0)
+        with self.assertRaises(CommandError):
+            call_command('shard_ticket', '999999', stdout=out)
+
+
+class ShardedInventoryStressTest(BookingStressTest):
+    STOCK = 25
+
+    def setUp(self):
+        super().setUp()
+        inventory.reshard(self.ticket, 4)
+
+    def _available(self):
+        return sum(TicketShard.objects.filter(ticket=self.ticket).values_list('available', flat=True))
+
+    def test_never_oversells(self):
+        rng = random.Random(25)
+        sold, sold_out = self._run_concurrently([(user, rng.randint(1, 3)) for user in self.buyers])
+        booked = sum(Booking.objects.filter(ticket=self.ticket).values_list('quantity', flat=True))
+        self.assertEqual(booked, sum(sold))
+        self.assertEqual(self._available(), self.STOCK - booked)
+        self.assertTrue(sold_out)
+        self.assertGreater(min(sold_out), self._available())
+
+    def test_same_user_concurrent_orders(self):
+        buyer = self.buyers[0]
+        sold, sold_out = self._run_concurrently([(buyer, 4)] * 8)
+        b = Booking.objects.get(user=buyer, ticket=self.ticket)
+        self.assertEqual((b.quantity, len(sold_out)), (24, 2))
+        self.assertEqual(self._available(), 1)
+
+
 class TicketingSeleniumTest(LiveServerTestCase):
     def setUp(self):
         # Buat user
@@ -13,6 +13,8 @@ urlpatterns = [
     # 1. Booking Tiket 
     # Pastikan Event ID di models.py kamu pakai UUID. Jika pakai Integer, ganti <uuid:event_id> jadi <int:event_id>
     path('book/<uuid:event_id>/', views.book_ticket, name='book_ticket'),
+    # Hasil booking mode antrean (flash sale), di-poll dengan token dari book_ticket
+    path('queue/<uuid:token>/', views.booking_request_status, name='booking_request_status'),
     
     # 2. Get Data Tiket
     path('tickets/data/', views.get_tickets_ajax, name='get_tickets'),
@@ -1,16 +1,19 @@
 import json
-from decimal import Decimal
 from django.shortcuts import get_object_or_404, render, redirect
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.csrf import csrf_exempt  # <--- WAJIB untuk API Mobile
 from django.http import JsonResponse
 from django.contrib import messages
 from django.urls import reverse
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_cookie
 
-from .models import Ticket, Booking
+from . import booking, booking_queue, inventory
+from .models import Ticket, Booking, BookingRequest
 from .forms import TicketSelectionForm
 from event.models import Event
+from news import feed_versions
 
 # ==============================================================================
 #  PART 1: BOOKING TICKET (User Buys Ticket)
@@ -41,26 +44,31 @@ def book_ticket(request, event_id):
             if quantity <= 0:
                 return JsonResponse({'status': 'error', 'message': "Ticket quantity must be greater than 0."}) # EN
 
-            # 3. Validate ticket stock
+            if not request.user.is_authenticated:
+                return JsonResponse({'status': 'error', 'message': 'Please log in to book tickets.'}, status=401) # EN
+
+            # 3. Fast fail on the stock already loaded by the form (no extra query)
             if quantity > ticket.available:
                 msg = f"Only {ticket.available} tickets left for {ticket.get_ticket_type_display()}." # EN
-                return JsonResponse({'status': 'error', 'message': msg})
-
-            # 4. Process Booking (Get or Create)
-            booking, created = Booking.objects.get_or_create(
-                user=request.user,
-                ticket=ticket,
-                defaults={'quantity': 0, 'total_price': Decimal("0.00")}
-            )
+                return JsonResponse({'status': 'error', 'code': 'sold_out', 'message': msg})
 
-            # Update existing booking
-            booking.quantity += quantity
-            booking.total_price = Decimal(ticket.price) * booking.quantity
-            booking.save()
+            # 4a. Flash-sale queue mode: only enqueue, the worker allocates stock (see ticketing/booking_queue.py)
+            if ticket.queue_mode:
+                queued, position = booking_queue.enqueue(request.user, ticket, quantity)
+                return JsonResponse({
+                    'status': 'queued',
+                    'message': f"You are number {position} in the queue.", # EN
+                    'token': str(queued.token),
+                    'position': position,
+                    'status_url': reverse('ticketing:booking_request_status', args=[queued.token]),
+                })
 
-            # Reduce ticket stock
-            ticket.available -= quantity
-            ticket.save()
+            # 4b. Reserve stock + upsert booking in one transaction (see ticketing/booking.py)
+            try:
+                booking.book(request.user, ticket, quantity)
+            except booking.SoldOut:
+                msg = f"Not enough {ticket.get_ticket_type_display()} tickets left, they just sold out." # EN
+                return JsonResponse({'status': 'error', 'code': 'sold_out', 'message': msg})
 
             msg = "Ticket booked successfully! Thank you!" # EN
             
@@ -86,6 +94,26 @@ def book_ticket(request, event_id):
     return redirect('event:event_detail', id=event.id)
 
 
+# Queue-mode result (polled by the client with the token from book_ticket)
+@login_required
+def booking_request_status(request, token):
+    queued = get_object_or_404(BookingRequest.objects.select_related('ticket'), token=token, user=request.user)
+    data = {
+        'status': queued.status,
+        'token': str(queued.token),
+        'quantity': queued.quantity,
+    }
+    if queued.status == BookingRequest.PENDING:
+        data['position'] = booking_queue.position(queued)
+        data['message'] = f"You are number {data['position']} in the queue." # EN
+    elif queued.status == BookingRequest.BOOKED:
+        data['message'] = "Ticket booked successfully! Thank you!" # EN
+        data['redirect_url'] = reverse('event:home_event')
+    else:
+        data['message'] = f"Not enough {queued.ticket.get_ticket_type_display()} tickets left, they just sold out." # EN
+    return JsonResponse(data)
+
+
 # ==============================================================================
 #  PART 2: DISPLAY USER TICKETS (My Bookings)
 # ==============================================================================
@@ -126,7 +154,8 @@ def get_my_bookings_ajax(request):
 
 # HTML Version (For Django Web)
 def all_tickets(request):
-    tickets = Ticket.objects.select_related('event').all()
+    # Sharded tickets show their cached total stock (see ticketing/inventory.py)
+    tickets = inventory.apply_totals(Ticket.objects.select_related('event').all())
 
     if request.user.is_authenticated:
         try:
@@ -144,9 +173,23 @@ def all_tickets(request):
         "events": events
     })
 
+def _tickets_json_etag(request):
+    # can_edit depends on the logged-in user and their admin role
+    is_admin = False
+    if request.user.is_authenticated:
+        is_admin = getattr(getattr(request.user, 'userprofile', None), 'is_admin', False)
+    # Purchases do not bump the feed version (no queue on one FeedVersion row); they only
+    # lower stock, which the cached stock fingerprint catches within TICKET_SHARD_TOTAL_TTL
+    # (see ticketing/inventory.py). Other changes go through save() and bump the version.
+    return feed_versions.make_etag(
+        [feed_versions.TICKETING], request.user.pk, is_admin, inventory.stock_fingerprint()
+    )
+
 # JSON Version (For Flutter / API)
+@vary_on_cookie
+@condition(etag_func=_tickets_json_etag)
 def get_tickets_ajax(request):
-    tickets = Ticket.objects.select_related('event').all()
+    tickets = inventory.apply_totals(Ticket.objects.select_related('event').all())
     data = []
 
     is_admin = False
@@ -160,6 +203,8 @@ def get_tickets_ajax(request):
             "ticket_type": t.get_ticket_type_display(),
             "price": float(t.price),
             "available": t.available,
+            "queue_mode": t.queue_mode,
+            "shard_count": t.shard_count,
             "event_id": t.event.id,
             # Check if user can edit (Admin or Event Owner)
             "can_edit": request.user.is_authenticated and (is_admin or request.user == t.event.user),
@@ -185,6 +230,7 @@ def create_ticket(request):
             ticket_type = data.get('ticket_type')
             price = data.get('price')
             available = data.get('available')
+            queue_mode = bool(data.get('queue_mode', False))
 
             # 3. Validate Event ID
             if not event_id:
@@ -205,7 +251,8 @@ def create_ticket(request):
                 event=event,
                 ticket_type=ticket_type,
                 price=price,
-                available=available
+                available=available,
+                queue_mode=queue_mode,
             )
 
             return JsonResponse({
@@ -239,8 +286,20 @@ def edit_ticket_ajax(request, ticket_id):
 
         ticket.ticket_type = data.get('ticket_type', ticket.ticket_type)
         ticket.price = data.get('price', ticket.price)
-        ticket.available = data.get('available', ticket.available)
-        ticket.save()
+        ticket.queue_mode = bool(data.get('queue_mode', ticket.queue_mode))
+        # One transaction: a failed restock must not leave the edited fields half saved
+        with transaction.atomic():
+            # Never write back the stock read at the start of the request: bookings
+            # committed meanwhile would be undone (lost update -> oversell)
+            ticket.save(update_fields=['ticket_type', 'price', 'queue_mode'])
+            if 'available' in data:
+                locked = Ticket.objects.select_for_update().only('shard_count').get(pk=ticket.pk)
+                if locked.shard_count:
+                    # New stock of a sharded ticket is spread over its shards
+                    inventory.reshard(ticket, locked.shard_count, data['available'])
+                else:
+                    ticket.available = data['available']
+                    ticket.save(update_fields=['available'])
 
         return JsonResponse({'success': True})
 